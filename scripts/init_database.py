@@ -45,6 +45,22 @@ async def create_tables():
                 rotation_interval_minutes INTEGER DEFAULT 7,
                 low_watermark INTEGER DEFAULT 50,
                 target_size INTEGER DEFAULT 200,
+                selection_strategy VARCHAR(20) DEFAULT 'random',
+                max_in_flight_per_proxy INTEGER DEFAULT 4,
+                lease_ttl_seconds INTEGER DEFAULT 60,
+                expiry_safety_margin_seconds INTEGER DEFAULT 30,
+                overlap_window_seconds INTEGER DEFAULT 180,
+                warmup_seconds INTEGER DEFAULT 120,
+                backup_api_url TEXT DEFAULT '',
+                hedge_requests_enabled BOOLEAN DEFAULT FALSE,
+                health_probe_mode VARCHAR(10) DEFAULT 'tiered',
+                health_tcp_timeout_ms INTEGER DEFAULT 1500,
+                health_deep_check_interval_seconds INTEGER DEFAULT 600,
+                health_check_targets TEXT DEFAULT '',
+                health_promote_after_successes INTEGER DEFAULT 2,
+                health_recover_after_successes INTEGER DEFAULT 2,
+                health_quarantine_strikes INTEGER DEFAULT 3,
+                health_client_report_strikes INTEGER DEFAULT 2,
                 auto_start_enabled BOOLEAN DEFAULT TRUE,
                 pre_market_start_minutes INTEGER DEFAULT 2,
                 post_market_stop_minutes INTEGER DEFAULT 30,
@@ -58,6 +74,28 @@ async def create_tables():
         """)
         print("✅ 代理池配置表创建成功")
 
+        # 已有表补充新增列
+        await conn.execute("""
+            ALTER TABLE proxy_pool_config
+            ADD COLUMN IF NOT EXISTS selection_strategy VARCHAR(20) DEFAULT 'random',
+            ADD COLUMN IF NOT EXISTS max_in_flight_per_proxy INTEGER DEFAULT 4,
+            ADD COLUMN IF NOT EXISTS lease_ttl_seconds INTEGER DEFAULT 60,
+            ADD COLUMN IF NOT EXISTS expiry_safety_margin_seconds INTEGER DEFAULT 30,
+            ADD COLUMN IF NOT EXISTS overlap_window_seconds INTEGER DEFAULT 180,
+            ADD COLUMN IF NOT EXISTS warmup_seconds INTEGER DEFAULT 120,
+            ADD COLUMN IF NOT EXISTS backup_api_url TEXT DEFAULT '',
+            ADD COLUMN IF NOT EXISTS hedge_requests_enabled BOOLEAN DEFAULT FALSE,
+            ADD COLUMN IF NOT EXISTS health_probe_mode VARCHAR(10) DEFAULT 'tiered',
+            ADD COLUMN IF NOT EXISTS health_tcp_timeout_ms INTEGER DEFAULT 1500,
+            ADD COLUMN IF NOT EXISTS health_deep_check_interval_seconds INTEGER DEFAULT 600,
+            ADD COLUMN IF NOT EXISTS health_check_targets TEXT DEFAULT '',
+            ADD COLUMN IF NOT EXISTS health_promote_after_successes INTEGER DEFAULT 2,
+            ADD COLUMN IF NOT EXISTS health_recover_after_successes INTEGER DEFAULT 2,
+            ADD COLUMN IF NOT EXISTS health_quarantine_strikes INTEGER DEFAULT 3,
+            ADD COLUMN IF NOT EXISTS health_client_report_strikes INTEGER DEFAULT 2;
+        """)
+        print("✅ 代理池配置表列补充成功")
+
         # 创建代理池状态表
         await conn.execute("""
             CREATE TABLE IF NOT EXISTS proxy_pool_status (
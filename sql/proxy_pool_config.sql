@@ -14,6 +14,22 @@ CREATE TABLE IF NOT EXISTS proxy_pool_config (
     rotation_interval_minutes INT NOT NULL DEFAULT 7 COMMENT 'A/B池轮换间隔(分钟)',
     low_watermark INT NOT NULL DEFAULT 50 COMMENT '低水位线',
     target_size INT NOT NULL DEFAULT 200 COMMENT '目标池大小',
+    selection_strategy VARCHAR(20) NOT NULL DEFAULT 'random' COMMENT '代理选择策略: random/latency/round_robin/lru',
+    max_in_flight_per_proxy INT NOT NULL DEFAULT 4 COMMENT '单个代理最大在途请求数，0表示不限制',
+    lease_ttl_seconds INT NOT NULL DEFAULT 60 COMMENT '代理租约有效期(秒)',
+    expiry_safety_margin_seconds INT NOT NULL DEFAULT 30 COMMENT '距到期不足该秒数的代理不再分配',
+    overlap_window_seconds INT NOT NULL DEFAULT 180 COMMENT '轮换后旧池继续服务的最长排空时间(秒)',
+    warmup_seconds INT NOT NULL DEFAULT 120 COMMENT '切换前提前刷新备用池的预热时间(秒)',
+    backup_api_url VARCHAR(1024) NOT NULL DEFAULT '' COMMENT '海量代理备用API地址（另一账号/订单），与主地址按权重路由',
+    hedge_requests_enabled BOOLEAN NOT NULL DEFAULT FALSE COMMENT '主供应商超过p95延迟时对冲请求备用供应商',
+    health_probe_mode VARCHAR(10) NOT NULL DEFAULT 'tiered' COMMENT '健康探测模式: http/tcp/tiered',
+    health_tcp_timeout_ms INT NOT NULL DEFAULT 1500 COMMENT 'TCP存活探测超时(毫秒)',
+    health_deep_check_interval_seconds INT NOT NULL DEFAULT 600 COMMENT 'tiered模式下HTTP深度验证间隔(秒)',
+    health_check_targets VARCHAR(2048) NOT NULL DEFAULT '' COMMENT '健康检查测试端点，逗号分隔，为空时使用内置端点',
+    health_promote_after_successes INT NOT NULL DEFAULT 2 COMMENT 'probation代理连续成功多少次转为healthy',
+    health_recover_after_successes INT NOT NULL DEFAULT 2 COMMENT 'suspect代理连续成功多少次恢复为healthy',
+    health_quarantine_strikes INT NOT NULL DEFAULT 3 COMMENT '累计失败权重达到多少进入隔离',
+    health_client_report_strikes INT NOT NULL DEFAULT 2 COMMENT '调用方上报一次失败计入的失败权重',
 
     -- 交易日配置
     auto_start_enabled BOOLEAN NOT NULL DEFAULT TRUE COMMENT '是否自动开启',
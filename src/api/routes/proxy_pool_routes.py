@@ -4,17 +4,21 @@ API层 - 代理池路由
 
 from fastapi import APIRouter, HTTPException, Depends, Body, Query
 from pydantic import BaseModel
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Literal
 from datetime import datetime
 import traceback
 
 from saturn_mousehunter_shared import get_logger
+from domain import ProxyLease
 from infrastructure.proxy_pool import ProxyPoolManager
 from infrastructure.proxy_fetchers import fetch_hailiang_proxy_ip
 
 router = APIRouter(tags=["proxy_pool"])
 log = get_logger("proxy_pool_routes")
 
+# 批量获取代理的单次上限
+MAX_BATCH_PROXY_COUNT = 500
+
 
 class RpcRequest(BaseModel):
     """RPC请求模型"""
@@ -22,6 +26,12 @@ class RpcRequest(BaseModel):
     event: str
     proxy_type: Optional[str] = "short"
     proxy_addr: Optional[str] = None
+    count: Optional[int] = 1
+    session_key: Optional[str] = None
+    lease: Optional[bool] = False  # 为 True 时返回租约，用完需 release_proxy 归还
+    lease_id: Optional[str] = None
+    success: Optional[bool] = True
+    latency_ms: Optional[float] = None
     market: Optional[str] = "HK"
     mode: Optional[str] = "live"
 
@@ -36,6 +46,22 @@ class ConfigUpdateRequest(BaseModel):
     rotation_interval_minutes: Optional[int] = None
     low_watermark: Optional[int] = None
     target_size: Optional[int] = None
+    selection_strategy: Optional[Literal["random", "latency", "round_robin", "lru"]] = None
+    max_in_flight_per_proxy: Optional[int] = None
+    lease_ttl_seconds: Optional[int] = None
+    expiry_safety_margin_seconds: Optional[int] = None
+    overlap_window_seconds: Optional[int] = None
+    warmup_seconds: Optional[int] = None
+    backup_api_url: Optional[str] = None
+    hedge_requests_enabled: Optional[bool] = None
+    health_probe_mode: Optional[Literal["http", "tcp", "tiered"]] = None
+    health_tcp_timeout_ms: Optional[int] = None
+    health_deep_check_interval_seconds: Optional[int] = None
+    health_check_targets: Optional[str] = None
+    health_promote_after_successes: Optional[int] = None
+    health_recover_after_successes: Optional[int] = None
+    health_quarantine_strikes: Optional[int] = None
+    health_client_report_strikes: Optional[int] = None
     auto_start_enabled: Optional[bool] = None
     pre_market_start_minutes: Optional[int] = None
     post_market_stop_minutes: Optional[int] = None
@@ -61,6 +87,21 @@ class StatusResponse(BaseModel):
     stats: Dict[str, Any]
 
 
+def ts_to_iso(ts: Optional[float]) -> Optional[str]:
+    """时间戳转ISO字符串，未设置（None/0）返回None"""
+    return datetime.fromtimestamp(ts).isoformat() if ts else None
+
+
+def lease_to_dict(lease: ProxyLease) -> Dict[str, Any]:
+    """租约序列化"""
+    return {
+        "lease_id": lease.lease_id,
+        "proxy": lease.proxy_addr,
+        "lease_ttl": lease.ttl_seconds,
+        "expires_at": ts_to_iso(lease.expires_ts),
+    }
+
+
 def get_proxy_pool_manager(
     market: str = Query(..., description="市场代码: CN/HK/US"),
     mode: str = Query("live", description="模式: live/backfill"),
@@ -498,15 +539,74 @@ async def rpc_handler(
         )
 
     if event == "get_proxy":
-        proxy_addr = await manager.get_proxy(request.proxy_type or "short")
-        return {"status": "ok", "proxy": proxy_addr}
+        if not request.lease:
+            proxy_addr = await manager.get_proxy(
+                request.proxy_type or "short", request.session_key
+            )
+            return {"status": "ok", "proxy": proxy_addr}
+
+        lease = await manager.lease_proxy(
+            request.proxy_type or "short", request.session_key
+        )
+        if not lease:
+            return {"status": "ok", "proxy": None}
+        return {"status": "ok", **lease_to_dict(lease)}
+
+    elif event == "get_proxies":
+        count = request.count or 1
+        if not 1 <= count <= MAX_BATCH_PROXY_COUNT:
+            raise HTTPException(
+                status_code=400,
+                detail=f"count must be between 1 and {MAX_BATCH_PROXY_COUNT}",
+            )
+
+        if not request.lease:
+            proxies = await manager.get_proxies(count, request.proxy_type or "short")
+            return {"status": "ok", "proxies": proxies, "count": len(proxies)}
+
+        leases = await manager.lease_proxies(count, request.proxy_type or "short")
+        return {
+            "status": "ok",
+            "proxies": [lease.proxy_addr for lease in leases],
+            "leases": [lease_to_dict(lease) for lease in leases],
+            "count": len(leases),
+        }
+
+    elif event == "release_proxy":
+        if not request.lease_id:
+            raise HTTPException(status_code=400, detail="lease_id required")
+
+        released = await manager.release_proxy(
+            request.lease_id,
+            request.success if request.success is not None else True,
+            request.latency_ms,
+        )
+        return {
+            "status": "ok" if released else "ignored",
+            "released": released,
+            "message": (
+                f"Lease {request.lease_id} released"
+                if released
+                else f"Lease {request.lease_id} unknown or expired"
+            ),
+        }
 
     elif event == "report_failure":
         if not request.proxy_addr:
             raise HTTPException(status_code=400, detail="proxy_addr required")
 
-        await manager.report_failure(request.proxy_addr)
-        return {"status": "ok", "message": f"{request.proxy_addr} marked as failure"}
+        accepted = await manager.report_failure(request.proxy_addr)
+        if not accepted:
+            return {
+                "status": "ignored",
+                "message": f"{request.proxy_addr} not in pool",
+                "accepted": False,
+            }
+        return {
+            "status": "ok",
+            "message": f"{request.proxy_addr} marked as failure",
+            "accepted": True,
+        }
 
     elif event == "get_status":
         service_status = await manager.get_status()
@@ -543,6 +643,12 @@ async def rpc_handler(
 async def get_proxy(
     market: str,
     proxy_type: str = Query("short", description="代理类型: short/long"),
+    session_key: Optional[str] = Query(
+        None, description="粘性会话键，相同会话键在代理存活期间返回同一代理"
+    ),
+    lease: bool = Query(
+        False, description="是否租用：为 true 时返回租约，用完需调用 release 归还"
+    ),
     managers: dict = Depends(get_all_managers)
 ):
     """获取指定市场的代理IP"""
@@ -555,6 +661,7 @@ async def get_proxy(
         "endpoint": f"GET /{market}/proxy",
         "market": market,
         "proxy_type": proxy_type,
+        "session_key": session_key,
         "request_params_str": request_params_escaped
     })
 
@@ -588,12 +695,18 @@ async def get_proxy(
         )
 
     try:
-        proxy_addr = await manager.get_proxy(proxy_type)
+        if lease:
+            proxy_lease = await manager.lease_proxy(proxy_type, session_key)
+            proxy_addr = proxy_lease.proxy_addr if proxy_lease else None
+        else:
+            proxy_lease = None
+            proxy_addr = await manager.get_proxy(proxy_type, session_key)
 
         response_data = {
             "proxy": proxy_addr,
             "market": market.lower(),
             "type": proxy_type,
+            **(lease_to_dict(proxy_lease) if proxy_lease else {}),
             "timestamp": datetime.now().isoformat()
         }
 
@@ -624,6 +737,139 @@ async def get_proxy(
         raise HTTPException(status_code=500, detail=error_msg)
 
 
+@router.get("/{market}/proxy/batch")
+async def get_proxy_batch(
+    market: str,
+    count: int = Query(
+        10, ge=1, le=MAX_BATCH_PROXY_COUNT, description="获取数量，返回互不相同的代理"
+    ),
+    proxy_type: str = Query("short", description="代理类型: short/long"),
+    lease: bool = Query(
+        False, description="是否租用：为 true 时返回租约，用完需逐个调用 release 归还"
+    ),
+    managers: dict = Depends(get_all_managers)
+):
+    """批量获取指定市场的代理IP"""
+    request_id = f"get_proxy_batch_{market}_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}"
+
+    log.info(f"[{request_id}] API Request - get_proxy_batch", extra={
+        "request_id": request_id,
+        "endpoint": f"GET /{market}/proxy/batch",
+        "market": market,
+        "proxy_type": proxy_type,
+        "count": count
+    })
+
+    key = f"{market.upper()}_live"
+    manager = managers.get(key)
+
+    if not manager:
+        error_msg = f"Manager not found for market {market}"
+        log.error(f"[{request_id}] {error_msg}", extra={
+            "request_id": request_id,
+            "error_type": "manager_not_found",
+            "market": market,
+            "available_managers": list(managers.keys())
+        })
+        raise HTTPException(
+            status_code=404,
+            detail=error_msg
+        )
+
+    if not manager.is_running:
+        error_msg = f"Proxy pool service not running for market {market}"
+        log.error(f"[{request_id}] {error_msg}", extra={
+            "request_id": request_id,
+            "error_type": "service_not_running",
+            "market": market,
+            "manager_running": manager.is_running
+        })
+        raise HTTPException(
+            status_code=400,
+            detail=error_msg
+        )
+
+    try:
+        if lease:
+            leases = await manager.lease_proxies(count, proxy_type)
+            proxies = [proxy_lease.proxy_addr for proxy_lease in leases]
+        else:
+            leases = []
+            proxies = await manager.get_proxies(count, proxy_type)
+
+        log.info(f"[{request_id}] API Response - get_proxy_batch SUCCESS", extra={
+            "request_id": request_id,
+            "response_status": "success",
+            "requested_count": count,
+            "returned_count": len(proxies)
+        })
+
+        return {
+            "proxies": proxies,
+            **({"leases": [lease_to_dict(proxy_lease) for proxy_lease in leases]} if lease else {}),
+            "count": len(proxies),
+            "requested": count,
+            "market": market.lower(),
+            "type": proxy_type,
+            "timestamp": datetime.now().isoformat()
+        }
+
+    except Exception as e:
+        error_msg = f"Failed to get proxies: {str(e)}"
+
+        log.error(f"[{request_id}] API Response - get_proxy_batch ERROR: {error_msg}", extra={
+            "request_id": request_id,
+            "response_status": "error",
+            "error_message": str(e),
+            "error_type": type(e).__name__,
+            "traceback": traceback.format_exc()
+        })
+
+        raise HTTPException(status_code=500, detail=error_msg)
+
+
+@router.post("/{market}/proxy/release")
+async def release_proxy(
+    market: str,
+    lease_id: str = Body(..., embed=True, description="获取代理时返回的租约ID"),
+    success: bool = Body(True, embed=True, description="本次使用是否成功"),
+    latency_ms: Optional[float] = Body(None, embed=True, description="本次请求耗时（毫秒）"),
+    managers: dict = Depends(get_all_managers)
+):
+    """归还代理租约并上报使用结果"""
+    key = f"{market.upper()}_live"
+    manager = managers.get(key)
+
+    if not manager:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Manager not found for market {market}"
+        )
+
+    if not manager.is_running:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Proxy pool service not running for market {market}"
+        )
+
+    try:
+        released = await manager.release_proxy(lease_id, success, latency_ms)
+        return {
+            "status": "released" if released else "ignored",
+            "released": released,
+            "lease_id": lease_id,
+            "timestamp": datetime.now().isoformat()
+        }
+
+    except Exception as e:
+        log.error(f"Failed to release lease {lease_id}: {e}", extra={
+            "lease_id": lease_id,
+            "error_type": type(e).__name__,
+            "traceback": traceback.format_exc()
+        })
+        raise HTTPException(status_code=500, detail=f"Failed to release proxy: {str(e)}")
+
+
 @router.post("/{market}/proxy/failure")
 async def report_proxy_failure(
     market: str,
@@ -676,12 +922,17 @@ async def report_proxy_failure(
         )
 
     try:
-        await manager.report_failure(proxy)
+        accepted = await manager.report_failure(proxy)
 
         response_data = {
-            "status": "reported",
-            "message": f"Proxy failure reported: {proxy}",
+            "status": "reported" if accepted else "ignored",
+            "message": (
+                f"Proxy failure reported: {proxy}"
+                if accepted
+                else f"Proxy not in pool, report ignored: {proxy}"
+            ),
             "reason": reason,
+            "accepted": accepted,
             "timestamp": datetime.now().isoformat()
         }
 
@@ -820,8 +1071,10 @@ async def list_proxies(
                         {
                             "addr": proxy.addr,
                             "status": proxy.status.value,
-                            "created_at": proxy.created_at.isoformat() if proxy.created_at else None,
-                            "last_used": proxy.last_used.isoformat() if proxy.last_used else None,
+                            "health_state": proxy.health_state.value,
+                            "created_at": ts_to_iso(proxy.created_ts),
+                            "expires_at": ts_to_iso(proxy.expires_ts),
+                            "last_used": ts_to_iso(proxy.last_used_ts),
                             "failure_count": getattr(proxy, 'failure_count', 0)
                         }
                         for proxy in pools[active_pool][:20]  # 限制返回数量
@@ -832,8 +1085,10 @@ async def list_proxies(
                         {
                             "addr": proxy.addr,
                             "status": proxy.status.value,
-                            "created_at": proxy.created_at.isoformat() if proxy.created_at else None,
-                            "last_used": proxy.last_used.isoformat() if proxy.last_used else None,
+                            "health_state": proxy.health_state.value,
+                            "created_at": ts_to_iso(proxy.created_ts),
+                            "expires_at": ts_to_iso(proxy.expires_ts),
+                            "last_used": ts_to_iso(proxy.last_used_ts),
                             "failure_count": getattr(proxy, 'failure_count', 0)
                         }
                         for proxy in pools[standby_pool][:20]  # 限制返回数量
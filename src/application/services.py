@@ -5,6 +5,7 @@ Application层 - 代理池应用服务
 from __future__ import annotations
 
 from saturn_mousehunter_shared import get_logger, cache_with_ttl, cache_invalidate
+from domain.entities import ProxyLease
 from domain.services import ProxyPoolDomainService
 
 
@@ -15,15 +16,39 @@ class ProxyPoolApplicationService:
         self.domain_service = domain_service
         self.logger = get_logger("proxy_pool_application")
 
-    async def get_proxy(self, proxy_type: str = "short") -> str | None:
+    async def get_proxy(
+        self, proxy_type: str = "short", session_key: str | None = None
+    ) -> str | None:
         """获取代理地址"""
-        return await self.domain_service.get_proxy(proxy_type)
+        return await self.domain_service.get_proxy(proxy_type, session_key)
 
-    async def report_failure(self, proxy_addr: str) -> None:
+    async def get_proxies(self, count: int, proxy_type: str = "short") -> list[str]:
+        """批量获取代理地址"""
+        return await self.domain_service.get_proxies(count, proxy_type)
+
+    async def lease_proxy(
+        self, proxy_type: str = "short", session_key: str | None = None
+    ) -> ProxyLease | None:
+        """租用代理"""
+        return await self.domain_service.lease_proxy(proxy_type, session_key)
+
+    async def lease_proxies(self, count: int, proxy_type: str = "short") -> list[ProxyLease]:
+        """批量租用代理"""
+        return await self.domain_service.lease_proxies(count, proxy_type)
+
+    async def release_proxy(
+        self, lease_id: str, success: bool = True, latency_ms: float | None = None
+    ) -> bool:
+        """归还代理租约"""
+        if not success:
+            await self._invalidate_status_cache()
+        return await self.domain_service.release_proxy(lease_id, success, latency_ms)
+
+    async def report_failure(self, proxy_addr: str) -> bool:
         """报告代理失败"""
         # 清除相关缓存
         await self._invalidate_status_cache()
-        await self.domain_service.report_failure(proxy_addr)
+        return await self.domain_service.report_failure(proxy_addr)
 
     @cache_with_ttl(30)
     async def get_status(self) -> dict:
@@ -6,7 +6,11 @@ from .entities import (
     MarketType,
     ProxyMode,
     ProxyStatus,
+    ProxyHealthState,
+    FailureKind,
+    HealthTransitionPolicy,
     Proxy,
+    ProxyLease,
     ProxyPoolStats,
     IProxyRepository,
     IProxyFetcher,
@@ -25,7 +29,11 @@ __all__ = [
     "MarketType",
     "ProxyMode",
     "ProxyStatus",
+    "ProxyHealthState",
+    "FailureKind",
+    "HealthTransitionPolicy",
     "Proxy",
+    "ProxyLease",
     "ProxyPoolStats",
     "IProxyRepository",
     "IProxyFetcher",
@@ -34,6 +34,22 @@ class ProxyPoolConfig:
     rotation_interval_minutes: int = 7
     low_watermark: int = 50
     target_size: int = 200
+    selection_strategy: str = "random"  # 代理选择策略: random/latency/round_robin/lru
+    max_in_flight_per_proxy: int = 4  # 单个代理最大在途请求数，0表示不限制
+    lease_ttl_seconds: int = 60  # 代理租约有效期
+    expiry_safety_margin_seconds: int = 30  # 距到期不足该秒数的代理不再分配
+    overlap_window_seconds: int = 180  # 轮换后旧池继续服务的最长排空时间(秒)
+    warmup_seconds: int = 120  # 切换前提前刷新备用池的预热时间(秒)
+    backup_api_url: str = ""  # 海量代理备用API地址（另一账号/订单），与主地址按权重路由
+    hedge_requests_enabled: bool = False  # 主供应商超过p95延迟时对冲请求备用供应商
+    health_probe_mode: str = "tiered"  # 健康探测模式: http/tcp/tiered
+    health_tcp_timeout_ms: int = 1500  # TCP存活探测超时(毫秒)
+    health_deep_check_interval_seconds: int = 600  # tiered模式下HTTP深度验证间隔(秒)
+    health_check_targets: str = ""  # 健康检查测试端点，逗号分隔，为空时使用内置端点
+    health_promote_after_successes: int = 2  # probation代理连续成功多少次转为healthy
+    health_recover_after_successes: int = 2  # suspect代理连续成功多少次恢复为healthy
+    health_quarantine_strikes: int = 3  # 累计失败权重达到多少进入隔离
+    health_client_report_strikes: int = 2  # 调用方上报一次失败计入的失败权重
 
     # 交易日配置
     auto_start_enabled: bool = True
@@ -5,7 +5,7 @@ Domain层 - 代理池业务服务
 from __future__ import annotations
 
 from saturn_mousehunter_shared import get_logger, measure, retry
-from .entities import IProxyRepository, IMarketClock, MarketType, ProxyMode
+from .entities import IProxyRepository, IMarketClock, MarketType, ProxyMode, ProxyLease
 
 
 class ProxyPoolDomainService:
@@ -26,11 +26,13 @@ class ProxyPoolDomainService:
 
     @measure("proxy_get_duration", ("market", "mode"))
     @retry(times=3, delay=0.1)
-    async def get_proxy(self, proxy_type: str = "short") -> str | None:
-        """获取代理地址"""
+    async def get_proxy(
+        self, proxy_type: str = "short", session_key: str | None = None
+    ) -> str | None:
+        """获取代理地址（无需归还）"""
         self.logger.debug(f"Requesting proxy of type: {proxy_type}")
 
-        proxy = await self.proxy_repository.get_proxy_from_pool(proxy_type)
+        proxy = await self.proxy_repository.get_proxy_from_pool(proxy_type, session_key)
         if proxy:
             self.logger.debug(f"Retrieved proxy: {proxy.addr}")
             return proxy.addr
@@ -38,11 +40,60 @@ class ProxyPoolDomainService:
         self.logger.warning("No proxy available")
         return None
 
+    @measure("proxy_get_batch_duration", ("market", "mode"))
+    async def get_proxies(self, count: int, proxy_type: str = "short") -> list[str]:
+        """批量获取互不相同的代理地址（无需归还）"""
+        self.logger.debug(f"Requesting {count} proxies of type: {proxy_type}")
+
+        proxies = await self.proxy_repository.get_proxies_from_pool(count, proxy_type)
+        if len(proxies) < count:
+            self.logger.warning(f"Only {len(proxies)}/{count} proxies available")
+
+        return [proxy.addr for proxy in proxies]
+
+    @measure("proxy_lease_duration", ("market", "mode"))
+    @retry(times=3, delay=0.1)
+    async def lease_proxy(
+        self, proxy_type: str = "short", session_key: str | None = None
+    ) -> ProxyLease | None:
+        """租用代理，客户端用完后通过 release_proxy 归还"""
+        lease = await self.proxy_repository.acquire_lease(proxy_type, session_key)
+        if lease:
+            self.logger.debug(f"Leased proxy {lease.proxy_addr} as {lease.lease_id}")
+            return lease
+
+        self.logger.warning("No proxy available")
+        return None
+
+    @measure("proxy_lease_batch_duration", ("market", "mode"))
+    async def lease_proxies(self, count: int, proxy_type: str = "short") -> list[ProxyLease]:
+        """批量租用互不相同的代理"""
+        self.logger.debug(f"Requesting {count} proxies of type: {proxy_type}")
+
+        leases = await self.proxy_repository.acquire_leases(count, proxy_type)
+        if len(leases) < count:
+            self.logger.warning(f"Only {len(leases)}/{count} proxies available")
+
+        return leases
+
+    @measure("proxy_release_duration", ("market", "mode"))
+    async def release_proxy(
+        self, lease_id: str, success: bool = True, latency_ms: float | None = None
+    ) -> bool:
+        """归还代理租约，返回租约是否有效"""
+        released = await self.proxy_repository.release_lease(lease_id, success, latency_ms)
+        if not released:
+            self.logger.info(f"Lease {lease_id} unknown or expired, release ignored")
+        return released
+
     @measure("proxy_failure_report_duration", ("market", "mode"))
-    async def report_failure(self, proxy_addr: str) -> None:
-        """报告代理失败"""
+    async def report_failure(self, proxy_addr: str) -> bool:
+        """报告代理失败，返回代理是否在池中"""
         self.logger.info(f"Reporting failure for proxy: {proxy_addr}")
-        await self.proxy_repository.mark_failure(proxy_addr)
+        accepted = await self.proxy_repository.mark_failure(proxy_addr)
+        if not accepted:
+            self.logger.info(f"Proxy {proxy_addr} not in pool, failure report ignored")
+        return accepted
 
     async def get_status(self) -> dict:
         """获取服务状态"""
@@ -0,0 +1,168 @@
+"""
+Infrastructure层 - 健康检查自适应并发控制
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+from typing import Any, Dict, Optional
+
+from saturn_mousehunter_shared import get_logger
+
+# 进程内所有健康检查共享的并发上限，避免多市场同时探测打满NAT
+GLOBAL_PROBE_CEILING = int(os.getenv("HEALTH_CHECK_MAX_CONCURRENCY", "64"))
+_global_probe_slots = asyncio.Semaphore(GLOBAL_PROBE_CEILING)
+
+
+class AIMDConcurrencyLimiter:
+    """
+    AIMD 并发控制器
+    - 每完成 当前并发数 个探测为一个观察窗口
+    - 窗口内超时率和平均延迟与基线持平时并发加 increase_step
+    - 超时率突增或平均延迟超过基线 latency_tolerance 倍时并发乘以 decrease_factor
+    - 实际并发同时受进程级全局上限约束
+    """
+
+    def __init__(
+        self,
+        name: str,
+        initial_limit: int = 10,
+        min_limit: int = 2,
+        max_limit: int = GLOBAL_PROBE_CEILING,
+        increase_step: int = 1,
+        decrease_factor: float = 0.5,
+        latency_tolerance: float = 2.0,
+        timeout_spike_ratio: float = 0.1,
+    ):
+        self.name = name
+        self.min_limit = min_limit
+        self.max_limit = max(min(max_limit, GLOBAL_PROBE_CEILING), min_limit)
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.latency_tolerance = latency_tolerance
+        self.timeout_spike_ratio = timeout_spike_ratio
+
+        self.limit = float(min(max(initial_limit, self.min_limit), self.max_limit))
+        self._in_flight = 0
+        self._cond = asyncio.Condition()
+
+        # 当前观察窗口
+        self._window_samples = 0
+        self._window_timeouts = 0
+        self._window_latency_sum = 0.0
+        self._window_latency_count = 0
+
+        # 基线：平稳窗口的超时率和平均延迟EWMA
+        self._baseline_timeout_rate: Optional[float] = None
+        self._baseline_latency_ms: Optional[float] = None
+
+        # 统计
+        self._increases = 0
+        self._decreases = 0
+
+        self.logger = get_logger(f"adaptive_concurrency.{name}")
+
+    async def __aenter__(self) -> "AIMDConcurrencyLimiter":
+        async with self._cond:
+            await self._cond.wait_for(lambda: self._in_flight < int(self.limit))
+            self._in_flight += 1
+        try:
+            await _global_probe_slots.acquire()
+        except BaseException:
+            await self._release_local()
+            raise
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        _global_probe_slots.release()
+        await self._release_local()
+
+    async def _release_local(self) -> None:
+        async with self._cond:
+            self._in_flight -= 1
+            self._cond.notify_all()
+
+    def record(self, latency_ms: Optional[float], timed_out: bool = False) -> None:
+        """记录一次探测结果
+
+        Args:
+            latency_ms: 探测耗时，None 表示不计入延迟（如分层模式下的TCP预检）
+            timed_out: 是否超时，连接被拒等快速失败不算超时
+        """
+        self._window_samples += 1
+        if timed_out:
+            self._window_timeouts += 1
+        elif latency_ms is not None:
+            self._window_latency_sum += latency_ms
+            self._window_latency_count += 1
+
+        if self._window_samples >= max(int(self.limit), self.min_limit):
+            self._adjust()
+
+    def _adjust(self) -> None:
+        """窗口结束：按超时率和延迟相对基线调整并发"""
+        timeout_rate = self._window_timeouts / self._window_samples
+        latency = (
+            self._window_latency_sum / self._window_latency_count
+            if self._window_latency_count
+            else None
+        )
+        self._window_samples = self._window_timeouts = self._window_latency_count = 0
+        self._window_latency_sum = 0.0
+
+        if self._baseline_timeout_rate is None:
+            self._baseline_timeout_rate = timeout_rate
+            self._baseline_latency_ms = latency
+            return
+
+        timeout_spiked = timeout_rate > self._baseline_timeout_rate + self.timeout_spike_ratio
+        latency_spiked = (
+            latency is not None
+            and self._baseline_latency_ms is not None
+            and latency > self._baseline_latency_ms * self.latency_tolerance
+        )
+
+        old_limit = self.limit
+        if timeout_spiked or latency_spiked:
+            self.limit = max(self.limit * self.decrease_factor, self.min_limit)
+            self._decreases += 1
+            self.logger.info(
+                f"Probe concurrency {old_limit:.0f} -> {self.limit:.0f} "
+                f"(timeout rate {timeout_rate:.0%}, latency {latency or 0:.0f}ms)"
+            )
+            return
+
+        # 平稳窗口才更新基线，避免拥塞时基线被抬高
+        self._baseline_timeout_rate = 0.8 * self._baseline_timeout_rate + 0.2 * timeout_rate
+        if latency is not None:
+            self._baseline_latency_ms = (
+                latency
+                if self._baseline_latency_ms is None
+                else 0.8 * self._baseline_latency_ms + 0.2 * latency
+            )
+        if self.limit < self.max_limit:
+            self.limit = min(self.limit + self.increase_step, self.max_limit)
+            self._increases += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """控制器状态快照"""
+        return {
+            "limit": int(self.limit),
+            "in_flight": self._in_flight,
+            "min_limit": self.min_limit,
+            "max_limit": self.max_limit,
+            "global_ceiling": GLOBAL_PROBE_CEILING,
+            "baseline_latency_ms": (
+                round(self._baseline_latency_ms, 1)
+                if self._baseline_latency_ms is not None
+                else None
+            ),
+            "baseline_timeout_rate": (
+                round(self._baseline_timeout_rate * 100, 2)
+                if self._baseline_timeout_rate is not None
+                else None
+            ),
+            "increases": self._increases,
+            "decreases": self._decreases,
+        }
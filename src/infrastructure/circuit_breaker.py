@@ -0,0 +1,163 @@
+"""
+Infrastructure层 - 供应商熔断器
+"""
+
+from __future__ import annotations
+
+import random
+import time
+from datetime import datetime
+from enum import Enum
+from typing import Any, Dict, Optional
+
+from saturn_mousehunter_shared import get_logger
+
+
+class CircuitState(Enum):
+    """熔断器状态"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    供应商熔断器
+    - closed：正常放行，连续失败达到阈值后打开
+    - open：冷却期内拒绝请求；遇到限流立即打开
+    - half_open：冷却结束后只放行一个探测请求，成功则关闭，失败则重新打开；
+      探测超过 probe_timeout_sec 仍未上报结果视为丢失，放行下一个探测
+    - 冷却时间按连续打开次数指数退避并加抖动，不短于供应商给出的 Retry-After
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 3,
+        base_backoff_sec: float = 30.0,
+        max_backoff_sec: float = 600.0,
+        jitter_ratio: float = 0.2,
+        probe_timeout_sec: float = 60.0,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.base_backoff_sec = base_backoff_sec
+        self.max_backoff_sec = max_backoff_sec
+        self.jitter_ratio = jitter_ratio
+        self.probe_timeout_sec = probe_timeout_sec
+
+        self.state = CircuitState.CLOSED
+        self._consecutive_failures = 0
+        self._consecutive_opens = 0
+        self._open_until = 0.0
+        self._probe_in_flight = False
+        self._probe_started_ts = 0.0
+
+        # 统计
+        self._rejected_requests = 0
+        self._rate_limited_count = 0
+        self._last_error: Optional[str] = None
+
+        self.logger = get_logger(f"circuit_breaker.{name}")
+
+    def allow_request(self) -> bool:
+        """是否放行本次请求"""
+        if self.state == CircuitState.CLOSED:
+            return True
+
+        if self.state == CircuitState.OPEN and time.time() >= self._open_until:
+            self.state = CircuitState.HALF_OPEN
+            self._probe_in_flight = False
+            self.logger.info(f"Circuit {self.name} half-open, probing provider")
+
+        if self.state == CircuitState.HALF_OPEN:
+            now = time.time()
+            if self._probe_in_flight and now - self._probe_started_ts >= self.probe_timeout_sec:
+                self.logger.warning(
+                    f"Circuit {self.name} half-open probe lost after {self.probe_timeout_sec:.0f}s, "
+                    "allowing another probe"
+                )
+                self._probe_in_flight = False
+            if not self._probe_in_flight:
+                self._probe_in_flight = True
+                self._probe_started_ts = now
+                return True
+
+        self._rejected_requests += 1
+        return False
+
+    def record_success(self) -> None:
+        """请求成功"""
+        if self.state != CircuitState.CLOSED:
+            self.logger.info(f"Circuit {self.name} closed")
+        self.state = CircuitState.CLOSED
+        self._consecutive_failures = 0
+        self._consecutive_opens = 0
+        self._probe_in_flight = False
+
+    def release(self) -> None:
+        """请求结果无法归因于该供应商或请求被取消时释放半开探测名额，不改变状态"""
+        self._probe_in_flight = False
+
+    def record_failure(
+        self,
+        rate_limited: bool = False,
+        retry_after: Optional[float] = None,
+        error: Optional[str] = None,
+    ) -> None:
+        """请求失败
+
+        Args:
+            rate_limited: 供应商明确限流，立即打开
+            retry_after: 供应商建议的冷却秒数
+        """
+        self._consecutive_failures += 1
+        self._probe_in_flight = False
+        self._last_error = error
+        if rate_limited:
+            self._rate_limited_count += 1
+
+        if (
+            rate_limited
+            or self.state == CircuitState.HALF_OPEN
+            or self._consecutive_failures >= self.failure_threshold
+        ):
+            self._trip(retry_after)
+
+    def _trip(self, retry_after: Optional[float]) -> None:
+        """打开熔断器，按指数退避计算冷却时间"""
+        self._consecutive_opens += 1
+        backoff = min(
+            self.base_backoff_sec * 2 ** (self._consecutive_opens - 1),
+            self.max_backoff_sec,
+        )
+        backoff *= 1 + random.uniform(-self.jitter_ratio, self.jitter_ratio)
+        cooldown = max(backoff, retry_after or 0.0)
+
+        self.state = CircuitState.OPEN
+        self._open_until = time.time() + cooldown
+        self._consecutive_failures = 0
+        self.logger.warning(
+            f"Circuit {self.name} opened for {cooldown:.0f}s "
+            f"(consecutive opens: {self._consecutive_opens}, last error: {self._last_error})"
+        )
+
+    def snapshot(self) -> Dict[str, Any]:
+        """熔断器状态快照"""
+        retry_in = max(self._open_until - time.time(), 0.0)
+        return {
+            "state": self.state.value,
+            "consecutive_failures": self._consecutive_failures,
+            "consecutive_opens": self._consecutive_opens,
+            "retry_in_seconds": round(retry_in, 1) if self.state == CircuitState.OPEN else 0.0,
+            "open_until": (
+                datetime.fromtimestamp(self._open_until).isoformat()
+                if self.state == CircuitState.OPEN
+                else None
+            ),
+            "probe_in_flight": self._probe_in_flight,
+            "rejected_requests": self._rejected_requests,
+            "rate_limited_count": self._rate_limited_count,
+            "last_error": self._last_error,
+        }
@@ -0,0 +1,203 @@
+"""
+Infrastructure层 - 多供应商代理获取路由
+"""
+
+from __future__ import annotations
+
+import asyncio
+import random
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Sequence, Set, Tuple
+
+from saturn_mousehunter_shared import get_logger
+from domain.entities import IProxyFetcher
+
+
+class ProviderRoute:
+    """单个供应商的路由状态：权重、成功率EWMA、最近延迟样本"""
+
+    def __init__(
+        self,
+        name: str,
+        fetcher: IProxyFetcher,
+        weight: float = 1.0,
+        latency_window: int = 100,
+    ):
+        self.name = name
+        self.fetcher = fetcher
+        self.weight = weight
+        self.success_rate = 1.0  # 成功率EWMA，新供应商按健康对待
+        self._latencies: Deque[float] = deque(maxlen=latency_window)
+
+        # 统计
+        self.requests = 0
+        self.failures = 0
+        self.hedged_requests = 0
+
+    def record(self, success: bool, latency_ms: float, alpha: float = 0.2) -> None:
+        """记录一次请求结果，只有成功请求计入延迟样本"""
+        self.requests += 1
+        self.success_rate = alpha * (1.0 if success else 0.0) + (1 - alpha) * self.success_rate
+        if success:
+            self._latencies.append(latency_ms)
+        else:
+            self.failures += 1
+
+    def p95_latency_ms(self, min_samples: int) -> Optional[float]:
+        """最近成功请求的p95延迟，样本不足时返回None"""
+        if len(self._latencies) < min_samples:
+            return None
+        samples = sorted(self._latencies)
+        return samples[min(int(len(samples) * 0.95), len(samples) - 1)]
+
+    def circuit_open(self) -> bool:
+        """供应商熔断器是否未关闭：打开或半开（半开时只有一个探测名额，不按正常供应商排序）"""
+        return any(
+            stats.get("state") in ("open", "half_open")
+            for stats in self.fetcher.provider_stats().values()
+        )
+
+    def effective_weight(self) -> float:
+        """按成功率折算的路由权重"""
+        return self.weight * max(self.success_rate, 0.05)
+
+
+class FetcherRouter(IProxyFetcher):
+    """
+    多供应商代理获取路由
+    - 按 权重 x 成功率 加权随机排序供应商，熔断中的供应商排在最后
+    - 请求失败或返回空列表时自动切换到下一个供应商
+    - 启用对冲时，首选供应商超过其p95延迟仍未返回则并发请求下一个供应商，先到先用；
+      落败的请求不取消，完成后照常记录供应商结果和熔断状态，代理列表丢弃
+    """
+
+    def __init__(
+        self,
+        providers: Sequence[Tuple[str, IProxyFetcher, float]],
+        market: str = "hk",
+        hedge_enabled: bool = False,
+        hedge_min_samples: int = 10,
+    ):
+        if not providers:
+            raise ValueError("FetcherRouter requires at least one provider")
+
+        self.routes: List[ProviderRoute] = [
+            ProviderRoute(name, fetcher, weight) for name, fetcher, weight in providers
+        ]
+        self.market = market
+        self.hedge_enabled = hedge_enabled
+        self.hedge_min_samples = hedge_min_samples
+        # 对冲落败、仍在进行的请求，持有引用直到完成
+        self._stragglers: Set[asyncio.Task] = set()
+        self.logger = get_logger(f"fetcher_router.{market}")
+
+    async def fetch_proxies(self, count: int = 20) -> List[str]:
+        """按路由顺序获取代理，失败自动切换供应商"""
+        order = self._ordered_routes()
+        idx = 0
+        while idx < len(order):
+            primary = order[idx]
+            hedge = order[idx + 1] if self.hedge_enabled and idx + 1 < len(order) else None
+            proxies, used = await self._fetch_with_hedge(primary, hedge, count)
+            if proxies:
+                return proxies
+            idx += used
+
+        self.logger.warning(f"All {len(order)} providers returned no proxies")
+        return []
+
+    def _ordered_routes(self) -> List[ProviderRoute]:
+        """加权随机排序（Efraimidis-Spirakis 抽样），熔断中的供应商放在最后"""
+        keyed = [
+            (route.circuit_open(), -random.random() ** (1.0 / route.effective_weight()), route)
+            for route in self.routes
+            if route.weight > 0
+        ]
+        keyed.sort(key=lambda item: (item[0], item[1]))
+        return [route for _, _, route in keyed]
+
+    async def _fetch_with_hedge(
+        self, primary: ProviderRoute, hedge: Optional[ProviderRoute], count: int
+    ) -> Tuple[List[str], int]:
+        """请求首选供应商，超过其p95延迟时对冲到下一个供应商
+
+        Returns:
+            (代理列表, 本次用掉的供应商数量)
+        """
+        primary_task = asyncio.create_task(self._fetch_from(primary, count))
+        hedge_delay = primary.p95_latency_ms(self.hedge_min_samples) if hedge else None
+        if hedge_delay is None:
+            return await primary_task, 1
+
+        done, _ = await asyncio.wait({primary_task}, timeout=hedge_delay / 1000)
+        if done:
+            proxies = primary_task.result()
+            # 首选供应商快速失败时不算对冲，下一轮正常切换
+            return proxies, 1
+
+        hedge.hedged_requests += 1
+        self.logger.debug(
+            f"Provider {primary.name} exceeded p95 {hedge_delay:.0f}ms, hedging to {hedge.name}"
+        )
+        hedge_task = asyncio.create_task(self._fetch_from(hedge, count))
+        pending = {primary_task, hedge_task}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    proxies = task.result()
+                    if proxies:
+                        self._let_finish(pending)
+                        return proxies, 2
+            return [], 2
+        except BaseException:
+            # 调用方被取消（停止服务）：在途请求一并取消，获取器会释放熔断器的半开探测名额
+            for task in pending:
+                task.cancel()
+            raise
+
+    def _let_finish(self, tasks: Set[asyncio.Task]) -> None:
+        """落败的对冲请求继续完成，结果丢弃"""
+        for task in tasks:
+            self._stragglers.add(task)
+            task.add_done_callback(self._stragglers.discard)
+
+    async def _fetch_from(self, route: ProviderRoute, count: int) -> List[str]:
+        """请求单个供应商并记录结果，异常视为失败"""
+        start = time.time()
+        try:
+            proxies = await route.fetcher.fetch_proxies(count)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.logger.error(f"Provider {route.name} fetch failed: {e}")
+            proxies = []
+
+        route.record(bool(proxies), (time.time() - start) * 1000)
+        return proxies or []
+
+    async def close(self) -> None:
+        """取消仍在进行的落败请求，关闭所有供应商获取器"""
+        stragglers = list(self._stragglers)
+        for task in stragglers:
+            task.cancel()
+        await asyncio.gather(*stragglers, return_exceptions=True)
+        for route in self.routes:
+            await route.fetcher.close()
+
+    def provider_stats(self) -> Dict[str, Dict]:
+        """各供应商路由统计及熔断状态"""
+        stats = {}
+        for route in self.routes:
+            p95 = route.p95_latency_ms(1)
+            stats[route.name] = {
+                "weight": route.weight,
+                "success_rate": round(route.success_rate * 100, 2),
+                "p95_latency_ms": round(p95, 1) if p95 is not None else None,
+                "requests": route.requests,
+                "failures": route.failures,
+                "hedged_requests": route.hedged_requests,
+                "circuit": route.fetcher.provider_stats(),
+            }
+        return stats
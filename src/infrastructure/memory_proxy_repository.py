@@ -5,30 +5,49 @@ Infrastructure层 - 内存代理池仓储实现
 from __future__ import annotations
 
 import asyncio
+import hashlib
+import heapq
 import random
 import time
+import uuid
+from collections import OrderedDict
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
 
 from saturn_mousehunter_shared import get_logger, measure
 from domain import (
     IProxyRepository,
     IProxyFetcher,
+    FailureKind,
+    HealthTransitionPolicy,
     Proxy,
+    ProxyHealthState,
+    ProxyLease,
     ProxyPoolStats,
     ProxyStatus,
     MarketType,
     ProxyMode,
 )
-from .proxy_health_checker import ProxyHealthChecker
+from .proxy_health_checker import ProbeOutcome, ProxyHealthChecker
+from .proxy_index import ProxySlotIndex
+from .proxy_quarantine import ProxyQuarantine
+from .proxy_selection import ProxySelectionStrategy, create_selection_strategy
 
 
 class MemoryProxyRepository(IProxyRepository):
     """
     内存A/B轮换代理池仓储实现
     - 维护两个池：A池（活跃）和B池（备用）
-    - 定期刷新备用池，然后切换
+    - 每隔 rotate_interval_sec 切换一次，切换前 warmup_sec 预热刷新备用池
+    - 切换后旧池在重叠窗口内排空，不再优先分配，已有租约和粘性会话继续使用
+    - 活跃池 healthy/probation 代理低于 low_watermark 时增量补充缺口，不必等待下一次切换
+    - 近期失败的地址进入隔离集合，隔离期内再次下发时在探测前丢弃
+    - 健康检查按每个代理的下次到期时间排入最小堆，可疑代理提前复查，稳定代理拉长间隔
+    - 代理健康状态由主动探测和调用方上报共同驱动：healthy 优先下发；
+      healthy 代理少于 low_watermark 时按数量比例混入 probation 代理，
+      suspect 仅在池内没有可用 healthy 代理时兜底，quarantined 出池
     - 支持失败代理移除
+    - 每个池维护可选代理索引，取代理为 O(1)
     """
 
     def __init__(
@@ -39,16 +58,80 @@ class MemoryProxyRepository(IProxyRepository):
         rotate_interval_sec: int = 180,
         low_watermark: int = 5,
         target_size: int = 20,
-        min_refresh_secs: int = 420,
+        min_refresh_secs: int = 60,  # 两次全量刷新的最小间隔，保护上游配额
         batch_count: int = 2,
         enable_health_check: bool = True,
-        health_check_interval: int = 300,  # 5分钟检查一次
+        health_check_interval: int = 300,  # 单个代理的基准复查间隔
+        min_health_check_interval: int = 15,
+        selection_strategy: str = "random",
+        max_in_flight_per_proxy: int = 4,  # 0 表示不限制
+        lease_ttl_sec: int = 60,
+        max_sticky_sessions: int = 10000,
+        proxy_lifetime_sec: int = 600,
+        expiry_safety_margin_sec: int = 30,
+        overlap_window_sec: int = 180,
+        warmup_sec: int = 120,
+        replenish_cooldown_sec: int = 10,
+        fetch_concurrency: int = 2,
+        probe_concurrency: int = 10,  # 探测初始并发，运行中自适应调整
+        quarantine_ttl_sec: int = 600,
+        health_probe_mode: str = "http",
+        health_tcp_timeout_ms: int = 1500,
+        health_deep_check_interval_sec: int = 600,
+        health_check_targets: Optional[Sequence[str]] = None,
+        health_policy: Optional[HealthTransitionPolicy] = None,
     ):
         self.market = market
         self.mode = mode
         self.fetcher = fetcher
         self.active_pool = "A"
-        self.pools: Dict[str, List[Proxy]] = {"A": [], "B": []}
+        self.pools: Dict[str, ProxySlotIndex] = {"A": ProxySlotIndex(), "B": ProxySlotIndex()}
+        # 可选代理索引：池内 healthy 状态的代理，入池时加入，淘汰时交换删除
+        self._selectable: Dict[str, ProxySlotIndex] = {
+            "A": ProxySlotIndex(),
+            "B": ProxySlotIndex(),
+        }
+        # 兜底索引：池内 probation/suspect 状态的代理，可选索引为空时随机选取
+        self._fallback: Dict[str, ProxySlotIndex] = {
+            "A": ProxySlotIndex(),
+            "B": ProxySlotIndex(),
+        }
+        # 选择策略：每个池独立实例，各自维护游标/堆状态
+        self._strategies: Dict[str, ProxySelectionStrategy] = {
+            "A": create_selection_strategy(selection_strategy),
+            "B": create_selection_strategy(selection_strategy),
+        }
+        # 地址索引：addr -> 所在池，槽位由池内索引维护
+        self._addr_index: Dict[str, str] = {}
+
+        # 租约：lease_id -> 租约，到期堆用于回收未归还的租约
+        self._leases: Dict[str, ProxyLease] = {}
+        self._lease_expiry: List[Tuple[float, str]] = []
+        # 每个代理的在途请求数，达到上限后移出可选索引
+        self._in_flight: Dict[str, int] = {}
+
+        # 到期最小堆：(到期时间戳, 序号, 代理)，出池的代理在到达堆顶时惰性丢弃
+        self._expiry_heap: List[Tuple[float, int, Proxy]] = []
+        self._expiry_seq = 0
+        self._expired_evictions = 0
+
+        # 健康检查调度最小堆：(下次检查时间戳, 序号, 代理)，出池的代理出堆时惰性丢弃
+        self._health_heap: List[Tuple[float, int, Proxy]] = []
+        self._health_seq = 0
+        # 每个代理自上次检查以来的租用次数，用于估算流量占比
+        self._lease_counts: Dict[str, int] = {}
+        self._lease_count_total = 0
+
+        # 隔离集合：被上报失败、健康检查淘汰或入池探测失败的地址
+        self._quarantine = ProxyQuarantine(ttl_sec=quarantine_ttl_sec)
+        self._quarantine_rejections = 0
+
+        # 粘性会话：session_key -> 代理地址，按最近使用淘汰
+        self._sessions: OrderedDict[str, str] = OrderedDict()
+
+        # 排空中的旧池：切换后至 _drain_deadline_ts 前只做兜底分配
+        self._draining_pool: Optional[str] = None
+        self._drain_deadline_ts = 0.0
 
         # 配置
         self.rotate_interval_sec = rotate_interval_sec
@@ -58,13 +141,31 @@ class MemoryProxyRepository(IProxyRepository):
         self.batch_count = batch_count
         self.enable_health_check = enable_health_check
         self.health_check_interval = health_check_interval
+        self.min_health_check_interval = min_health_check_interval
+        self.selection_strategy = selection_strategy
+        self.max_in_flight_per_proxy = max_in_flight_per_proxy
+        self.lease_ttl_sec = lease_ttl_sec
+        self.max_sticky_sessions = max_sticky_sessions
+        self.proxy_lifetime_sec = proxy_lifetime_sec
+        self.expiry_safety_margin_sec = expiry_safety_margin_sec
+        self.overlap_window_sec = overlap_window_sec
+        self.warmup_sec = warmup_sec
+        self.replenish_cooldown_sec = replenish_cooldown_sec
+        self.fetch_concurrency = fetch_concurrency
+        self.probe_concurrency = probe_concurrency
+        self.health_policy = health_policy or HealthTransitionPolicy()
 
         # 状态
         self._lock = asyncio.Lock()
         self._last_rotate_ts = time.time()
+        self._last_refresh_ts = 0.0
+        self._switch_count = 0
         self._start_time = time.time()
         self._maintain_task: Optional[asyncio.Task] = None
         self._health_check_task: Optional[asyncio.Task] = None
+        self._replenish_task: Optional[asyncio.Task] = None
+        # 活跃池跌破低水位时置位，由补充任务消费
+        self._replenish_event = asyncio.Event()
 
         # 统计
         self._total_requests = 0
@@ -72,9 +173,23 @@ class MemoryProxyRepository(IProxyRepository):
         self._failure_count = 0
         self._last_fetch_time: Optional[float] = None
         self._last_fetch_count = 0
+        self._replenished_count = 0
+        self._fallback_leases = 0
 
         # 健康检查器
-        self.health_checker = ProxyHealthChecker(market.value) if enable_health_check else None
+        self.health_checker = (
+            ProxyHealthChecker(
+                market.value,
+                probe_mode=health_probe_mode,
+                tcp_timeout=health_tcp_timeout_ms / 1000,
+                deep_check_interval_sec=health_deep_check_interval_sec,
+                targets=health_check_targets,
+                initial_concurrency=probe_concurrency,
+                health_policy=self.health_policy,
+            )
+            if enable_health_check
+            else None
+        )
 
         # 日志
         self.logger = get_logger(f"memory_proxy_repo.{market.value}.{mode.value}")
@@ -85,52 +200,474 @@ class MemoryProxyRepository(IProxyRepository):
         return "B" if self.active_pool == "A" else "A"
 
     @measure("proxy_repository_get_duration", ("market", "mode"))
-    async def get_proxy_from_pool(self, proxy_type: str = "short") -> Optional[Proxy]:
-        """从池中获取代理"""
+    async def get_proxy_from_pool(
+        self, proxy_type: str = "short", session_key: Optional[str] = None
+    ) -> Optional[Proxy]:
+        """从池中获取代理
+
+        不创建租约，也不计入在途请求数：供不归还代理的调用方使用，
+        在途上限只约束通过 acquire_lease 租用并归还的调用方。
+        """
+        async with self._lock:
+            proxy = self._acquire_one(session_key)
+            if proxy:
+                self._hand_out(proxy)
+            return proxy
+
+    @measure("proxy_repository_get_batch_duration", ("market", "mode"))
+    async def get_proxies_from_pool(
+        self, count: int, proxy_type: str = "short"
+    ) -> List[Proxy]:
+        """从池中批量获取互不相同的代理（不创建租约，不计入在途请求数）"""
         async with self._lock:
-            self._total_requests += 1
+            proxies = self._acquire_many(count)
+            for proxy in proxies:
+                self._hand_out(proxy)
+            return proxies
 
-            # 优先从活跃池获取
-            active_proxies = [p for p in self.pools[self.active_pool] if p.is_healthy()]
-            if active_proxies:
-                proxy = random.choice(active_proxies)
-                proxy.mark_used()
+    @measure("proxy_repository_lease_duration", ("market", "mode"))
+    async def acquire_lease(
+        self, proxy_type: str = "short", session_key: Optional[str] = None
+    ) -> Optional[ProxyLease]:
+        """租用一个代理，计入在途请求数直到归还或租约到期
+
+        Args:
+            session_key: 粘性会话键，同一会话键在代理存活期间始终映射到同一代理
+        """
+        async with self._lock:
+            proxy = self._acquire_one(session_key)
+            return self._lease(proxy) if proxy else None
+
+    @measure("proxy_repository_lease_batch_duration", ("market", "mode"))
+    async def acquire_leases(
+        self, count: int, proxy_type: str = "short"
+    ) -> List[ProxyLease]:
+        """批量租用互不相同的代理"""
+        async with self._lock:
+            return [self._lease(proxy) for proxy in self._acquire_many(count)]
+
+    def _prepare_acquire(self) -> None:
+        """取代理前回收到期租约、淘汰到期代理并结束到期的排空（需持有锁）"""
+        self._total_requests += 1
+        self._reap_expired_leases()
+        self._evict_expiring()
+        self._end_drain_if_due()
+
+    def _acquire_one(self, session_key: Optional[str]) -> Optional[Proxy]:
+        """选取一个代理（需持有锁）"""
+        self._prepare_acquire()
+
+        if session_key:
+            proxy = self._select_sticky(session_key)
+            if proxy:
                 self._success_count += 1
                 return proxy
 
-            # 活跃池为空，尝试备用池
-            standby_proxies = [
-                p for p in self.pools[self.standby_pool] if p.is_healthy()
-            ]
-            if standby_proxies:
-                proxy = random.choice(standby_proxies)
-                proxy.mark_used()
+        # 优先从活跃池获取，活跃池为空时尝试备用池
+        for pool_name in (self.active_pool, self.standby_pool):
+            proxy = self._select_from(pool_name)
+            if proxy:
                 self._success_count += 1
                 return proxy
 
-            # 两个池都为空
-            self.logger.warning("Both pools are empty or unhealthy")
+        # 两个池都为空
+        self.logger.warning("Both pools are empty, unhealthy or saturated")
+        return None
+
+    def _acquire_many(self, count: int) -> List[Proxy]:
+        """选取至多 count 个互不相同的代理（需持有锁）"""
+        self._prepare_acquire()
+
+        proxies: List[Proxy] = []
+        for pool_name in (self.active_pool, self.standby_pool):
+            if len(proxies) >= count:
+                break
+            proxies.extend(self._select_many_from(pool_name, count - len(proxies)))
+
+        if not proxies:
+            self.logger.warning("Both pools are empty, unhealthy or saturated")
+            return []
+
+        self._success_count += 1
+        return proxies
+
+    async def release_lease(
+        self, lease_id: str, success: bool = True, latency_ms: Optional[float] = None
+    ) -> bool:
+        """归还租约并上报结果
+
+        Returns:
+            租约是否有效；未知或已过期的租约返回False
+        """
+        async with self._lock:
+            self._reap_expired_leases()
+
+            lease = self._leases.pop(lease_id, None)
+            if lease is None:
+                return False
+
+            if latency_ms is not None:
+                lease.proxy.record_latency(latency_ms)
+            if success:
+                # 调用方上报成功同样推动 probation/suspect 代理转为 healthy
+                lease.proxy.record_success(self.health_policy)
+            self._finish_lease(lease)
+            if not success:
+                self._mark_failure_locked(lease.proxy_addr)
+            return True
+
+    def _select_sticky(self, session_key: str) -> Optional[Proxy]:
+        """粘性会话选取（需持有锁）
+
+        已映射的代理仍在池中且未被隔离时直接复用（即使在途请求已满，会话亲和优先），
+        否则用 rendezvous (HRW) 哈希重新映射，依次在活跃池、备用池中选取：
+        候选为 healthy 代理（healthy 不足 low_watermark 时加上 probation 代理），
+        没有候选时才用兜底代理。只有代理失效或被轮换出去的会话键才会改变映射。
+        """
+        addr = self._sessions.get(session_key)
+        if addr is not None:
+            pool_name = self._addr_index.get(addr)
+            proxy = self.pools[pool_name].get(addr) if pool_name else None
+            if proxy is not None and proxy.is_healthy():
+                self._sessions.move_to_end(session_key)
+                return proxy
+
+        for pool_name in (self.active_pool, self.standby_pool):
+            candidates = [p for p in self._selectable[pool_name] if p.is_preferred()]
+            if self._under_pressure(pool_name):
+                candidates.extend(
+                    p for p in self._fallback[pool_name]
+                    if p.health_state == ProxyHealthState.PROBATION
+                )
+            proxy = max(
+                candidates,
+                key=lambda p: self._rendezvous_score(session_key, p.addr),
+                default=None,
+            ) or max(
+                (p for p in self._fallback[pool_name] if p.is_healthy()),
+                key=lambda p: self._rendezvous_score(session_key, p.addr),
+                default=None,
+            )
+            if proxy is not None:
+                self._sessions[session_key] = proxy.addr
+                self._sessions.move_to_end(session_key)
+                while len(self._sessions) > self.max_sticky_sessions:
+                    self._sessions.popitem(last=False)
+                return proxy
+
+        return None
+
+    @staticmethod
+    def _rendezvous_score(session_key: str, proxy_addr: str) -> int:
+        """HRW 权重：会话键与代理地址的联合哈希"""
+        digest = hashlib.blake2b(
+            f"{session_key}|{proxy_addr}".encode(), digest_size=8
+        ).digest()
+        return int.from_bytes(digest, "big")
+
+    def _hand_out(self, proxy: Proxy) -> None:
+        """记录代理被下发一次（需持有锁）"""
+        proxy.mark_used()
+        self._lease_counts[proxy.addr] = self._lease_counts.get(proxy.addr, 0) + 1
+        self._lease_count_total += 1
+
+    def _lease(self, proxy: Proxy) -> ProxyLease:
+        """为选中的代理创建租约（需持有锁）"""
+        self._hand_out(proxy)
+        expires_ts = time.time() + self.lease_ttl_sec
+        lease = ProxyLease(
+            lease_id=uuid.uuid4().hex,
+            proxy=proxy,
+            expires_ts=expires_ts,
+            ttl_seconds=self.lease_ttl_sec,
+        )
+        self._leases[lease.lease_id] = lease
+        heapq.heappush(self._lease_expiry, (expires_ts, lease.lease_id))
+
+        in_flight = self._in_flight.get(proxy.addr, 0) + 1
+        self._in_flight[proxy.addr] = in_flight
+        if self._is_saturated(proxy.addr):
+            pool_name = self._addr_index.get(proxy.addr)
+            if pool_name is not None:
+                self._make_unselectable(pool_name, proxy.addr)
+        return lease
+
+    def _finish_lease(self, lease: ProxyLease) -> None:
+        """租约结束，释放在途计数（需持有锁）"""
+        addr = lease.proxy_addr
+        in_flight = self._in_flight.get(addr, 0) - 1
+        if in_flight > 0:
+            self._in_flight[addr] = in_flight
+        else:
+            self._in_flight.pop(addr, None)
+
+        # 仍在池中的健康代理恢复可选
+        pool_name = self._addr_index.get(addr)
+        if (
+            pool_name is not None
+            and self.pools[pool_name].get(addr) is lease.proxy
+            and lease.proxy.is_healthy()
+        ):
+            self._make_selectable(pool_name, lease.proxy)
+
+    def _evict_expiring(self) -> None:
+        """淘汰已到期或进入安全边际的代理（需持有锁），均摊 O(log n)"""
+        deadline = time.time() + self.expiry_safety_margin_sec
+        while self._expiry_heap and self._expiry_heap[0][0] <= deadline:
+            _, _, proxy = heapq.heappop(self._expiry_heap)
+            pool_name = self._addr_index.get(proxy.addr)
+            if pool_name is not None and self.pools[pool_name].get(proxy.addr) is proxy:
+                self._evict(pool_name, proxy.addr)
+                self._expired_evictions += 1
+
+    def _end_drain_if_due(self) -> None:
+        """重叠窗口结束或旧池已耗尽时结束排空（需持有锁）"""
+        if self._draining_pool is None:
+            return
+        if time.time() >= self._drain_deadline_ts or not self.pools[self._draining_pool]:
+            self._end_drain()
+
+    def _end_drain(self) -> None:
+        """结束排空：旧池剩余代理全部出池（需持有锁）
+
+        在途租约仍持有代理对象，归还时发现代理已出池即不再恢复可选。
+        """
+        pool_name = self._draining_pool
+        if pool_name is None:
+            return
+        remaining = len(self.pools[pool_name])
+        self._clear_pool(pool_name)
+        self._draining_pool = None
+        self.logger.info(f"Pool {pool_name} drained, {remaining} remaining proxies evicted")
+
+    def _reap_expired_leases(self) -> None:
+        """回收到期未归还的租约（需持有锁）"""
+        now = time.time()
+        while self._lease_expiry and self._lease_expiry[0][0] <= now:
+            _, lease_id = heapq.heappop(self._lease_expiry)
+            lease = self._leases.pop(lease_id, None)
+            if lease is not None:
+                self._finish_lease(lease)
+
+    def _is_saturated(self, proxy_addr: str) -> bool:
+        """代理在途请求数是否达到上限"""
+        return (
+            self.max_in_flight_per_proxy > 0
+            and self._in_flight.get(proxy_addr, 0) >= self.max_in_flight_per_proxy
+        )
+
+    def _select_many_from(self, pool_name: str, count: int) -> List[Proxy]:
+        """从池中选取至多 count 个互不相同的代理（需持有锁）
+
+        先按选择策略取 healthy 代理，不足时从兜底代理中随机补足。
+        """
+        selectable = self._selectable[pool_name]
+        fallback = self._fallback[pool_name]
+        strategy = self._strategies[pool_name]
+        selected: List[Proxy] = []
+        while len(selected) < count and selectable:
+            # 已选中的代理暂时移出，保证后续选取互不重复
+            proxy = strategy.select(selectable)
+            if proxy is None:
+                break
+            selectable.discard(proxy.addr)
+            if proxy.is_preferred():
+                selected.append(proxy)
+            elif proxy.is_healthy():
+                fallback.add(proxy)
+
+        while len(selected) < count and fallback:
+            proxy = fallback.random_choice()
+            fallback.discard(proxy.addr)
+            if proxy.is_healthy():
+                selected.append(proxy)
+                if not proxy.is_preferred():
+                    self._fallback_leases += 1
+
+        for proxy in selected:
+            self._make_selectable(pool_name, proxy)
+        return selected
+
+    def _under_pressure(self, pool_name: str) -> bool:
+        """池内可选的 healthy 代理是否少于 low_watermark（需持有锁）"""
+        return len(self._selectable[pool_name]) < self.low_watermark
+
+    def _select_from(self, pool_name: str) -> Optional[Proxy]:
+        """从池中选取一个代理（需持有锁）：healthy 代理按选择策略，其次随机兜底代理
+
+        healthy 代理不足 low_watermark 时（如切换后新池代理尚在 probation），
+        按 healthy 与兜底代理的数量比例随机混入 probation 代理，
+        避免流量集中到最先转正的少数代理。
+        状态已变化的代理在被选中时才移到对应索引或移除，
+        每次状态变化最多惰性处理一次，均摊 O(1)。
+        """
+        selectable = self._selectable[pool_name]
+        fallback = self._fallback[pool_name]
+        strategy = self._strategies[pool_name]
+        if (
+            fallback
+            and self._under_pressure(pool_name)
+            and random.randrange(len(selectable) + len(fallback)) >= len(selectable)
+        ):
+            proxy = fallback.random_choice()
+            if proxy.is_preferred():
+                self._make_selectable(pool_name, proxy)
+                return proxy
+            if proxy.health_state == ProxyHealthState.PROBATION:
+                self._fallback_leases += 1
+                return proxy
+            # 抽到 suspect 代理：仍按 healthy 优先选取
+
+        while selectable:
+            proxy = strategy.select(selectable)
+            if proxy is None:
+                break
+            if proxy.is_preferred():
+                return proxy
+            selectable.discard(proxy.addr)
+            if proxy.is_healthy():
+                fallback.add(proxy)
+
+        while fallback:
+            proxy = fallback.random_choice()
+            if proxy.is_preferred():
+                # 已转为 healthy：移回可选索引，本次直接使用
+                self._make_selectable(pool_name, proxy)
+                return proxy
+            if proxy.is_healthy():
+                self._fallback_leases += 1
+                return proxy
+            fallback.discard(proxy.addr)
+        return None
+
+    def _make_selectable(self, pool_name: str, proxy: Proxy) -> None:
+        """代理按健康状态进入可选索引或兜底索引（需持有锁），在途请求已满或已隔离的代理跳过"""
+        if self._is_saturated(proxy.addr) or not proxy.is_healthy():
+            return
+        if proxy.is_preferred():
+            self._fallback[pool_name].discard(proxy.addr)
+            if self._selectable[pool_name].add(proxy):
+                self._strategies[pool_name].on_admit(proxy)
+        else:
+            self._selectable[pool_name].discard(proxy.addr)
+            self._fallback[pool_name].add(proxy)
+
+    def _make_unselectable(self, pool_name: str, proxy_addr: str) -> None:
+        """代理移出可选索引和兜底索引（需持有锁）"""
+        self._selectable[pool_name].discard(proxy_addr)
+        self._fallback[pool_name].discard(proxy_addr)
+
+    def _admit(self, pool_name: str, proxy: Proxy) -> None:
+        """代理入池（需持有锁）
+
+        同一地址重新下发到另一个池时，以新池中的代理为准。
+        """
+        current = self._addr_index.get(proxy.addr)
+        if current == pool_name:
+            return
+        if current is not None:
+            self._evict(current, proxy.addr)
+
+        self.pools[pool_name].add(proxy)
+        self._addr_index[proxy.addr] = pool_name
+        if proxy.expires_ts is not None:
+            self._expiry_seq += 1
+            heapq.heappush(self._expiry_heap, (proxy.expires_ts, self._expiry_seq, proxy))
+        if (
+            proxy.health_state == ProxyHealthState.PROBATION
+            and not (self.health_checker and self.enable_health_check)
+        ):
+            # 未启用健康检查时没有主动探测推动转正，入池即视为 healthy
+            proxy.health_state = ProxyHealthState.HEALTHY
+        if proxy.is_healthy():
+            self._make_selectable(pool_name, proxy)
+        # 入池前已探测过，首次复查按正常间隔排期，不再重复检查
+        self._schedule_health_check(proxy)
+
+    def _evict(self, pool_name: str, proxy_addr: str) -> Optional[Proxy]:
+        """代理出池（需持有锁）"""
+        proxy = self.pools[pool_name].discard(proxy_addr)
+        if proxy is None:
             return None
+        self._make_unselectable(pool_name, proxy_addr)
+        del self._addr_index[proxy_addr]
+        self._lease_count_total -= self._lease_counts.pop(proxy_addr, 0)
+        if pool_name == self.active_pool:
+            self._check_watermark()
+        return proxy
 
-    async def mark_failure(self, proxy_addr: str) -> None:
-        """标记代理失败并移除"""
+    def _usable_count(self, pool_name: str, limit: int) -> int:
+        """池内 healthy/probation 代理数，数到 limit 即停（需持有锁）
+
+        suspect 代理仍在池中但随时可能被隔离，不计入。
+        """
+        count = 0
+        for proxy in self.pools[pool_name]:
+            if proxy.health_state in (ProxyHealthState.HEALTHY, ProxyHealthState.PROBATION):
+                count += 1
+                if count >= limit:
+                    break
+        return count
+
+    def _check_watermark(self) -> None:
+        """活跃池可用代理跌破低水位时触发增量补充（需持有锁）
+
+        代理出池或健康状态下降后调用；首次切换前由维护循环负责填充，不触发补充。
+        """
+        if (
+            self._switch_count > 0
+            and self._usable_count(self.active_pool, self.low_watermark) < self.low_watermark
+        ):
+            self._replenish_event.set()
+
+    def _clear_pool(self, pool_name: str) -> None:
+        """清空池（需持有锁）"""
+        for proxy in self.pools[pool_name]:
+            self._addr_index.pop(proxy.addr, None)
+            self._lease_count_total -= self._lease_counts.pop(proxy.addr, 0)
+        self.pools[pool_name].clear()
+        self._selectable[pool_name].clear()
+        self._fallback[pool_name].clear()
+        self._strategies[pool_name].reset()
+
+    async def mark_failure(self, proxy_addr: str) -> bool:
+        """上报代理失败：按调用方上报的失败权重迁移健康状态，进入隔离时出池
+
+        Returns:
+            代理是否在池中；未知地址直接拒绝，不触碰池
+        """
         async with self._lock:
-            self._failure_count += 1
+            return self._mark_failure_locked(proxy_addr)
 
-            for pool_name in ("A", "B"):
-                for proxy in self.pools[pool_name]:
-                    if proxy.addr == proxy_addr:
-                        proxy.mark_failure()
-                        self.logger.debug(f"Marked proxy {proxy_addr} as failed")
+    def _mark_failure_locked(self, proxy_addr: str) -> bool:
+        """上报代理失败（需持有锁）：累计失败权重，进入隔离的代理出池，其余按新状态调整索引"""
+        pool_name = self._addr_index.get(proxy_addr)
+        if pool_name is None:
+            self.logger.debug(f"Ignored failure report for unknown proxy {proxy_addr}")
+            return False
 
-                # 移除失败的代理
-                self.pools[pool_name] = [
-                    p for p in self.pools[pool_name] if p.addr != proxy_addr
-                ]
+        self._failure_count += 1
+        proxy = self.pools[pool_name].get(proxy_addr)
+        previous = proxy.record_failure(FailureKind.CLIENT_REPORT, self.health_policy)
+        if not proxy.is_healthy():
+            self._evict(pool_name, proxy_addr)
+            self._quarantine.add(proxy_addr)
+            self.logger.debug(f"Quarantined proxy {proxy_addr} after client failure reports")
+        else:
+            self._make_selectable(pool_name, proxy)
+            self.logger.debug(
+                f"Proxy {proxy_addr} reported failed: "
+                f"{previous.value} -> {proxy.health_state.value}"
+            )
+            if pool_name == self.active_pool:
+                self._check_watermark()
+        return True
 
     async def get_stats(self) -> ProxyPoolStats:
         """获取代理池统计信息"""
         async with self._lock:
+            self._evict_expiring()
+            self._end_drain_if_due()
             active_size = len(self.pools[self.active_pool])
             standby_size = len(self.pools[self.standby_pool])
             uptime_seconds = int(time.time() - self._start_time)
@@ -165,6 +702,18 @@ class MemoryProxyRepository(IProxyRepository):
                 ),
                 last_fetch_count=self._last_fetch_count,
                 status=self._get_health_status(active_size),
+                active_leases=len(self._leases),
+                saturated_proxies=sum(
+                    1 for addr in self._in_flight if self._is_saturated(addr)
+                ),
+                expired_evictions=self._expired_evictions,
+                draining=self._draining_pool is not None,
+                next_switch_in_seconds=max(int(self._next_switch_ts() - time.time()), 0),
+                replenished_proxies=self._replenished_count,
+                providers=self.fetcher.provider_stats(),
+                quarantined_proxies=len(self._quarantine),
+                quarantine_rejections=self._quarantine_rejections,
+                fallback_leases=self._fallback_leases,
             )
 
     def _get_health_status(self, active_size: int) -> str:
@@ -184,6 +733,8 @@ class MemoryProxyRepository(IProxyRepository):
 
         self.logger.info(f"Starting proxy pool maintenance for {self.market.value}")
         self._maintain_task = asyncio.create_task(self._maintenance_loop())
+        if not self._replenish_task or self._replenish_task.done():
+            self._replenish_task = asyncio.create_task(self._replenish_loop())
 
         # 启动健康检查任务
         if self.health_checker and self.enable_health_check:
@@ -195,12 +746,13 @@ class MemoryProxyRepository(IProxyRepository):
 
     async def stop_maintenance(self) -> None:
         """停止维护任务"""
-        if self._maintain_task and not self._maintain_task.done():
-            self._maintain_task.cancel()
-            try:
-                await self._maintain_task
-            except asyncio.CancelledError:
-                pass
+        for task in (self._maintain_task, self._replenish_task):
+            if task and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
 
         # 停止健康检查任务
         if self._health_check_task and not self._health_check_task.done():
@@ -210,21 +762,48 @@ class MemoryProxyRepository(IProxyRepository):
             except asyncio.CancelledError:
                 pass
 
+        # 关闭健康检查复用的客户端
+        if self.health_checker:
+            await self.health_checker.close()
+
         self.logger.info("Proxy pool maintenance stopped")
 
+    def _effective_rotate_interval(self) -> float:
+        """实际切换间隔：活跃池的代理须在进入到期安全边际前被换下"""
+        usable = self.proxy_lifetime_sec - self.expiry_safety_margin_sec - self.warmup_sec
+        return max(min(self.rotate_interval_sec, usable), 1)
+
+    def _next_switch_ts(self) -> float:
+        """下次切换时间：首次启动或活跃池已空时立即切换"""
+        if self._switch_count == 0 or not self.pools[self.active_pool]:
+            return time.time()
+        return self._last_rotate_ts + self._effective_rotate_interval()
+
+    async def _wait_until(self, deadline: Callable[[], float], step: float = 5.0) -> None:
+        """等待到截止时间，期间定期重算截止时间（活跃池耗尽时提前切换）"""
+        while True:
+            remaining = deadline() - time.time()
+            if remaining <= 0:
+                return
+            await asyncio.sleep(min(remaining, step))
+
     async def _maintenance_loop(self) -> None:
-        """维护循环"""
+        """维护循环：预热刷新备用池 -> 到点切换 -> 旧池排空"""
         while True:
             try:
-                # 刷新备用池
+                # 切换前 warmup_sec 开始刷新备用池，两次刷新间隔不小于 min_refresh_secs
+                await self._wait_until(
+                    lambda: max(
+                        self._next_switch_ts() - self.warmup_sec,
+                        self._last_refresh_ts + self.min_refresh_secs,
+                    )
+                )
                 await self._refresh_standby_pool()
 
                 # 切换池
+                await self._wait_until(self._next_switch_ts)
                 await self._switch_pools()
 
-                # 等待下次刷新
-                await asyncio.sleep(self.min_refresh_secs)
-
             except asyncio.CancelledError:
                 self.logger.info("Proxy pool maintenance cancelled")
                 break
@@ -235,96 +814,260 @@ class MemoryProxyRepository(IProxyRepository):
     async def _refresh_standby_pool(self) -> None:
         """刷新备用池"""
         async with self._lock:
-            # 清空备用池
+            # 备用池即上一轮的旧池，刷新前结束其排空并清空
             standby = self.standby_pool
-            self.pools[standby] = []
+            if self._draining_pool == standby:
+                self._end_drain()
+            self._clear_pool(standby)
+            self._last_refresh_ts = time.time()
 
-        # 获取新代理
-        new_proxies: List[str] = []
+        admitted = await self._fill_pool(
+            lambda: standby, self.target_size, self.batch_count, self.target_size
+        )
 
-        for batch_idx in range(self.batch_count):
-            try:
-                batch = await self.fetcher.fetch_proxies(self.target_size)
-                if batch:
-                    new_proxies.extend(batch)
-                    self.logger.debug(
-                        f"Fetched {len(batch)} proxies in batch {batch_idx + 1}"
-                    )
+        async with self._lock:
+            self._last_fetch_time = time.time()
+            self._last_fetch_count = admitted
 
-            except Exception as e:
-                self.logger.error(
-                    f"Failed to fetch proxies in batch {batch_idx + 1}: {e}"
-                )
+        self.logger.info(f"Refreshed standby pool {standby} with {admitted} proxies")
 
-            # 批次间间隔
-            if batch_idx < self.batch_count - 1:
-                await asyncio.sleep(1)
+    async def _fill_pool(
+        self,
+        pool_name: Callable[[], str],
+        wanted: int,
+        batch_count: int,
+        batch_size: int,
+    ) -> int:
+        """流水线填充：并发拉取批次 -> 去重 -> 健康探测 -> 逐个入池
 
-        # 更新备用池
-        async with self._lock:
-            # 限制数量并创建代理对象
-            proxies_to_add = new_proxies[: self.target_size]
-            now = datetime.now()
-            self.pools[standby] = [
-                Proxy(addr=addr, status=ProxyStatus.ACTIVE, created_at=now)
-                for addr in proxies_to_add
-            ]
-
-            # 更新统计
-            self._last_fetch_time = time.time()
-            self._last_fetch_count = len(proxies_to_add)
+        批次以 fetch_concurrency 并发拉取，每批到达后立即在健康检查器的
+        自适应并发控制下探测，探测通过的代理马上入池可选，不等待其余批次和探测完成。
 
-        self.logger.info(f"Refreshed standby pool with {len(proxies_to_add)} proxies")
+        Args:
+            pool_name: 入池时求值的目标池，补充活跃池时跟随切换
+            wanted: 本轮最多入池数量
 
-        # 如果启用健康检查，立即检查新代理的健康状态
-        if self.health_checker and self.enable_health_check and proxies_to_add:
-            try:
-                await self.health_checker.check_proxies_batch(self.pools[standby], max_concurrent=5)
-                self.logger.info(f"Health check completed for {len(proxies_to_add)} new proxies")
-            except Exception as e:
-                self.logger.error(f"Failed to perform health check on new proxies: {e}")
+        Returns:
+            实际入池数量
+        """
+        fetch_semaphore = asyncio.Semaphore(self.fetch_concurrency)
+        probe_enabled = bool(self.health_checker and self.enable_health_check)
+        seen: set = set()
+        admitted = 0
+
+        async def probe_and_admit(proxy: Proxy) -> None:
+            nonlocal admitted
+            if admitted >= wanted:
+                return
+
+            if probe_enabled:
+                async with self.health_checker.concurrency:
+                    if admitted >= wanted:
+                        return
+                    try:
+                        stats = await self.health_checker.check_proxy_health(proxy)
+                    except Exception as e:
+                        self.logger.debug(f"Probe failed for {proxy.addr}: {e}")
+                        stats = None
+                if stats is not None and stats.last_outcome == ProbeOutcome.INCONCLUSIVE:
+                    # 测试端点全部熔断，无法判断代理好坏：本轮放弃，不隔离，端点恢复后可再次入池
+                    await self.health_checker.release(proxy.addr)
+                    return
+                if stats is None or not stats.is_healthy:
+                    self._quarantine.add(proxy.addr)
+                    await self.health_checker.release(proxy.addr)
+                    return
+
+            async with self._lock:
+                if admitted < wanted and proxy.addr not in self._addr_index:
+                    self._admit(pool_name(), proxy)
+                    admitted += 1
+                    return
+                # 探测通过但名额已满：释放探测客户端和统计；同一地址已在池中时两者仍在使用，保留
+                discard_probe = probe_enabled and proxy.addr not in self._addr_index
+            if discard_probe:
+                await self.health_checker.release(proxy.addr)
+
+        async def fetch_batch(batch_idx: int) -> None:
+            async with fetch_semaphore:
+                try:
+                    batch = await self.fetcher.fetch_proxies(batch_size)
+                except Exception as e:
+                    self.logger.error(
+                        f"Failed to fetch proxies in batch {batch_idx + 1}: {e}"
+                    )
+                    return
+
+            self.logger.debug(f"Fetched {len(batch or ())} proxies in batch {batch_idx + 1}")
+            now = time.time()
+            expires_ts = now + self.proxy_lifetime_sec
+            fresh: List[Proxy] = []
+            for addr in batch or ():
+                if addr in seen or addr in self._addr_index:
+                    continue
+                seen.add(addr)
+                if addr in self._quarantine:
+                    self._quarantine_rejections += 1
+                    continue
+                fresh.append(
+                    Proxy(
+                        addr=addr,
+                        status=ProxyStatus.ACTIVE,
+                        created_ts=now,
+                        expires_ts=expires_ts,
+                    )
+                )
+            await asyncio.gather(*(probe_and_admit(proxy) for proxy in fresh))
+
+        await asyncio.gather(*(fetch_batch(idx) for idx in range(batch_count)))
+        return admitted
 
     async def _switch_pools(self) -> None:
-        """切换活跃池和备用池"""
+        """切换活跃池和备用池
+
+        旧池不立即清空：新池接管选取，旧池仅在新池无可用代理时兜底，
+        已租出的代理和映射到旧池的粘性会话继续有效，
+        旧池代理按到期时间自然出池，重叠窗口结束后剩余代理统一出池。
+        """
         async with self._lock:
+            if not self.pools[self.standby_pool]:
+                # 备用池刷新失败时保留当前活跃池，等待下一轮刷新
+                self.logger.warning("Standby pool is empty, switch skipped")
+                return
+
+            if self._draining_pool is not None:
+                self._end_drain()
+
             old_active = self.active_pool
             self.active_pool = self.standby_pool
             self._last_rotate_ts = time.time()
+            self._switch_count += 1
 
-            # 清空旧的活跃池（现在变成备用池）
-            self.pools[old_active] = []
+            if self.overlap_window_sec > 0 and self.pools[old_active]:
+                self._draining_pool = old_active
+                self._drain_deadline_ts = self._last_rotate_ts + self.overlap_window_sec
+            else:
+                self._clear_pool(old_active)
+            self._check_watermark()
 
-        self.logger.info(f"Switched active pool to {self.active_pool}")
+        self.logger.info(
+            f"Switched active pool to {self.active_pool}"
+            + (f", draining pool {old_active}" if self._draining_pool else "")
+        )
 
-    async def _health_check_loop(self) -> None:
-        """健康检查循环"""
+    async def _replenish_loop(self) -> None:
+        """补充循环：等待低水位信号，每轮补充后冷却 replenish_cooldown_sec"""
         while True:
             try:
-                # 获取当前所有代理
-                all_proxies = []
-                async with self._lock:
-                    for pool_name in ("A", "B"):
-                        all_proxies.extend(self.pools[pool_name])
+                await self._replenish_event.wait()
+                self._replenish_event.clear()
+                await self._replenish_active_pool()
+                await asyncio.sleep(self.replenish_cooldown_sec)
+
+            except asyncio.CancelledError:
+                self.logger.info("Proxy pool replenishment cancelled")
+                break
+            except Exception as e:
+                self.logger.error(f"Error in proxy pool replenishment: {e}")
+                await asyncio.sleep(self.replenish_cooldown_sec)
+
+    async def _replenish_active_pool(self) -> None:
+        """增量补充活跃池：只获取缺口数量，验证通过的代理直接进入活跃池"""
+        async with self._lock:
+            usable = self._usable_count(self.active_pool, self.target_size)
+            if usable >= self.low_watermark:
+                return
+            missing = self.target_size - usable
 
-                if all_proxies and self.health_checker:
-                    self.logger.debug(f"Starting health check for {len(all_proxies)} proxies")
+        if missing <= 0:
+            return
 
-                    # 执行健康检查
-                    await self.health_checker.check_proxies_batch(all_proxies, max_concurrent=8)
+        admitted = await self._fill_pool(lambda: self.active_pool, missing, 1, missing)
+        async with self._lock:
+            self._replenished_count += admitted
 
-                    # 移除不健康的代理
-                    await self._remove_unhealthy_proxies()
+        self.logger.info(f"Replenished active pool with {admitted}/{missing} proxies")
 
-                    # 记录健康状态摘要
-                    health_summary = self.health_checker.get_health_summary()
-                    self.logger.info(
-                        f"Health check completed: {health_summary['healthy_proxies']}/{health_summary['total_proxies']} "
-                        f"healthy ({health_summary['health_rate']:.1f}%), "
-                        f"avg response time: {health_summary['avg_response_time']}ms"
-                    )
+    def _in_pool(self, proxy: Proxy) -> bool:
+        """代理对象是否仍在池中（同地址重新入池的新对象不算）"""
+        pool_name = self._addr_index.get(proxy.addr)
+        return pool_name is not None and self.pools[pool_name].get(proxy.addr) is proxy
+
+    def _health_check_delay(self, proxy: Proxy, now: float) -> float:
+        """单个代理的复查间隔（需持有锁）
+
+        - 近期失败：每次连续失败间隔减半，尽快确认或淘汰
+        - 年龄：入池越久且未失败越稳定，间隔最多拉长到基准的2倍
+        - 流量占比：租用次数高于池内平均的代理影响面大，间隔按占比平方根缩短
+        """
+        delay = float(self.health_check_interval)
 
-                # 等待下次检查
-                await asyncio.sleep(self.health_check_interval)
+        stats = self.health_checker.get_proxy_stats(proxy.addr) if self.health_checker else None
+        if stats and stats.consecutive_failures:
+            delay /= 2 ** min(stats.consecutive_failures, 4)
+        elif not proxy.is_preferred():
+            # probation/suspect 代理提前复查，尽快确认转正或隔离
+            delay /= 2
+        elif proxy.created_ts:
+            age = now - proxy.created_ts
+            delay *= 1 + min(age / self.health_check_interval, 1.0)
+
+        leases = self._lease_counts.get(proxy.addr, 0)
+        if leases and self._addr_index:
+            share = leases * len(self._addr_index) / self._lease_count_total
+            if share > 1:
+                delay /= min(share, 4.0) ** 0.5
+
+        return max(delay, float(self.min_health_check_interval))
+
+    def _schedule_health_check(self, proxy: Proxy) -> None:
+        """排期代理的下一次健康检查（需持有锁）
+
+        到期前会被自动淘汰的代理不再排期。
+        """
+        if not (self.health_checker and self.enable_health_check):
+            return
+        now = time.time()
+        due_ts = now + self._health_check_delay(proxy, now)
+        if (
+            proxy.expires_ts is not None
+            and due_ts >= proxy.expires_ts - self.expiry_safety_margin_sec
+        ):
+            return
+
+        # 流量计数按检查周期重新累计
+        self._lease_count_total -= self._lease_counts.pop(proxy.addr, 0)
+        self._health_seq += 1
+        heapq.heappush(self._health_heap, (due_ts, self._health_seq, proxy))
+
+    def _pop_due_health_checks(self) -> List[Proxy]:
+        """取出所有已到期且仍在池中的代理（需持有锁）"""
+        now = time.time()
+        due: List[Proxy] = []
+        while self._health_heap and self._health_heap[0][0] <= now:
+            _, _, proxy = heapq.heappop(self._health_heap)
+            if self._in_pool(proxy):
+                due.append(proxy)
+        return due
+
+    async def _health_check_loop(self) -> None:
+        """健康检查循环：按堆顶到期时间逐批检查到期代理"""
+        while True:
+            try:
+                async with self._lock:
+                    self._evict_expiring()
+                    due = self._pop_due_health_checks()
+
+                if due and self.health_checker:
+                    self.logger.debug(f"Starting health check for {len(due)} due proxies")
+                    await self.health_checker.check_proxies_batch(due)
+                    await self._apply_health_results(due)
+
+                # 等待堆顶到期，至少间隔1秒以便把相近到期的代理合并成一批
+                async with self._lock:
+                    next_due = self._health_heap[0][0] if self._health_heap else None
+                wait = self.min_health_check_interval if next_due is None else next_due - time.time()
+                await asyncio.sleep(min(max(wait, 1.0), self.min_health_check_interval))
 
             except asyncio.CancelledError:
                 self.logger.info("Proxy health check cancelled")
@@ -333,38 +1076,28 @@ class MemoryProxyRepository(IProxyRepository):
                 self.logger.error(f"Error in proxy health check: {e}")
                 await asyncio.sleep(60)  # 错误后等待1分钟
 
-    async def _remove_unhealthy_proxies(self) -> None:
-        """移除不健康的代理"""
-        if not self.health_checker:
-            return
-
-        removed_count = 0
+    async def _apply_health_results(self, proxies: List[Proxy]) -> None:
+        """根据检查结果淘汰已隔离代理，其余代理按健康状态调整索引并排期下一次检查"""
+        removed: List[str] = []
         async with self._lock:
-            for pool_name in ("A", "B"):
-                original_count = len(self.pools[pool_name])
-
-                # 过滤掉不健康的代理
-                healthy_proxies = []
-                for proxy in self.pools[pool_name]:
-                    stats = self.health_checker.get_proxy_stats(proxy.addr)
-                    if stats and stats.is_healthy:
-                        healthy_proxies.append(proxy)
-                    elif not stats:
-                        # 没有统计信息的代理保留（可能是刚添加的）
-                        healthy_proxies.append(proxy)
-                    else:
-                        # 不健康的代理被移除
-                        removed_count += 1
-
-                self.pools[pool_name] = healthy_proxies
-
-                if len(self.pools[pool_name]) < original_count:
-                    self.logger.info(
-                        f"Removed {original_count - len(self.pools[pool_name])} unhealthy proxies from pool {pool_name}"
-                    )
+            for proxy in proxies:
+                if not self._in_pool(proxy):
+                    continue
+                pool_name = self._addr_index[proxy.addr]
+                if not proxy.is_healthy():
+                    self._evict(pool_name, proxy.addr)
+                    self._quarantine.add(proxy.addr)
+                    removed.append(proxy.addr)
+                    continue
+                # 状态变化的代理在可选索引和兜底索引间移动
+                self._make_selectable(pool_name, proxy)
+                self._schedule_health_check(proxy)
+            self._check_watermark()
 
-        if removed_count > 0:
-            self.logger.info(f"Total unhealthy proxies removed: {removed_count}")
+        for addr in removed:
+            await self.health_checker.release(addr)
+        if removed:
+            self.logger.info(f"Removed {len(removed)} quarantined proxies")
 
     def get_health_summary(self) -> Optional[Dict]:
         """获取健康检查摘要"""
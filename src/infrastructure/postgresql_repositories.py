@@ -78,7 +78,13 @@ class PostgreSQLProxyPoolConfigRepository(IProxyPoolConfigRepository):
                        proxy_lifetime_minutes, rotation_interval_minutes, low_watermark,
                        target_size, auto_start_enabled, pre_market_start_minutes,
                        post_market_stop_minutes, backfill_enabled, backfill_duration_hours,
-                       created_at, updated_at
+                       created_at, updated_at, selection_strategy,
+                       max_in_flight_per_proxy, lease_ttl_seconds, expiry_safety_margin_seconds,
+                       overlap_window_seconds, warmup_seconds, backup_api_url,
+                       hedge_requests_enabled, health_probe_mode, health_tcp_timeout_ms,
+                       health_deep_check_interval_seconds, health_check_targets,
+                       health_promote_after_successes, health_recover_after_successes,
+                       health_quarantine_strikes, health_client_report_strikes
                 FROM proxy_pool_config
                 WHERE market = $1 AND mode = $2
             """
@@ -96,6 +102,22 @@ class PostgreSQLProxyPoolConfigRepository(IProxyPoolConfigRepository):
                     rotation_interval_minutes=row["rotation_interval_minutes"],
                     low_watermark=row["low_watermark"],
                     target_size=row["target_size"],
+                    selection_strategy=row["selection_strategy"],
+                    max_in_flight_per_proxy=row["max_in_flight_per_proxy"],
+                    lease_ttl_seconds=row["lease_ttl_seconds"],
+                    expiry_safety_margin_seconds=row["expiry_safety_margin_seconds"],
+                    overlap_window_seconds=row["overlap_window_seconds"],
+                    warmup_seconds=row["warmup_seconds"],
+                    backup_api_url=row["backup_api_url"],
+                    hedge_requests_enabled=row["hedge_requests_enabled"],
+                    health_probe_mode=row["health_probe_mode"],
+                    health_tcp_timeout_ms=row["health_tcp_timeout_ms"],
+                    health_deep_check_interval_seconds=row["health_deep_check_interval_seconds"],
+                    health_check_targets=row["health_check_targets"],
+                    health_promote_after_successes=row["health_promote_after_successes"],
+                    health_recover_after_successes=row["health_recover_after_successes"],
+                    health_quarantine_strikes=row["health_quarantine_strikes"],
+                    health_client_report_strikes=row["health_client_report_strikes"],
                     auto_start_enabled=row["auto_start_enabled"],
                     pre_market_start_minutes=row["pre_market_start_minutes"],
                     post_market_stop_minutes=row["post_market_stop_minutes"],
@@ -123,9 +145,16 @@ class PostgreSQLProxyPoolConfigRepository(IProxyPoolConfigRepository):
                         proxy_lifetime_minutes, rotation_interval_minutes, low_watermark,
                         target_size, auto_start_enabled, pre_market_start_minutes,
                         post_market_stop_minutes, backfill_enabled, backfill_duration_hours,
-                        created_at, updated_at
+                        created_at, updated_at, selection_strategy,
+                        max_in_flight_per_proxy, lease_ttl_seconds, expiry_safety_margin_seconds,
+                        overlap_window_seconds, warmup_seconds, backup_api_url,
+                        hedge_requests_enabled, health_probe_mode, health_tcp_timeout_ms,
+                        health_deep_check_interval_seconds, health_check_targets,
+                        health_promote_after_successes, health_recover_after_successes,
+                        health_quarantine_strikes, health_client_report_strikes
                     ) VALUES (
-                        $1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14, $15, $16
+                        $1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14, $15, $16,
+                        $17, $18, $19, $20, $21, $22, $23, $24, $25, $26, $27, $28, $29, $30, $31, $32
                     )
                     ON CONFLICT (market, mode)
                     DO UPDATE SET
@@ -141,7 +170,23 @@ class PostgreSQLProxyPoolConfigRepository(IProxyPoolConfigRepository):
                         post_market_stop_minutes = EXCLUDED.post_market_stop_minutes,
                         backfill_enabled = EXCLUDED.backfill_enabled,
                         backfill_duration_hours = EXCLUDED.backfill_duration_hours,
-                        updated_at = EXCLUDED.updated_at
+                        updated_at = EXCLUDED.updated_at,
+                        selection_strategy = EXCLUDED.selection_strategy,
+                        max_in_flight_per_proxy = EXCLUDED.max_in_flight_per_proxy,
+                        lease_ttl_seconds = EXCLUDED.lease_ttl_seconds,
+                        expiry_safety_margin_seconds = EXCLUDED.expiry_safety_margin_seconds,
+                        overlap_window_seconds = EXCLUDED.overlap_window_seconds,
+                        warmup_seconds = EXCLUDED.warmup_seconds,
+                        backup_api_url = EXCLUDED.backup_api_url,
+                        hedge_requests_enabled = EXCLUDED.hedge_requests_enabled,
+                        health_probe_mode = EXCLUDED.health_probe_mode,
+                        health_tcp_timeout_ms = EXCLUDED.health_tcp_timeout_ms,
+                        health_deep_check_interval_seconds = EXCLUDED.health_deep_check_interval_seconds,
+                        health_check_targets = EXCLUDED.health_check_targets,
+                        health_promote_after_successes = EXCLUDED.health_promote_after_successes,
+                        health_recover_after_successes = EXCLUDED.health_recover_after_successes,
+                        health_quarantine_strikes = EXCLUDED.health_quarantine_strikes,
+                        health_client_report_strikes = EXCLUDED.health_client_report_strikes
                 """
 
                 await conn.execute(
@@ -162,6 +207,22 @@ class PostgreSQLProxyPoolConfigRepository(IProxyPoolConfigRepository):
                     config.backfill_duration_hours,
                     config.created_at,
                     config.updated_at,
+                    config.selection_strategy,
+                    config.max_in_flight_per_proxy,
+                    config.lease_ttl_seconds,
+                    config.expiry_safety_margin_seconds,
+                    config.overlap_window_seconds,
+                    config.warmup_seconds,
+                    config.backup_api_url,
+                    config.hedge_requests_enabled,
+                    config.health_probe_mode,
+                    config.health_tcp_timeout_ms,
+                    config.health_deep_check_interval_seconds,
+                    config.health_check_targets,
+                    config.health_promote_after_successes,
+                    config.health_recover_after_successes,
+                    config.health_quarantine_strikes,
+                    config.health_client_report_strikes,
                 )
 
                 self.logger.info(
@@ -233,7 +294,13 @@ class PostgreSQLProxyPoolConfigRepository(IProxyPoolConfigRepository):
                            proxy_lifetime_minutes, rotation_interval_minutes, low_watermark,
                            target_size, auto_start_enabled, pre_market_start_minutes,
                            post_market_stop_minutes, backfill_enabled, backfill_duration_hours,
-                           created_at, updated_at
+                           created_at, updated_at, selection_strategy,
+                           max_in_flight_per_proxy, lease_ttl_seconds, expiry_safety_margin_seconds,
+                           overlap_window_seconds, warmup_seconds, backup_api_url,
+                           hedge_requests_enabled, health_probe_mode, health_tcp_timeout_ms,
+                           health_deep_check_interval_seconds, health_check_targets,
+                           health_promote_after_successes, health_recover_after_successes,
+                           health_quarantine_strikes, health_client_report_strikes
                     FROM proxy_pool_config
                     WHERE hailiang_enabled = TRUE
                     ORDER BY market, mode
@@ -253,6 +320,22 @@ class PostgreSQLProxyPoolConfigRepository(IProxyPoolConfigRepository):
                         rotation_interval_minutes=row["rotation_interval_minutes"],
                         low_watermark=row["low_watermark"],
                         target_size=row["target_size"],
+                        selection_strategy=row["selection_strategy"],
+                        max_in_flight_per_proxy=row["max_in_flight_per_proxy"],
+                        lease_ttl_seconds=row["lease_ttl_seconds"],
+                        expiry_safety_margin_seconds=row["expiry_safety_margin_seconds"],
+                        overlap_window_seconds=row["overlap_window_seconds"],
+                        warmup_seconds=row["warmup_seconds"],
+                        backup_api_url=row["backup_api_url"],
+                        hedge_requests_enabled=row["hedge_requests_enabled"],
+                        health_probe_mode=row["health_probe_mode"],
+                        health_tcp_timeout_ms=row["health_tcp_timeout_ms"],
+                        health_deep_check_interval_seconds=row["health_deep_check_interval_seconds"],
+                        health_check_targets=row["health_check_targets"],
+                        health_promote_after_successes=row["health_promote_after_successes"],
+                        health_recover_after_successes=row["health_recover_after_successes"],
+                        health_quarantine_strikes=row["health_quarantine_strikes"],
+                        health_client_report_strikes=row["health_client_report_strikes"],
                         auto_start_enabled=row["auto_start_enabled"],
                         pre_market_start_minutes=row["pre_market_start_minutes"],
                         post_market_stop_minutes=row["post_market_stop_minutes"],
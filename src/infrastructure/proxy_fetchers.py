@@ -5,12 +5,107 @@ Infrastructure层 - 代理获取器实现
 from __future__ import annotations
 
 import asyncio
+import inspect
 import random
-from typing import List, Optional
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlsplit, urlunsplit
 
 import httpx
+import orjson
 from saturn_mousehunter_shared import get_logger, retry
 from domain.entities import IProxyFetcher
+from .circuit_breaker import CircuitBreaker
+
+
+class ProviderClientPool:
+    """
+    供应商HTTP客户端池
+    - 同一供应商主机的所有获取器共享一个长连接 httpx 客户端（keep-alive、有界连接池）
+    - 引用计数管理生命周期，最后一个使用方释放时关闭客户端
+    - 超时和连接池参数以该主机首个使用方的配置为准
+    """
+
+    def __init__(self):
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._refs: Dict[str, int] = {}
+
+    @staticmethod
+    def provider_host(url: str) -> str:
+        """提取供应商主机标识 scheme://host:port"""
+        parts = urlsplit(url.strip())
+        return f"{parts.scheme}://{parts.netloc}"
+
+    def acquire(
+        self,
+        url: str,
+        timeout: float = 10.0,
+        connect_timeout: float = 5.0,
+        max_connections: int = 10,
+        max_keepalive_connections: int = 5,
+        keepalive_expiry: float = 30.0,
+    ) -> httpx.AsyncClient:
+        """获取供应商共享客户端，引用计数加一"""
+        host = self.provider_host(url)
+        client = self._clients.get(host)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                timeout=httpx.Timeout(timeout, connect=connect_timeout),
+                limits=httpx.Limits(
+                    max_connections=max_connections,
+                    max_keepalive_connections=max_keepalive_connections,
+                    keepalive_expiry=keepalive_expiry,
+                ),
+                follow_redirects=True,
+            )
+            self._clients[host] = client
+            self._refs[host] = 0
+        self._refs[host] += 1
+        return client
+
+    async def release(self, url: str) -> None:
+        """释放共享客户端，引用归零时关闭连接"""
+        host = self.provider_host(url)
+        refs = self._refs.get(host, 0) - 1
+        if refs > 0:
+            self._refs[host] = refs
+            return
+
+        self._refs.pop(host, None)
+        client = self._clients.pop(host, None)
+        if client is not None:
+            await client.aclose()
+
+
+# 进程内所有市场/模式共享
+provider_clients = ProviderClientPool()
+
+# 供应商熔断器：按供应商账号共享，同一账号的限流对所有市场/模式生效
+_provider_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def get_provider_breaker(url: str, account: str = "") -> CircuitBreaker:
+    """获取供应商熔断器
+
+    Args:
+        account: 供应商账号标识，同一主机下不同账号独立熔断
+    """
+    key = ProviderClientPool.provider_host(url)
+    if account:
+        key = f"{key}/{account}"
+    breaker = _provider_breakers.get(key)
+    if breaker is None:
+        breaker = CircuitBreaker(key)
+        _provider_breakers[key] = breaker
+    return breaker
+
+
+def _retry_after_seconds(response: httpx.Response) -> Optional[float]:
+    """解析 Retry-After 响应头（秒数形式）"""
+    value = response.headers.get("Retry-After", "").strip()
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
 
 
 class MockProxyFetcher(IProxyFetcher):
@@ -51,26 +146,104 @@ class MockProxyFetcher(IProxyFetcher):
 
 
 class HailiangProxyFetcher(IProxyFetcher):
-    """海量代理IP获取器"""
-
-    def __init__(self, api_url: str, market: str = "HK"):
+    """海量代理IP获取器（复用供应商共享长连接客户端）"""
+
+    def __init__(
+        self,
+        api_url: str,
+        market: str = "HK",
+        timeout: float = 10.0,
+        connect_timeout: float = 5.0,
+        max_connections: int = 10,
+    ):
         self.api_url = api_url
         self.market = market
         self.logger = get_logger(f"hailiang_proxy_fetcher.{market}")
+        self._client: Optional[httpx.AsyncClient] = provider_clients.acquire(
+            api_url,
+            timeout=timeout,
+            connect_timeout=connect_timeout,
+            max_connections=max_connections,
+        )
+        query = parse_qs(urlsplit(api_url.strip()).query)
+        # 海量代理按订单号限流
+        order_id = query.get("orderId", [""])[0]
+        self._breaker = get_provider_breaker(api_url, order_id)
+        # URL 中配置的单次提取数量，按需获取时不超过该值
+        num = query.get("num", [""])[0]
+        self.max_count: Optional[int] = int(num) if num.isdigit() else None
+
+    def _url_for(self, count: int) -> str:
+        """把URL中的 num 参数改为本次需要的数量，其余参数原样保留；未配置 num 时不改动"""
+        if self.max_count is None or count >= self.max_count:
+            return self.api_url
+        parts = urlsplit(self.api_url.strip())
+        params = [
+            f"num={count}" if param.split("=", 1)[0] == "num" else param
+            for param in parts.query.split("&")
+        ]
+        return urlunsplit(parts._replace(query="&".join(params)))
 
     async def fetch_proxies(self, count: int = 20) -> List[str]:
-        """获取海量代理IP"""
-        return await fetch_hailiang_proxy_ip(self.api_url, self.logger)
+        """获取海量代理IP，只请求 count 个（不超过URL配置的 num），熔断期间直接返回空列表"""
+        if count <= 0:
+            return []
+        return await fetch_hailiang_proxy_ip(
+            self._url_for(count), self.logger, client=self._client, breaker=self._breaker
+        )
+
+    def provider_stats(self) -> Dict[str, Dict]:
+        """供应商熔断状态"""
+        return {self._breaker.name: self._breaker.snapshot()}
+
+    async def close(self) -> None:
+        """释放共享客户端"""
+        if self._client is not None:
+            self._client = None
+            await provider_clients.release(self.api_url)
 
 
 class ExternalProxyFetcher(IProxyFetcher):
-    """外部代理获取器包装器"""
+    """
+    外部代理获取器包装器
+    - 指定 provider_url 且获取函数接受 client 参数时，传入该供应商的共享长连接客户端
+    """
 
-    def __init__(self, fetch_func=None, market: str = "hk"):
+    def __init__(
+        self,
+        fetch_func=None,
+        market: str = "hk",
+        provider_url: Optional[str] = None,
+        timeout: float = 10.0,
+        connect_timeout: float = 5.0,
+        max_connections: int = 10,
+    ):
         self.fetch_func = fetch_func
         self.market = market
+        self.provider_url = provider_url
         self.logger = get_logger(f"external_proxy_fetcher.{market}")
         self._fallback = MockProxyFetcher(market)
+        self._client: Optional[httpx.AsyncClient] = None
+        self._breaker = get_provider_breaker(provider_url) if provider_url else None
+        if provider_url and fetch_func and "client" in inspect.signature(fetch_func).parameters:
+            self._client = provider_clients.acquire(
+                provider_url,
+                timeout=timeout,
+                connect_timeout=connect_timeout,
+                max_connections=max_connections,
+            )
+
+    async def close(self) -> None:
+        """释放共享客户端"""
+        if self._client is not None:
+            self._client = None
+            await provider_clients.release(self.provider_url)
+
+    def provider_stats(self) -> Dict[str, Dict]:
+        """供应商熔断状态"""
+        if self._breaker is None:
+            return {}
+        return {self._breaker.name: self._breaker.snapshot()}
 
     @retry(times=2, delay=0.5)
     async def fetch_proxies(self, count: int = 20) -> List[str]:
@@ -79,45 +252,76 @@ class ExternalProxyFetcher(IProxyFetcher):
             self.logger.warning("No external fetch function configured, using fallback")
             return await self._fallback.fetch_proxies(count)
 
+        # 熔断期间不调用外部函数，也不回退到模拟代理
+        if self._breaker is not None and not self._breaker.allow_request():
+            return []
+
         try:
             # 调用外部代理获取函数
+            kwargs = {"client": self._client} if self._client is not None else {}
             if asyncio.iscoroutinefunction(self.fetch_func):
-                result = await self.fetch_func()
+                result = await self.fetch_func(**kwargs)
             else:
-                result = self.fetch_func()
+                result = self.fetch_func(**kwargs)
 
             if isinstance(result, list):
+                if self._breaker is not None:
+                    self._breaker.record_success()
                 proxies = result[:count]
                 self.logger.info(f"Fetched {len(proxies)} proxies from external source")
                 return proxies
             elif isinstance(result, str):
                 if result == "LIMIT_TOO_MANY_UNUSED":
                     self.logger.warning("External API rate limited")
+                    if self._breaker is not None:
+                        self._breaker.record_failure(rate_limited=True, error=result)
                     return []
+                if self._breaker is not None:
+                    self._breaker.record_success()
                 self.logger.info("Fetched 1 proxy from external source")
                 return [result]
             else:
                 self.logger.warning(
                     "External fetch returned invalid data, using fallback"
                 )
+                if self._breaker is not None:
+                    self._breaker.record_failure(error=f"invalid data: {type(result).__name__}")
                 return await self._fallback.fetch_proxies(count)
 
         except Exception as e:
+            if self._breaker is not None:
+                self._breaker.record_failure(error=str(e))
             self.logger.error(f"External proxy fetch failed: {e}, using fallback")
             return await self._fallback.fetch_proxies(count)
+        except BaseException:
+            # 请求被取消（停止服务、对冲请求落败）：释放半开探测名额，避免熔断器卡死
+            if self._breaker is not None:
+                self._breaker.release()
+            raise
+
+
+# 海量代理风控限流提示，直接在原始响应字节中匹配
+HAILIANG_RATE_LIMIT_MARKER = "未使用的IP太多".encode()
 
 
-async def fetch_hailiang_proxy_ip(url: str, logger: Optional = None) -> List[str]:
+async def fetch_hailiang_proxy_ip(
+    url: str,
+    logger: Optional = None,
+    client: Optional[httpx.AsyncClient] = None,
+    breaker: Optional[CircuitBreaker] = None,
+) -> List[str]:
     """
     获取海量代理IP的静态函数
 
     Args:
         url: 海量代理API URL
         logger: 日志记录器，如果为None则创建默认的
+        client: 共享长连接客户端，为None时使用一次性客户端
+        breaker: 供应商熔断器，打开期间不发请求；请求结果计入熔断统计
 
     Returns:
         代理IP列表，格式为 ["ip:port", ...]
-        如果遇到限流返回空列表
+        如果遇到限流或熔断返回空列表
     """
     if logger is None:
         logger = get_logger("hailiang_proxy_ip")
@@ -135,65 +339,98 @@ async def fetch_hailiang_proxy_ip(url: str, logger: Optional = None) -> List[str
         logger.warning(f"原始URL repr: {repr(url)}")
         logger.warning(f"清理后URL: {clean_url[:100]}...")
 
+    if breaker is not None and not breaker.allow_request():
+        logger.debug(f"海量代理API熔断中，跳过请求: {breaker.name}")
+        return []
+
+    def record_failure(**kwargs) -> None:
+        if breaker is not None:
+            breaker.record_failure(**kwargs)
+
     logger.debug(f"请求海量代理API: {clean_url[:100]}...")  # 只显示URL前100个字符
 
     try:
-        async with httpx.AsyncClient(timeout=10.0, follow_redirects=True) as client:
+        if client is not None:
             response = await client.get(clean_url)
-
-            if response.status_code == 200:
-                try:
-                    content_type = response.headers.get("Content-Type", "")
-                    if (
-                        "application/json" in content_type
-                        or response.text.strip().startswith("{")
-                    ):
-                        data = response.json()
-                    else:
-                        if "未使用的IP太多" in response.text:
-                            logger.warning("海量代理API风控限流，主维护池需要休眠！")
-                            return []
-                        logger.error(
-                            f"海量代理API返回非JSON内容: {response.text[:200]}"
-                        )
-                        return []
-                except Exception as e:
-                    if "未使用的IP太多" in response.text:
-                        logger.warning("海量代理API风控限流，主维护池需要休眠！")
-                        return []
-                    logger.error(f"JSON解析失败: {e}, 原始内容: {response.text[:300]}")
-                    return []
-
-                if data.get("code") == 0 and isinstance(data.get("data"), list):
+        else:
+            async with httpx.AsyncClient(timeout=10.0, follow_redirects=True) as oneoff:
+                response = await oneoff.get(clean_url)
+
+        if response.status_code == 200:
+            # 响应体只解码一次：orjson 直接解析字节，成功路径不再扫描文本
+            body = response.content
+            data = parse_error = None
+            try:
+                data = orjson.loads(body)
+            except orjson.JSONDecodeError as e:
+                parse_error = e
+
+            if isinstance(data, dict) and data.get("code") == 0:
+                items = data.get("data")
+                if isinstance(items, list):
                     proxies = [
                         f"{item['ip']}:{item['port']}"
-                        for item in data["data"]
+                        for item in items
                         if "ip" in item and "port" in item
                     ]
                     logger.info(f"成功获取海量代理 {len(proxies)} 个")
+                    if breaker is not None:
+                        breaker.record_success()
                     return proxies
-                else:
-                    # 使用 repr() 来安全地记录包含特殊字符的数据
-                    logger.warning("海量代理API返回异常内容", response_data=data)
-            else:
-                # 增强重定向和状态码处理
-                logger.warning(
-                    f"fetch_hailiang_proxy_ip 状态码异常: {response.status_code}, URL: {response.url}"
+
+            if HAILIANG_RATE_LIMIT_MARKER in body:
+                logger.warning("海量代理API风控限流，主维护池需要休眠！")
+                record_failure(
+                    rate_limited=True,
+                    retry_after=_retry_after_seconds(response),
+                    error="rate limited",
                 )
-                if hasattr(response, 'history') and response.history:
-                    logger.info(f"发生了 {len(response.history)} 次重定向")
-                    for i, resp in enumerate(response.history):
-                        logger.info(f"重定向 {i+1}: {resp.status_code} -> {resp.headers.get('location', 'N/A')}")
+                return []
 
-                # 对于302等重定向状态码，尝试输出响应内容以便调试
-                if response.status_code in [301, 302, 303, 307, 308]:
-                    logger.debug(f"重定向响应内容: {response.text[:200]}")
-                elif response.text:
-                    logger.debug(f"响应内容: {response.text[:200]}")
+            if data is None:
+                logger.error(
+                    f"海量代理API返回非JSON内容: {parse_error}, "
+                    f"原始内容: {body[:300].decode('utf-8', errors='replace')}"
+                )
+                record_failure(error="non-JSON response")
+                return []
+
+            logger.warning("海量代理API返回异常内容", response_data=data)
+            record_failure(error=f"code={data.get('code') if isinstance(data, dict) else None}")
+        elif response.status_code == 429:
+            logger.warning("海量代理API返回429，按限流处理")
+            record_failure(
+                rate_limited=True,
+                retry_after=_retry_after_seconds(response),
+                error="HTTP 429",
+            )
+        else:
+            record_failure(error=f"HTTP {response.status_code}")
+            # 增强重定向和状态码处理
+            logger.warning(
+                f"fetch_hailiang_proxy_ip 状态码异常: {response.status_code}, URL: {response.url}"
+            )
+            if hasattr(response, 'history') and response.history:
+                logger.info(f"发生了 {len(response.history)} 次重定向")
+                for i, resp in enumerate(response.history):
+                    logger.info(f"重定向 {i+1}: {resp.status_code} -> {resp.headers.get('location', 'N/A')}")
+
+            # 对于302等重定向状态码，尝试输出响应内容以便调试
+            if response.status_code in [301, 302, 303, 307, 308]:
+                logger.debug(f"重定向响应内容: {response.text[:200]}")
+            elif response.text:
+                logger.debug(f"响应内容: {response.text[:200]}")
 
     except httpx.RequestError as e:
         logger.error(f"请求海量代理API异常: {e}")
+        record_failure(error=str(e))
     except Exception as e:
         logger.error(f"未知异常: {e}")
+        record_failure(error=str(e))
+    except BaseException:
+        # 请求被取消（停止服务、对冲请求落败）：释放半开探测名额，避免熔断器卡死
+        if breaker is not None:
+            breaker.release()
+        raise
 
     return []
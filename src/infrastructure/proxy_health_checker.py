@@ -5,36 +5,272 @@ Infrastructure层 - 代理健康检查服务
 from __future__ import annotations
 
 import asyncio
+import enum
+import heapq
+import ssl
 import time
+from collections import OrderedDict
 from dataclasses import dataclass
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterator, List, Optional, Sequence, Set, Tuple
 from datetime import datetime
 
+import certifi
 import httpx
 from saturn_mousehunter_shared import get_logger, measure, retry
-from domain.entities import Proxy, ProxyStatus
+from domain.entities import FailureKind, HealthTransitionPolicy, Proxy, ProxyHealthState
+from .adaptive_concurrency import GLOBAL_PROBE_CEILING, AIMDConcurrencyLimiter
+from .circuit_breaker import CircuitBreaker, CircuitState
 
 
-@dataclass
+class ProbeOutcome(str, enum.Enum):
+    """单次探测的结论"""
+
+    PASS = "pass"
+    FAIL = "fail"
+    INCONCLUSIVE = "inconclusive"  # 测试端点全部不可用，仅确认端口可达，无法判断好坏
+
+
+@dataclass(slots=True)
 class ProxyHealthStats:
-    """代理健康检查统计"""
+    """代理健康检查统计，时间为 time.monotonic() 时间戳，仅供进程内比较"""
 
     proxy_addr: str
-    is_healthy: bool
+    is_healthy: bool  # 代理未被隔离且最近一次探测通过
     response_time_ms: Optional[float] = None
     status_code: Optional[int] = None
     error_message: Optional[str] = None
-    last_check_time: Optional[datetime] = None
+    last_check_ts: Optional[float] = None
     consecutive_failures: int = 0
     consecutive_successes: int = 0
     total_checks: int = 0
-    success_rate: float = 0.0
+    success_rate: float = 0.0  # 滑动窗口内的成功率（%）
+    last_deep_check_ts: Optional[float] = None  # 最近一次HTTP深度验证时间
+    latency_ewma_ms: Optional[float] = None  # 探测延迟EWMA
+    window_bits: int = 0  # 最近 window_len 次结果的位图，最低位为最近一次，1 表示成功
+    window_len: int = 0
+    last_outcome: Optional[ProbeOutcome] = None  # 最近一次探测的结论
+
+    def record_window(self, success: bool, window_size: int) -> None:
+        """结果计入滑动窗口并更新成功率"""
+        self.window_bits = ((self.window_bits << 1) | success) & ((1 << window_size) - 1)
+        self.window_len = min(self.window_len + 1, window_size)
+        self.success_rate = self.window_bits.bit_count() / self.window_len * 100
+
+    def record_latency(self, latency_ms: float, alpha: float = 0.3) -> None:
+        """记录一次探测延迟，更新EWMA"""
+        self.response_time_ms = latency_ms
+        if self.latency_ewma_ms is None:
+            self.latency_ewma_ms = latency_ms
+        else:
+            self.latency_ewma_ms += alpha * (latency_ms - self.latency_ewma_ms)
+
+
+class ProbeClientPool:
+    """
+    健康检查客户端池
+    - 每个代理一个长期复用的 httpx 客户端，避免每次检查重建客户端和连接
+    - 所有客户端共享同一个 SSLContext，证书只加载一次
+    - 按最近使用排序，空闲超时或超出容量的客户端在 prune 时关闭
+    """
+
+    def __init__(
+        self,
+        timeout: float = 10.0,
+        max_clients: int = 2000,
+        idle_ttl_sec: float = 900.0,
+    ):
+        self.timeout = timeout
+        self.max_clients = max_clients
+        self.idle_ttl_sec = idle_ttl_sec
+        self._ssl_context = ssl.create_default_context(cafile=certifi.where())
+        # proxy_addr -> (客户端, 最近使用时间)
+        self._clients: OrderedDict[str, Tuple[httpx.AsyncClient, float]] = OrderedDict()
+
+    def get(self, proxy: Proxy) -> httpx.AsyncClient:
+        """获取代理的复用客户端，不存在时创建"""
+        entry = self._clients.pop(proxy.addr, None)
+        if entry is None or entry[0].is_closed:
+            client = httpx.AsyncClient(
+                proxy=proxy.url,
+                timeout=self.timeout,
+                verify=self._ssl_context,
+                follow_redirects=True,
+                limits=httpx.Limits(max_connections=2, max_keepalive_connections=1),
+            )
+        else:
+            client = entry[0]
+        self._clients[proxy.addr] = (client, time.time())
+        return client
+
+    async def discard(self, proxy_addr: str) -> None:
+        """关闭指定代理的客户端"""
+        entry = self._clients.pop(proxy_addr, None)
+        if entry is not None:
+            await entry[0].aclose()
+
+    async def prune(self) -> None:
+        """关闭空闲超时和超出容量的客户端"""
+        deadline = time.time() - self.idle_ttl_sec
+        stale: List[httpx.AsyncClient] = []
+        while self._clients:
+            addr, (client, last_used) = next(iter(self._clients.items()))
+            if last_used > deadline and len(self._clients) <= self.max_clients:
+                break
+            del self._clients[addr]
+            stale.append(client)
+        for client in stale:
+            await client.aclose()
+
+    async def aclose(self) -> None:
+        """关闭全部客户端"""
+        clients = [client for client, _ in self._clients.values()]
+        self._clients.clear()
+        for client in clients:
+            await client.aclose()
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+
+class HealthStatsStore:
+    """
+    有界健康统计存储
+    - 条目过期时间跟随代理绑定到期时间（加宽限期），代理到期出池后统计随之过期
+    - 到期时间入最小堆，过期清理均摊 O(log n)
+    - 按最近访问排序，超出容量时淘汰最久未访问的条目
+    - 维护池级聚合（健康数、延迟EWMA之和、窗口成功数），条目变化时增量更新，摘要 O(1)
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 5000,
+        default_ttl_sec: float = 900.0,
+        grace_sec: float = 60.0,
+    ):
+        self.max_entries = max_entries
+        self.default_ttl_sec = default_ttl_sec
+        self.grace_sec = grace_sec
+        # proxy_addr -> (统计, 过期时间戳)
+        self._entries: OrderedDict[str, Tuple[ProxyHealthStats, float]] = OrderedDict()
+        # (过期时间戳, proxy_addr)，条目过期时间变化后旧堆项惰性丢弃
+        self._expiry_heap: List[Tuple[float, str]] = []
+
+        # 池级聚合：每个条目当前状态的贡献之和
+        self.healthy_count = 0
+        self.latency_sum = 0.0
+        self.latency_count = 0
+        self.window_checks = 0
+        self.window_successes = 0
+
+    def untrack(self, stats: ProxyHealthStats) -> None:
+        """修改统计前从聚合中移除其贡献，已不在存储中的统计忽略"""
+        if self._holds(stats):
+            self._apply(stats, -1)
+
+    def track(self, stats: ProxyHealthStats) -> None:
+        """修改统计后把其贡献计入聚合，已不在存储中的统计忽略"""
+        if self._holds(stats):
+            self._apply(stats, 1)
+
+    def _holds(self, stats: ProxyHealthStats) -> bool:
+        entry = self._entries.get(stats.proxy_addr)
+        return entry is not None and entry[0] is stats
+
+    def _apply(self, stats: ProxyHealthStats, sign: int) -> None:
+        if stats.is_healthy:
+            self.healthy_count += sign
+            if stats.latency_ewma_ms is not None:
+                self.latency_sum += sign * stats.latency_ewma_ms
+                self.latency_count += sign
+        self.window_checks += sign * stats.window_len
+        self.window_successes += sign * stats.window_bits.bit_count()
+        if not self.latency_count:
+            # 消除浮点累计误差
+            self.latency_sum = 0.0
+
+    def _remove(self, proxy_addr: str) -> None:
+        entry = self._entries.pop(proxy_addr, None)
+        if entry is not None:
+            self._apply(entry[0], -1)
+
+    def _expiry_of(self, proxy: Proxy) -> float:
+        """代理统计的过期时间：有绑定到期时间的按到期时间，否则滑动TTL"""
+        if proxy.expires_ts is not None:
+            return proxy.expires_ts + self.grace_sec
+        return time.time() + self.default_ttl_sec
+
+    def get(self, proxy_addr: str) -> Optional[ProxyHealthStats]:
+        """获取未过期的统计"""
+        entry = self._entries.get(proxy_addr)
+        if entry is None:
+            return None
+        if entry[1] <= time.time():
+            self._remove(proxy_addr)
+            return None
+        self._entries.move_to_end(proxy_addr)
+        return entry[0]
+
+    def get_or_create(self, proxy: Proxy) -> ProxyHealthStats:
+        """获取代理的统计，不存在时创建，并按代理到期时间续期"""
+        stats = self.get(proxy.addr)
+        created = stats is None
+        if created:
+            stats = ProxyHealthStats(proxy_addr=proxy.addr, is_healthy=False)
+        expires_ts = self._expiry_of(proxy)
+        entry = self._entries.get(proxy.addr)
+        if entry is None or entry[1] != expires_ts:
+            heapq.heappush(self._expiry_heap, (expires_ts, proxy.addr))
+        self._entries[proxy.addr] = (stats, expires_ts)
+        self._entries.move_to_end(proxy.addr)
+        if created:
+            self._apply(stats, 1)
+        while len(self._entries) > self.max_entries:
+            _, (evicted, _) = self._entries.popitem(last=False)
+            self._apply(evicted, -1)
+        return stats
+
+    def discard(self, proxy_addr: str) -> None:
+        """删除指定代理的统计"""
+        self._remove(proxy_addr)
+
+    def prune(self) -> None:
+        """清理已过期的条目"""
+        now = time.time()
+        while self._expiry_heap and self._expiry_heap[0][0] <= now:
+            expires_ts, addr = heapq.heappop(self._expiry_heap)
+            entry = self._entries.get(addr)
+            if entry is not None and entry[1] == expires_ts:
+                self._remove(addr)
+        # 容量淘汰和续期留下的堆项过多时重建
+        if len(self._expiry_heap) > 2 * self.max_entries:
+            self._expiry_heap = [(ts, addr) for addr, (_, ts) in self._entries.items()]
+            heapq.heapify(self._expiry_heap)
+
+    def values(self) -> Iterator[ProxyHealthStats]:
+        for stats, _ in self._entries.values():
+            yield stats
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._expiry_heap.clear()
+        self.healthy_count = self.latency_count = 0
+        self.window_checks = self.window_successes = 0
+        self.latency_sum = 0.0
+
+    def __len__(self) -> int:
+        return len(self._entries)
 
 
 class ProxyHealthChecker:
-    """代理健康检查器"""
+    """代理健康检查器
+
+    HTTP深度验证在测试端点之间轮转，每个端点一个熔断器：
+    端点返回429时换下一个端点重试，不算代理失败；同一端点被多个不同代理报告限流后才熔断，
+    避免少数坏代理自己返回的错误状态打开全部端点。
+    端点全部不可用时降级为TCP存活探测，结果只能排除连不上的代理，不推动状态迁移。
+    """
 
-    # 可靠的测试端点列表 - 返回简单响应的网站
+    # 默认测试端点列表 - 返回简单响应的网站，未配置 targets 时使用
     TEST_ENDPOINTS = [
         "http://httpbin.org/ip",  # 返回JSON格式的IP信息
         "http://icanhazip.com",   # 返回纯文本IP
@@ -42,139 +278,333 @@ class ProxyHealthChecker:
         "http://api.ipify.org",   # 返回纯文本IP
     ]
 
-    def __init__(self, market: str = "HK"):
+    # 探测模式：http 每次完整HTTP请求；tcp 仅TCP连接；tiered 先TCP，按需HTTP深度验证
+    PROBE_MODES = ("http", "tcp", "tiered")
+
+    # 说明测试端点自身限流的状态码；503 多由失效的上游代理自身返回，计入代理失败
+    TARGET_THROTTLE_STATUSES = (429,)
+
+    # 端点被至少这么多个不同代理报告限流（自上次成功以来）才熔断
+    TARGET_TRIP_MIN_PROXIES = 3
+
+    # 说明代理IP被目标封禁或代理鉴权失败的状态码
+    BLOCKED_STATUSES = (401, 403, 407)
+
+    def __init__(
+        self,
+        market: str = "HK",
+        probe_mode: str = "http",
+        tcp_timeout: float = 1.5,
+        deep_check_interval_sec: float = 600.0,
+        targets: Optional[Sequence[str]] = None,
+        initial_concurrency: int = 10,
+        max_concurrency: int = GLOBAL_PROBE_CEILING,
+        max_tracked_proxies: int = 5000,
+        stats_window_size: int = 20,
+        health_policy: Optional[HealthTransitionPolicy] = None,
+    ):
+        if probe_mode not in self.PROBE_MODES:
+            raise ValueError(
+                f"Unknown probe mode: {probe_mode}, available: {', '.join(self.PROBE_MODES)}"
+            )
+
         self.market = market.lower()
         self.logger = get_logger(f"proxy_health_checker.{market}")
 
         # 健康检查配置
+        self.probe_mode = probe_mode
+        self.tcp_timeout = tcp_timeout  # TCP探测超时时间
+        self.deep_check_interval_sec = deep_check_interval_sec  # tiered模式HTTP深度验证间隔
         self.check_timeout = 10.0  # 检查超时时间
         self.max_retries = 2       # 最大重试次数
-        self.failure_threshold = 3  # 连续失败阈值
-        self.success_threshold = 2  # 连续成功阈值
+        self.health_policy = health_policy or HealthTransitionPolicy()  # 健康状态迁移参数
+        self.stats_window_size = stats_window_size  # 成功率滑动窗口（次数）
+
+        # 测试端点及其熔断器
+        self.targets: List[str] = list(targets) if targets else list(self.TEST_ENDPOINTS)
+        self._target_breakers: Dict[str, CircuitBreaker] = {
+            url: CircuitBreaker(f"health_target.{self.market}.{idx}")
+            for idx, url in enumerate(self.targets)
+        }
+        self._target_cursor = 0
+        # 端点 -> 自上次成功以来报告其限流的代理地址
+        self._target_throttled_by: Dict[str, Set[str]] = {url: set() for url in self.targets}
+
+        # 探测并发：按超时率和延迟自适应调整，批量检查和入池探测共用
+        self.concurrency = AIMDConcurrencyLimiter(
+            f"health.{self.market}",
+            initial_limit=initial_concurrency,
+            max_limit=max_concurrency,
+        )
+
+        # 每个代理的复用客户端
+        self._clients = ProbeClientPool(timeout=self.check_timeout)
 
         # 统计数据
-        self.health_stats: Dict[str, ProxyHealthStats] = {}
+        self.health_stats = HealthStatsStore(max_entries=max_tracked_proxies)
         self._check_count = 0
-        self._last_check_time: Optional[datetime] = None
+        self._last_check_ts: Optional[float] = None
+        self._tcp_probes = 0
+        self._http_probes = 0
+        self._tcp_rejections = 0
+        self._inconclusive_checks = 0
 
     @measure("proxy_health_check_duration", ("market",))
     @retry(times=2, delay=0.5)
     async def check_proxy_health(self, proxy: Proxy) -> ProxyHealthStats:
-        """检查单个代理的健康状态"""
-        start_time = time.time()
-        stats = self.health_stats.get(proxy.addr)
-
-        if not stats:
-            stats = ProxyHealthStats(
-                proxy_addr=proxy.addr,
-                is_healthy=False
-            )
-            self.health_stats[proxy.addr] = stats
+        """检查单个代理的健康状态
+
+        tcp/tiered 模式先做TCP连接探测，连不上直接记为失败；
+        tiered 模式下TCP通过且无需深度验证的代理不再发起HTTP请求。
+        每次检查只向并发控制器记录一个样本。
+        """
+        stats = self.health_stats.get_or_create(proxy)
+
+        if self.probe_mode in ("tcp", "tiered"):
+            alive, elapsed_ms, error, failure_kind = await self._tcp_probe(proxy)
+            if not alive:
+                self.concurrency.record(None, timed_out=failure_kind == FailureKind.TIMEOUT)
+                self._tcp_rejections += 1
+                # 未完成HTTP往返，不计入延迟
+                self._record_result(
+                    proxy, stats, False, elapsed_ms, None, error,
+                    record_latency=False, failure_kind=failure_kind,
+                )
+                return stats
+            if self.probe_mode == "tcp" or not self._deep_check_due(proxy, stats):
+                # tiered 模式下TCP预检耗时不代表HTTP探测延迟，不计入并发控制的延迟基线
+                self.concurrency.record(elapsed_ms if self.probe_mode == "tcp" else None)
+                # 仅存活探测：维持上次深度验证的结论，不计入延迟
+                self._record_result(
+                    proxy, stats, True, elapsed_ms, stats.status_code, None,
+                    record_latency=False,
+                )
+                return stats
 
-        # 选择测试端点
-        test_url = self.TEST_ENDPOINTS[0]  # 默认使用httpbin
+        latency_ms, timed_out = await self._http_probe(proxy, stats)
+        self.concurrency.record(latency_ms, timed_out=timed_out)
+        return stats
 
+    def _deep_check_due(self, proxy: Proxy, stats: ProxyHealthStats) -> bool:
+        """是否需要HTTP深度验证：从未验证、尚未进入 healthy 状态或距上次验证超过间隔"""
+        if stats.last_deep_check_ts is None or not proxy.is_preferred():
+            return True
+        age = time.monotonic() - stats.last_deep_check_ts
+        return age >= self.deep_check_interval_sec
+
+    async def _tcp_probe(
+        self, proxy: Proxy
+    ) -> Tuple[bool, float, Optional[str], Optional[FailureKind]]:
+        """TCP连接探测：只建立并关闭连接
+
+        Returns:
+            (是否连通, 耗时毫秒, 错误信息, 失败类型)
+        """
+        self._tcp_probes += 1
+        start_time = time.monotonic()
         try:
-            # 配置代理
-            proxy_config = {
-                "http://": f"http://{proxy.addr}",
-                "https://": f"http://{proxy.addr}",
-            }
-
-            async with httpx.AsyncClient(
-                proxies=proxy_config,
-                timeout=self.check_timeout,
-                follow_redirects=True
-            ) as client:
-
+            _, writer = await asyncio.wait_for(
+                asyncio.open_connection(proxy.host, proxy.port), timeout=self.tcp_timeout
+            )
+            writer.close()
+            elapsed_ms = (time.monotonic() - start_time) * 1000
+            return True, elapsed_ms, None, None
+        except asyncio.TimeoutError:
+            elapsed_ms = (time.monotonic() - start_time) * 1000
+            return False, elapsed_ms, "TCP connect timeout", FailureKind.TIMEOUT
+        except OSError as e:
+            elapsed_ms = (time.monotonic() - start_time) * 1000
+            return False, elapsed_ms, f"TCP connect failed: {e}", FailureKind.CONNECT_ERROR
+
+    def _next_target(self, tried: List[str]) -> Optional[str]:
+        """轮转选择下一个未熔断且本轮未试过的测试端点"""
+        for _ in range(len(self.targets)):
+            url = self.targets[self._target_cursor]
+            self._target_cursor = (self._target_cursor + 1) % len(self.targets)
+            if url not in tried and self._target_breakers[url].allow_request():
+                return url
+        return None
+
+    async def _http_probe(
+        self, proxy: Proxy, stats: ProxyHealthStats
+    ) -> Tuple[Optional[float], bool]:
+        """HTTP深度验证：经代理请求测试端点
+
+        Returns:
+            (最后一次完成的HTTP往返耗时毫秒, 是否超时)，供并发控制记录一个样本
+        """
+        self._http_probes += 1
+        client = self._clients.get(proxy)
+        tried: List[str] = []
+        last_latency_ms: Optional[float] = None
+
+        while True:
+            test_url = self._next_target(tried)
+            if test_url is None:
+                timed_out = await self._tcp_fallback(proxy, stats)
+                return last_latency_ms, timed_out
+            tried.append(test_url)
+            breaker = self._target_breakers[test_url]
+
+            start_time = time.monotonic()
+            try:
                 response = await client.get(test_url)
-                response_time = (time.time() - start_time) * 1000  # 转换为毫秒
-
-                # 判断响应是否成功
-                is_success = 200 <= response.status_code < 300
-
-                # 更新统计信息
-                stats.response_time_ms = response_time
-                stats.status_code = response.status_code
-                stats.error_message = None
-                stats.last_check_time = datetime.now()
-                stats.total_checks += 1
-
-                if is_success:
-                    stats.consecutive_successes += 1
-                    stats.consecutive_failures = 0
-                    stats.is_healthy = True
-
-                    # 更新代理状态
-                    if proxy.status != ProxyStatus.ACTIVE:
-                        proxy.status = ProxyStatus.ACTIVE
-                        self.logger.info(f"Proxy {proxy.addr} recovered - response time: {response_time:.1f}ms")
-                else:
-                    stats.consecutive_failures += 1
-                    stats.consecutive_successes = 0
-                    stats.error_message = f"HTTP {response.status_code}"
-
-                    # 连续失败超过阈值则标记为不健康
-                    if stats.consecutive_failures >= self.failure_threshold:
-                        stats.is_healthy = False
-                        proxy.mark_failure()
-                        self.logger.warning(f"Proxy {proxy.addr} marked as unhealthy - {stats.consecutive_failures} consecutive failures")
-
-                # 计算成功率
-                stats.success_rate = (stats.total_checks - stats.consecutive_failures) / stats.total_checks * 100
-
-                self.logger.debug(
-                    f"Health check for {proxy.addr}: "
-                    f"status={response.status_code}, "
-                    f"time={response_time:.1f}ms, "
-                    f"healthy={stats.is_healthy}"
+            except Exception as e:
+                timed_out = isinstance(e, httpx.TimeoutException)
+                # 连接类异常归因于代理，不计入端点熔断
+                breaker.release()
+                # 请求未完成，耗时不代表代理延迟：按检查超时计入罚分，选择时自然降权
+                stats.last_deep_check_ts = time.monotonic()
+                self._record_result(
+                    proxy, stats, False, self.check_timeout * 1000, None, str(e),
+                    failure_kind=FailureKind.TIMEOUT if timed_out else FailureKind.CONNECT_ERROR,
                 )
+                return None, timed_out
+            except BaseException:
+                # 探测被取消：释放端点的半开探测名额
+                breaker.release()
+                raise
+
+            response_time = (time.monotonic() - start_time) * 1000  # 转换为毫秒
+            last_latency_ms = response_time
+            if response.status_code in self.TARGET_THROTTLE_STATUSES:
+                self._record_target_throttle(test_url, proxy.addr, response.status_code)
+                continue
+            breaker.record_success()
+            self._target_throttled_by[test_url].clear()
+
+            # 判断响应是否成功
+            is_success = 200 <= response.status_code < 300
+            stats.last_deep_check_ts = time.monotonic()
+            self._record_result(
+                proxy,
+                stats,
+                is_success,
+                response_time,
+                response.status_code,
+                None if is_success else f"HTTP {response.status_code}",
+                failure_kind=(
+                    FailureKind.BLOCKED
+                    if response.status_code in self.BLOCKED_STATUSES
+                    else FailureKind.HTTP_ERROR
+                ),
+            )
 
-        except Exception as e:
-            # 处理检查异常
-            response_time = (time.time() - start_time) * 1000
-            error_msg = str(e)
-
-            stats.response_time_ms = response_time
-            stats.status_code = None
-            stats.error_message = error_msg
-            stats.last_check_time = datetime.now()
-            stats.total_checks += 1
+            self.logger.debug(
+                f"Health check for {proxy.addr} via {test_url}: "
+                f"status={response.status_code}, "
+                f"time={response_time:.1f}ms, "
+                f"state={proxy.health_state.value}"
+            )
+            return response_time, False
+
+    def _record_target_throttle(self, test_url: str, proxy_addr: str, status_code: int) -> None:
+        """记录端点限流：半开探测或不同代理报告数达到阈值时熔断，否则只释放探测名额"""
+        breaker = self._target_breakers[test_url]
+        reporters = self._target_throttled_by[test_url]
+        reporters.add(proxy_addr)
+        if (
+            breaker.state == CircuitState.HALF_OPEN
+            or len(reporters) >= self.TARGET_TRIP_MIN_PROXIES
+        ):
+            reporters.clear()
+            breaker.record_failure(
+                rate_limited=status_code == 429,
+                error=f"HTTP {status_code}",
+            )
+        else:
+            breaker.release()
+
+    async def _tcp_fallback(self, proxy: Proxy, stats: ProxyHealthStats) -> bool:
+        """测试端点全部不可用时的TCP存活探测
+
+        连不上仍记为失败；连通只说明端口可达，记为未定结论，不推动状态迁移也不改变健康结论。
+
+        Returns:
+            TCP连接是否超时
+        """
+        self.logger.debug(f"No health check target available for {proxy.addr}, falling back to TCP")
+        alive, elapsed_ms, error, failure_kind = await self._tcp_probe(proxy)
+        if not alive:
+            self._record_result(
+                proxy, stats, False, elapsed_ms, None, error,
+                record_latency=False, failure_kind=failure_kind,
+            )
+            return failure_kind == FailureKind.TIMEOUT
+
+        self._inconclusive_checks += 1
+        self.health_stats.untrack(stats)
+        stats.last_check_ts = time.monotonic()
+        stats.total_checks += 1
+        stats.error_message = "inconclusive: no health check target available"
+        stats.last_outcome = ProbeOutcome.INCONCLUSIVE
+        self.health_stats.track(stats)
+        return False
+
+    def _record_result(
+        self,
+        proxy: Proxy,
+        stats: ProxyHealthStats,
+        success: bool,
+        response_time: float,
+        status_code: Optional[int],
+        error_msg: Optional[str],
+        record_latency: bool = True,
+        failure_kind: FailureKind = FailureKind.CONNECT_ERROR,
+    ) -> None:
+        """记录一次探测结果：驱动代理健康状态迁移，同步增量更新池级聚合"""
+        self.health_stats.untrack(stats)
+        if record_latency:
+            proxy.record_latency(response_time)
+            stats.record_latency(response_time)
+        stats.record_window(success, self.stats_window_size)
+        stats.status_code = status_code
+        stats.error_message = error_msg
+        stats.last_check_ts = time.monotonic()
+        stats.total_checks += 1
+        stats.last_outcome = ProbeOutcome.PASS if success else ProbeOutcome.FAIL
+
+        if success:
+            stats.consecutive_successes += 1
+            stats.consecutive_failures = 0
+            previous = proxy.record_success(self.health_policy)
+        else:
             stats.consecutive_failures += 1
             stats.consecutive_successes = 0
+            previous = proxy.record_failure(failure_kind, self.health_policy)
+        stats.is_healthy = success and proxy.is_healthy()
+
+        if proxy.health_state != previous:
+            if proxy.health_state == ProxyHealthState.QUARANTINED:
+                self.logger.warning(
+                    f"Proxy {proxy.addr} quarantined - {previous.value} -> quarantined, "
+                    f"last failure: {failure_kind.value} {error_msg}"
+                )
+            else:
+                self.logger.info(
+                    f"Proxy {proxy.addr} {previous.value} -> {proxy.health_state.value}"
+                )
 
-            # 连续失败超过阈值则标记为不健康
-            if stats.consecutive_failures >= self.failure_threshold:
-                stats.is_healthy = False
-                proxy.mark_failure()
-                self.logger.warning(f"Proxy {proxy.addr} failed health check: {error_msg}")
-
-            # 计算成功率
-            if stats.total_checks > 0:
-                success_count = stats.total_checks - stats.consecutive_failures
-                stats.success_rate = success_count / stats.total_checks * 100
-
-        return stats
+        self.health_stats.track(stats)
 
-    async def check_proxies_batch(self, proxies: List[Proxy], max_concurrent: int = 10) -> Dict[str, ProxyHealthStats]:
-        """批量检查代理健康状态"""
+    async def check_proxies_batch(self, proxies: List[Proxy]) -> Dict[str, ProxyHealthStats]:
+        """批量检查代理健康状态，并发数由自适应控制器决定"""
         if not proxies:
             return {}
 
-        self.logger.info(f"Starting health check for {len(proxies)} proxies")
+        self.logger.debug(f"Starting health check for {len(proxies)} proxies")
         self._check_count += 1
-        self._last_check_time = datetime.now()
-
-        # 使用信号量限制并发数
-        semaphore = asyncio.Semaphore(max_concurrent)
+        await self._clients.prune()
+        self.health_stats.prune()
+        self._last_check_ts = time.time()
 
-        async def check_with_semaphore(proxy: Proxy) -> Tuple[str, ProxyHealthStats]:
-            async with semaphore:
+        async def check_with_limit(proxy: Proxy) -> Tuple[str, ProxyHealthStats]:
+            async with self.concurrency:
                 stats = await self.check_proxy_health(proxy)
                 return proxy.addr, stats
 
         # 并发执行健康检查
-        tasks = [check_with_semaphore(proxy) for proxy in proxies]
+        tasks = [check_with_limit(proxy) for proxy in proxies]
         results = await asyncio.gather(*tasks, return_exceptions=True)
 
         # 处理结果
@@ -191,7 +621,7 @@ class ProxyHealthChecker:
             if stats.is_healthy:
                 healthy_count += 1
 
-        self.logger.info(
+        self.logger.debug(
             f"Health check completed: {healthy_count}/{len(proxies)} proxies healthy "
             f"({healthy_count/len(proxies)*100:.1f}%)"
         )
@@ -199,7 +629,8 @@ class ProxyHealthChecker:
         return checked_stats
 
     def get_health_summary(self) -> Dict:
-        """获取健康检查摘要"""
+        """获取健康检查摘要（仅统计未过期的代理）"""
+        self.health_stats.prune()
         if not self.health_stats:
             return {
                 "total_proxies": 0,
@@ -208,37 +639,65 @@ class ProxyHealthChecker:
                 "health_rate": 0.0,
                 "last_check_time": None,
                 "total_checks": self._check_count,
-                "avg_response_time": 0.0
+                "avg_response_time": 0.0,
+                "window_success_rate": 0.0,
+                **self._probe_counters(),
             }
 
-        healthy_count = sum(1 for stats in self.health_stats.values() if stats.is_healthy)
-        total_count = len(self.health_stats)
-
-        # 计算平均响应时间（只统计成功的请求）
-        response_times = [
-            stats.response_time_ms
-            for stats in self.health_stats.values()
-            if stats.response_time_ms is not None and stats.is_healthy
-        ]
-        avg_response_time = sum(response_times) / len(response_times) if response_times else 0.0
+        store = self.health_stats
+        healthy_count = store.healthy_count
+        total_count = len(store)
+        # 健康代理的延迟EWMA均值
+        avg_response_time = store.latency_sum / store.latency_count if store.latency_count else 0.0
 
         return {
             "total_proxies": total_count,
             "healthy_proxies": healthy_count,
             "unhealthy_proxies": total_count - healthy_count,
             "health_rate": healthy_count / total_count * 100 if total_count > 0 else 0.0,
-            "last_check_time": self._last_check_time.isoformat() if self._last_check_time else None,
+            "last_check_time": (
+                datetime.fromtimestamp(self._last_check_ts).isoformat()
+                if self._last_check_ts
+                else None
+            ),
             "total_checks": self._check_count,
-            "avg_response_time": round(avg_response_time, 1)
+            "avg_response_time": round(avg_response_time, 1),
+            "window_success_rate": round(
+                store.window_successes / store.window_checks * 100 if store.window_checks else 0.0, 2
+            ),
+            **self._probe_counters(),
+        }
+
+    def _probe_counters(self) -> Dict:
+        """分层探测计数及测试端点熔断状态"""
+        return {
+            "probe_mode": self.probe_mode,
+            "tcp_probes": self._tcp_probes,
+            "http_probes": self._http_probes,
+            "tcp_rejections": self._tcp_rejections,
+            "inconclusive_checks": self._inconclusive_checks,
+            "targets": {
+                url: breaker.snapshot() for url, breaker in self._target_breakers.items()
+            },
+            "concurrency": self.concurrency.snapshot(),
         }
 
     def get_proxy_stats(self, proxy_addr: str) -> Optional[ProxyHealthStats]:
         """获取指定代理的统计信息"""
         return self.health_stats.get(proxy_addr)
 
+    async def release(self, proxy_addr: str) -> None:
+        """代理出池后关闭其复用客户端并丢弃统计"""
+        self.health_stats.discard(proxy_addr)
+        await self._clients.discard(proxy_addr)
+
+    async def close(self) -> None:
+        """关闭全部复用客户端"""
+        await self._clients.aclose()
+
     def clear_stats(self) -> None:
         """清除统计数据"""
         self.health_stats.clear()
         self._check_count = 0
-        self._last_check_time = None
+        self._last_check_ts = None
         self.logger.info("Health check statistics cleared")
\ No newline at end of file
@@ -0,0 +1,85 @@
+"""
+Infrastructure层 - 代理槽位索引
+"""
+
+from __future__ import annotations
+
+import random
+from typing import Dict, Iterator, List, Optional, Union, overload
+
+from domain import Proxy
+
+
+class ProxySlotIndex:
+    """
+    代理槽位索引
+    - 稠密数组存放代理，addr -> 槽位 的哈希表定位
+    - 加入、按地址移除（交换删除）、随机选取均为 O(1)
+    - 支持 len / 迭代 / 切片，兼容原有按列表读取池内容的调用方
+    """
+
+    __slots__ = ("_items", "_slots")
+
+    def __init__(self, proxies: Optional[List[Proxy]] = None):
+        self._items: List[Proxy] = []
+        self._slots: Dict[str, int] = {}
+        for proxy in proxies or ():
+            self.add(proxy)
+
+    def add(self, proxy: Proxy) -> bool:
+        """加入代理，已存在则忽略"""
+        if proxy.addr in self._slots:
+            return False
+        self._slots[proxy.addr] = len(self._items)
+        self._items.append(proxy)
+        return True
+
+    def discard(self, proxy_addr: str) -> Optional[Proxy]:
+        """按地址移除代理：末尾元素填补空槽"""
+        slot = self._slots.pop(proxy_addr, None)
+        if slot is None:
+            return None
+
+        removed = self._items[slot]
+        last = self._items.pop()
+        if slot < len(self._items):
+            self._items[slot] = last
+            self._slots[last.addr] = slot
+        return removed
+
+    def get(self, proxy_addr: str) -> Optional[Proxy]:
+        """按地址查找代理"""
+        slot = self._slots.get(proxy_addr)
+        return self._items[slot] if slot is not None else None
+
+    def random_choice(self) -> Optional[Proxy]:
+        """随机选取一个代理"""
+        if not self._items:
+            return None
+        return self._items[random.randrange(len(self._items))]
+
+    def clear(self) -> None:
+        """清空索引"""
+        self._items.clear()
+        self._slots.clear()
+
+    def __contains__(self, proxy_addr: object) -> bool:
+        return proxy_addr in self._slots
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __bool__(self) -> bool:
+        return bool(self._items)
+
+    def __iter__(self) -> Iterator[Proxy]:
+        return iter(list(self._items))
+
+    @overload
+    def __getitem__(self, key: int) -> Proxy: ...
+
+    @overload
+    def __getitem__(self, key: slice) -> List[Proxy]: ...
+
+    def __getitem__(self, key: Union[int, slice]) -> Union[Proxy, List[Proxy]]:
+        return self._items[key]
@@ -10,7 +10,9 @@ from datetime import datetime
 
 from saturn_mousehunter_shared import get_logger
 from domain import (
+    HealthTransitionPolicy,
     MarketType,
+    ProxyLease,
     ProxyMode,
     ProxyPoolDomainService,
     ProxyPoolConfig,
@@ -22,6 +24,7 @@ from domain import (
 from application import ProxyPoolApplicationService
 from .market_clock import MarketClockService
 from .proxy_fetchers import MockProxyFetcher, ExternalProxyFetcher, HailiangProxyFetcher
+from .fetcher_router import FetcherRouter
 from .memory_proxy_repository import MemoryProxyRepository
 from .postgresql_repositories import (
     PostgreSQLProxyPoolConfigRepository,
@@ -99,7 +102,18 @@ class ProxyPoolManager:
         config = await self._load_config()
 
         # 选择代理获取器
-        if config.hailiang_enabled and config.hailiang_api_url:
+        if config.hailiang_enabled and config.hailiang_api_url and config.backup_api_url:
+            # 主/备账号按 3:1 权重路由，失败自动切换
+            self._fetcher = FetcherRouter(
+                [
+                    ("primary", HailiangProxyFetcher(config.hailiang_api_url, config.market), 3.0),
+                    ("backup", HailiangProxyFetcher(config.backup_api_url, config.market), 1.0),
+                ],
+                market=config.market,
+                hedge_enabled=config.hedge_requests_enabled,
+            )
+            self.logger.info("Using Hailiang proxy fetcher router (primary + backup)")
+        elif config.hailiang_enabled and config.hailiang_api_url:
             self._fetcher = HailiangProxyFetcher(config.hailiang_api_url, config.market)
             self.logger.info("Using Hailiang proxy fetcher")
         else:
@@ -116,9 +130,28 @@ class ProxyPoolManager:
             rotate_interval_sec=config.rotation_interval_seconds,
             low_watermark=config.low_watermark,
             target_size=config.target_size,
-            min_refresh_secs=config.proxy_lifetime_seconds
-            + 60,  # 比代理生命周期长1分钟
+            min_refresh_secs=60,  # 切换由rotate_interval_sec驱动，此处仅限制刷新频率
             batch_count=2,  # A/B两个池
+            selection_strategy=config.selection_strategy,
+            max_in_flight_per_proxy=config.max_in_flight_per_proxy,
+            lease_ttl_sec=config.lease_ttl_seconds,
+            proxy_lifetime_sec=config.proxy_lifetime_seconds,
+            expiry_safety_margin_sec=config.expiry_safety_margin_seconds,
+            overlap_window_sec=config.overlap_window_seconds,
+            warmup_sec=config.warmup_seconds,
+            quarantine_ttl_sec=config.proxy_lifetime_seconds,  # 失败IP在一个绑定周期内不再接纳
+            health_probe_mode=config.health_probe_mode,
+            health_tcp_timeout_ms=config.health_tcp_timeout_ms,
+            health_deep_check_interval_sec=config.health_deep_check_interval_seconds,
+            health_check_targets=[
+                url.strip() for url in config.health_check_targets.split(",") if url.strip()
+            ],
+            health_policy=HealthTransitionPolicy(
+                promote_after_successes=config.health_promote_after_successes,
+                recover_after_successes=config.health_recover_after_successes,
+                quarantine_strikes=config.health_quarantine_strikes,
+                client_report_strikes=config.health_client_report_strikes,
+            ),
         )
 
         # 创建领域服务
@@ -150,12 +183,23 @@ class ProxyPoolManager:
         """获取当前配置"""
         return self._cached_config
 
-    def set_external_fetcher(self, fetch_func) -> None:
-        """设置外部代理获取函数"""
+    async def set_external_fetcher(self, fetch_func, provider_url: Optional[str] = None) -> None:
+        """设置外部代理获取函数，替换前先释放原获取器持有的共享HTTP连接
+
+        Args:
+            provider_url: 供应商地址，获取函数接受 client 参数时传入该供应商的共享长连接客户端
+        """
         if not self._cached_config:
             raise RuntimeError("Configuration not loaded")
 
-        self._fetcher = ExternalProxyFetcher(fetch_func, self._cached_config.market)
+        if self._fetcher:
+            await self._fetcher.close()
+        self._fetcher = ExternalProxyFetcher(
+            fetch_func, self._cached_config.market, provider_url=provider_url
+        )
+        if self._repository:
+            # 运行中的仓储仍持有已关闭的原获取器，一并切换
+            self._repository.fetcher = self._fetcher
         self.logger.info("External proxy fetcher configured")
 
     async def start(self, force: bool = False) -> None:
@@ -229,6 +273,10 @@ class ProxyPoolManager:
         if self._application_service:
             await self._application_service.stop_service()
 
+        # 释放获取器的共享HTTP连接
+        if self._fetcher:
+            await self._fetcher.close()
+
         # 更新状态到数据库
         await self._update_running_status(False)
 
@@ -258,12 +306,14 @@ class ProxyPoolManager:
         except asyncio.CancelledError:
             pass
 
-    async def get_proxy(self, proxy_type: str = "short") -> str | None:
-        """获取代理地址"""
+    async def get_proxy(
+        self, proxy_type: str = "short", session_key: str | None = None
+    ) -> str | None:
+        """获取代理地址，无需归还，不受单IP在途上限约束"""
         if not self._running or not self._application_service:
             return None
 
-        proxy = await self._application_service.get_proxy(proxy_type)
+        proxy = await self._application_service.get_proxy(proxy_type, session_key)
 
         # 记录请求统计
         await self._status_repo.increment_request_stats(
@@ -272,18 +322,88 @@ class ProxyPoolManager:
 
         return proxy
 
-    async def report_failure(self, proxy_addr: str) -> None:
-        """报告代理失败"""
+    async def get_proxies(self, count: int, proxy_type: str = "short") -> list[str]:
+        """批量获取互不相同的代理地址，无需归还"""
         if not self._running or not self._application_service:
-            return
+            return []
+
+        proxies = await self._application_service.get_proxies(count, proxy_type)
+
+        # 一次批量请求只记录一次统计
+        await self._status_repo.increment_request_stats(
+            self.market, self.mode, success=bool(proxies)
+        )
+
+        return proxies
+
+    async def lease_proxy(
+        self, proxy_type: str = "short", session_key: str | None = None
+    ) -> ProxyLease | None:
+        """租用代理，用完后调用 release_proxy 归还
+
+        Args:
+            session_key: 粘性会话键，需要固定出口IP的流程（登录、翻页游标）传入
+        """
+        if not self._running or not self._application_service:
+            return None
+
+        lease = await self._application_service.lease_proxy(proxy_type, session_key)
+
+        # 记录请求统计
+        await self._status_repo.increment_request_stats(
+            self.market, self.mode, success=lease is not None
+        )
+
+        return lease
 
-        await self._application_service.report_failure(proxy_addr)
+    async def lease_proxies(self, count: int, proxy_type: str = "short") -> list[ProxyLease]:
+        """批量租用互不相同的代理"""
+        if not self._running or not self._application_service:
+            return []
+
+        leases = await self._application_service.lease_proxies(count, proxy_type)
 
-        # 记录失败统计
+        # 一次批量请求只记录一次统计
         await self._status_repo.increment_request_stats(
-            self.market, self.mode, success=False
+            self.market, self.mode, success=bool(leases)
+        )
+
+        return leases
+
+    async def release_proxy(
+        self, lease_id: str, success: bool = True, latency_ms: float | None = None
+    ) -> bool:
+        """归还代理租约并上报使用结果，返回租约是否有效"""
+        if not self._running or not self._application_service:
+            return False
+
+        released = await self._application_service.release_proxy(
+            lease_id, success, latency_ms
         )
 
+        # 失败结果与报告代理失败一致计入统计
+        if released and not success:
+            await self._status_repo.increment_request_stats(
+                self.market, self.mode, success=False
+            )
+
+        return released
+
+    async def report_failure(self, proxy_addr: str) -> bool:
+        """报告代理失败，返回代理是否在池中"""
+        if not self._running or not self._application_service:
+            return False
+
+        accepted = await self._application_service.report_failure(proxy_addr)
+
+        # 记录失败统计（未知地址不计入）
+        if accepted:
+            await self._status_repo.increment_request_stats(
+                self.market, self.mode, success=False
+            )
+
+        return accepted
+
     async def get_status(self) -> dict:
         """获取服务状态"""
         if not self._running or not self._application_service:
@@ -454,6 +574,22 @@ class ProxyPoolManager:
             "rotation_interval_minutes": config.rotation_interval_minutes,
             "low_watermark": config.low_watermark,
             "target_size": config.target_size,
+            "selection_strategy": config.selection_strategy,
+            "max_in_flight_per_proxy": config.max_in_flight_per_proxy,
+            "lease_ttl_seconds": config.lease_ttl_seconds,
+            "expiry_safety_margin_seconds": config.expiry_safety_margin_seconds,
+            "overlap_window_seconds": config.overlap_window_seconds,
+            "warmup_seconds": config.warmup_seconds,
+            "backup_api_url": config.backup_api_url,
+            "hedge_requests_enabled": config.hedge_requests_enabled,
+            "health_probe_mode": config.health_probe_mode,
+            "health_tcp_timeout_ms": config.health_tcp_timeout_ms,
+            "health_deep_check_interval_seconds": config.health_deep_check_interval_seconds,
+            "health_check_targets": config.health_check_targets,
+            "health_promote_after_successes": config.health_promote_after_successes,
+            "health_recover_after_successes": config.health_recover_after_successes,
+            "health_quarantine_strikes": config.health_quarantine_strikes,
+            "health_client_report_strikes": config.health_client_report_strikes,
             "auto_start_enabled": config.auto_start_enabled,
             "pre_market_start_minutes": config.pre_market_start_minutes,
             "post_market_stop_minutes": config.post_market_stop_minutes,
@@ -0,0 +1,47 @@
+"""
+Infrastructure层 - 失败代理隔离集合
+"""
+
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+
+
+class ProxyQuarantine:
+    """
+    TTL隔离集合：记录近期失败的代理地址，入池前拦截
+    - 固定TTL下插入顺序即到期顺序，有序字典头部即最早到期项，清理均摊 O(1)
+    - 超出容量时淘汰最早隔离的地址
+    """
+
+    __slots__ = ("ttl_sec", "max_size", "_expiry")
+
+    def __init__(self, ttl_sec: float = 600, max_size: int = 50000):
+        self.ttl_sec = ttl_sec
+        self.max_size = max_size
+        self._expiry: OrderedDict[str, float] = OrderedDict()
+
+    def add(self, proxy_addr: str) -> None:
+        """隔离地址，已隔离的地址重新计时"""
+        self._expiry[proxy_addr] = time.time() + self.ttl_sec
+        self._expiry.move_to_end(proxy_addr)
+        while len(self._expiry) > self.max_size:
+            self._expiry.popitem(last=False)
+
+    def purge(self) -> None:
+        """清理已到期的地址"""
+        now = time.time()
+        while self._expiry:
+            addr, expires_ts = next(iter(self._expiry.items()))
+            if expires_ts > now:
+                break
+            del self._expiry[addr]
+
+    def __contains__(self, proxy_addr: object) -> bool:
+        expires_ts = self._expiry.get(proxy_addr)
+        return expires_ts is not None and expires_ts > time.time()
+
+    def __len__(self) -> int:
+        self.purge()
+        return len(self._expiry)
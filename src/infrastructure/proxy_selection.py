@@ -0,0 +1,167 @@
+"""
+Infrastructure层 - 代理选择策略
+"""
+
+from __future__ import annotations
+
+import heapq
+import itertools
+import random
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Tuple
+
+from domain import Proxy
+from .proxy_index import ProxySlotIndex
+
+
+class ProxySelectionStrategy(ABC):
+    """
+    代理选择策略接口：从池的可选索引中挑选一个代理
+    - 每个池持有独立的策略实例，策略可维护自身的游标/堆等状态
+    - 代理进入可选索引时回调 on_admit，池清空时回调 reset
+    """
+
+    name: str = ""
+
+    @abstractmethod
+    def select(self, index: ProxySlotIndex) -> Optional[Proxy]:
+        """选取代理，索引为空时返回None"""
+        pass
+
+    def on_admit(self, proxy: Proxy) -> None:
+        """代理进入可选索引"""
+        pass
+
+    def reset(self) -> None:
+        """池被清空"""
+        pass
+
+
+class RandomSelectionStrategy(ProxySelectionStrategy):
+    """均匀随机选择"""
+
+    name = "random"
+
+    def select(self, index: ProxySlotIndex) -> Optional[Proxy]:
+        return index.random_choice()
+
+
+class LatencyAwareSelectionStrategy(ProxySelectionStrategy):
+    """
+    延迟感知选择（power of two choices）
+    - 随机抽取两个代理，取延迟EWMA较低者
+    - 快代理获得更多流量，但不会把流量全部压到单个IP
+    """
+
+    name = "latency"
+
+    def __init__(self, unknown_latency_ms: float = 1000.0):
+        # 尚未测得延迟的代理按该先验值参与比较
+        self.unknown_latency_ms = unknown_latency_ms
+
+    def select(self, index: ProxySlotIndex) -> Optional[Proxy]:
+        size = len(index)
+        if size < 2:
+            return index.random_choice()
+
+        first = random.randrange(size)
+        second = random.randrange(size - 1)
+        if second >= first:
+            second += 1
+
+        a, b = index[first], index[second]
+        return a if self._latency(a) <= self._latency(b) else b
+
+    def _latency(self, proxy: Proxy) -> float:
+        if proxy.latency_ms is None:
+            return self.unknown_latency_ms
+        return proxy.latency_ms
+
+
+class RoundRobinSelectionStrategy(ProxySelectionStrategy):
+    """
+    环形轮询选择
+    - 游标在稠密数组上循环前进，O(1)
+    - 交换删除会让个别代理在本轮被跳过或多轮到一次，不影响整体均匀
+    """
+
+    name = "round_robin"
+
+    def __init__(self):
+        self._cursor = 0
+
+    def select(self, index: ProxySlotIndex) -> Optional[Proxy]:
+        if not index:
+            return None
+        if self._cursor >= len(index):
+            self._cursor = 0
+        proxy = index[self._cursor]
+        self._cursor += 1
+        return proxy
+
+    def reset(self) -> None:
+        self._cursor = 0
+
+
+class LeastRecentlyUsedSelectionStrategy(ProxySelectionStrategy):
+    """
+    最久未使用优先
+    - 以 last_used 时间为键的最小堆，选取和更新均为 O(log n)
+    - 已移出可选索引的代理在到达堆顶时惰性丢弃
+    """
+
+    name = "lru"
+
+    def __init__(self):
+        self._heap: List[Tuple[float, int, str]] = []
+        self._keys: Dict[str, float] = {}
+        self._seq = itertools.count()
+
+    def select(self, index: ProxySlotIndex) -> Optional[Proxy]:
+        while self._heap:
+            key, _, addr = heapq.heappop(self._heap)
+            if self._keys.get(addr) != key:
+                continue
+
+            proxy = index.get(addr)
+            if proxy is None:
+                del self._keys[addr]
+                continue
+
+            self._push(addr, time.time())
+            return proxy
+
+        return None
+
+    def on_admit(self, proxy: Proxy) -> None:
+        if proxy.addr in self._keys:
+            return
+        self._push(proxy.addr, proxy.last_used_ts)
+
+    def reset(self) -> None:
+        self._heap.clear()
+        self._keys.clear()
+
+    def _push(self, addr: str, key: float) -> None:
+        self._keys[addr] = key
+        heapq.heappush(self._heap, (key, next(self._seq), addr))
+
+
+SELECTION_STRATEGIES = {
+    RandomSelectionStrategy.name: RandomSelectionStrategy,
+    LatencyAwareSelectionStrategy.name: LatencyAwareSelectionStrategy,
+    RoundRobinSelectionStrategy.name: RoundRobinSelectionStrategy,
+    LeastRecentlyUsedSelectionStrategy.name: LeastRecentlyUsedSelectionStrategy,
+}
+
+
+def create_selection_strategy(name: str) -> ProxySelectionStrategy:
+    """按名称创建选择策略"""
+    strategy_cls = SELECTION_STRATEGIES.get((name or "").lower())
+    if strategy_cls is None:
+        raise ValueError(
+            f"Unknown selection strategy: {name}, "
+            f"available: {', '.join(SELECTION_STRATEGIES)}"
+        )
+    return strategy_cls()
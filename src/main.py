@@ -8,7 +8,7 @@ import sys
 from contextlib import asynccontextmanager
 from typing import Optional
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import FileResponse
 from saturn_mousehunter_shared import get_logger
@@ -209,6 +209,12 @@ async def health_check():
     }
 
 
+@app.get("/echo")
+async def echo(request: Request):
+    """回显端点 - 作为健康检查测试端点，返回请求来源IP（格式同 httpbin /ip）"""
+    return {"origin": request.client.host if request.client else None}
+
+
 # 依赖注入工厂函数
 def get_proxy_pool_manager(market: str, mode: str = "live") -> ProxyPoolManager:
     """获取代理池管理器"""
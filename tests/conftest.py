@@ -0,0 +1,10 @@
+"""
+测试公共配置：服务代码以 src 为根目录导入（from domain import ...）
+"""
+
+import sys
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
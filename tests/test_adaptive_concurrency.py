@@ -0,0 +1,78 @@
+"""
+健康检查 AIMD 并发控制测试
+"""
+
+import asyncio
+
+from infrastructure.adaptive_concurrency import AIMDConcurrencyLimiter
+
+
+def run_window(limiter: AIMDConcurrencyLimiter, latency_ms: float, timeouts: int = 0) -> None:
+    """记录一个完整观察窗口的样本"""
+    samples = max(int(limiter.limit), limiter.min_limit)
+    for i in range(samples):
+        limiter.record(None if i < timeouts else latency_ms, timed_out=i < timeouts)
+
+
+def test_first_window_sets_baseline_then_stable_windows_increase():
+    limiter = AIMDConcurrencyLimiter("test", initial_limit=4, max_limit=6)
+
+    run_window(limiter, 100.0)
+    assert limiter.limit == 4
+    assert limiter.snapshot()["baseline_latency_ms"] == 100.0
+
+    run_window(limiter, 110.0)
+    assert limiter.limit == 5
+    run_window(limiter, 100.0)
+    run_window(limiter, 100.0)
+    # 不超过上限
+    assert limiter.limit == 6
+    assert limiter.snapshot()["increases"] == 2
+
+
+def test_latency_spike_halves_limit_without_moving_baseline():
+    limiter = AIMDConcurrencyLimiter("test", initial_limit=8, min_limit=2)
+    run_window(limiter, 100.0)
+
+    run_window(limiter, 250.0)
+    assert limiter.limit == 4
+    assert limiter.snapshot()["baseline_latency_ms"] == 100.0
+
+    run_window(limiter, 250.0)
+    run_window(limiter, 250.0)
+    # 不低于下限
+    assert limiter.limit == 2
+    assert limiter.snapshot()["decreases"] == 3
+
+
+def test_timeout_spike_decreases_limit():
+    limiter = AIMDConcurrencyLimiter("test", initial_limit=10, timeout_spike_ratio=0.1)
+    run_window(limiter, 100.0)
+
+    run_window(limiter, 100.0, timeouts=1)
+    # 超时率 10% 未超过基线 + 10%，视为平稳
+    assert limiter.limit == 11
+
+    run_window(limiter, 100.0, timeouts=4)
+    assert limiter.limit == 5.5
+
+
+async def test_limit_bounds_in_flight_probes():
+    limiter = AIMDConcurrencyLimiter("test", initial_limit=2, min_limit=2)
+    release = asyncio.Event()
+    peak = 0
+
+    async def probe() -> None:
+        nonlocal peak
+        async with limiter:
+            peak = max(peak, limiter.snapshot()["in_flight"])
+            await release.wait()
+
+    tasks = [asyncio.create_task(probe()) for _ in range(5)]
+    await asyncio.sleep(0.01)
+    assert limiter.snapshot()["in_flight"] == 2
+
+    release.set()
+    await asyncio.gather(*tasks)
+    assert peak == 2
+    assert limiter.snapshot()["in_flight"] == 0
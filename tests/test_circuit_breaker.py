@@ -0,0 +1,136 @@
+"""
+供应商熔断器状态迁移与半开探测名额测试
+"""
+
+import asyncio
+
+from infrastructure.circuit_breaker import CircuitBreaker, CircuitState
+from infrastructure.proxy_fetchers import (
+    ExternalProxyFetcher,
+    fetch_hailiang_proxy_ip,
+    get_provider_breaker,
+)
+
+
+def make_breaker(**kwargs) -> CircuitBreaker:
+    """冷却时间为0、无抖动的熔断器，打开后下一次请求即进入半开"""
+    kwargs.setdefault("base_backoff_sec", 0.0)
+    kwargs.setdefault("jitter_ratio", 0.0)
+    return CircuitBreaker("test", **kwargs)
+
+
+def open_breaker(breaker: CircuitBreaker) -> None:
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure(error="boom")
+    assert breaker.state == CircuitState.OPEN
+
+
+def test_opens_after_consecutive_failures():
+    breaker = CircuitBreaker("test", failure_threshold=3)
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CircuitState.CLOSED
+    breaker.record_failure()
+    assert breaker.state == CircuitState.OPEN
+    assert not breaker.allow_request()
+
+
+def test_rate_limit_opens_immediately_with_retry_after():
+    breaker = CircuitBreaker("test", base_backoff_sec=1.0)
+    breaker.record_failure(rate_limited=True, retry_after=120.0)
+    assert breaker.state == CircuitState.OPEN
+    assert breaker.snapshot()["retry_in_seconds"] > 100
+
+
+def test_half_open_allows_single_probe_then_closes_on_success():
+    breaker = make_breaker()
+    open_breaker(breaker)
+
+    assert breaker.allow_request()
+    assert breaker.state == CircuitState.HALF_OPEN
+    assert not breaker.allow_request()
+
+    breaker.record_success()
+    assert breaker.state == CircuitState.CLOSED
+    assert breaker.allow_request()
+
+
+def test_half_open_failure_reopens():
+    breaker = make_breaker()
+    open_breaker(breaker)
+    assert breaker.allow_request()
+
+    breaker.record_failure(error="still down")
+    assert breaker.state == CircuitState.OPEN
+
+
+def test_release_frees_half_open_slot_without_state_change():
+    breaker = make_breaker()
+    open_breaker(breaker)
+    assert breaker.allow_request()
+
+    breaker.release()
+    assert breaker.state == CircuitState.HALF_OPEN
+    assert breaker.allow_request()
+
+
+def test_lost_half_open_probe_times_out():
+    breaker = make_breaker(probe_timeout_sec=0.0)
+    open_breaker(breaker)
+    assert breaker.allow_request()
+    # 探测未上报结果，超时后放行下一个探测
+    assert breaker.allow_request()
+
+
+async def test_cancelled_hailiang_probe_releases_slot():
+    class HangingClient:
+        async def get(self, url):
+            await asyncio.Event().wait()
+
+    breaker = make_breaker()
+    open_breaker(breaker)
+
+    task = asyncio.create_task(
+        fetch_hailiang_proxy_ip("http://provider.test/api", client=HangingClient(), breaker=breaker)
+    )
+    await asyncio.sleep(0)
+    assert breaker.state == CircuitState.HALF_OPEN
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+    assert breaker.state == CircuitState.HALF_OPEN
+    assert breaker.allow_request()
+
+
+async def test_external_fetcher_invalid_data_counts_as_failure():
+    url = "http://external-invalid.test/api"
+    breaker = get_provider_breaker(url)
+    breaker.base_backoff_sec = 0.0
+    breaker.jitter_ratio = 0.0
+    open_breaker(breaker)
+
+    fetcher = ExternalProxyFetcher(lambda: {"unexpected": True}, "hk", provider_url=url)
+    await fetcher.fetch_proxies(5)
+
+    # 半开探测得到无效数据：重新打开，下一次冷却结束后仍可探测
+    assert breaker.state == CircuitState.OPEN
+    assert breaker.allow_request()
+
+
+async def test_cancelled_external_fetch_releases_slot():
+    url = "http://external-cancel.test/api"
+    breaker = get_provider_breaker(url)
+    breaker.base_backoff_sec = 0.0
+    breaker.jitter_ratio = 0.0
+    open_breaker(breaker)
+
+    async def hanging_fetch():
+        await asyncio.Event().wait()
+
+    fetcher = ExternalProxyFetcher(hanging_fetch, "hk", provider_url=url)
+    task = asyncio.create_task(fetcher.fetch_proxies(5))
+    await asyncio.sleep(0)
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+    assert breaker.allow_request()
@@ -0,0 +1,30 @@
+"""
+配置更新请求校验测试
+"""
+
+from typing import get_args
+
+import pytest
+from pydantic import ValidationError
+
+from api.routes.proxy_pool_routes import ConfigUpdateRequest
+from infrastructure.proxy_health_checker import ProxyHealthChecker
+from infrastructure.proxy_selection import SELECTION_STRATEGIES
+
+
+def literal_values(field: str) -> set:
+    literal, _ = get_args(ConfigUpdateRequest.model_fields[field].annotation)
+    return set(get_args(literal))
+
+
+def test_allowed_values_match_implementations():
+    assert literal_values("selection_strategy") == set(SELECTION_STRATEGIES)
+    assert literal_values("health_probe_mode") == set(ProxyHealthChecker.PROBE_MODES)
+
+
+@pytest.mark.parametrize(
+    "field, value", [("selection_strategy", "fastest"), ("health_probe_mode", "icmp")]
+)
+def test_unknown_values_are_rejected(field: str, value: str):
+    with pytest.raises(ValidationError):
+        ConfigUpdateRequest(**{field: value})
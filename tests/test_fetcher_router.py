@@ -0,0 +1,93 @@
+"""
+多供应商路由：对冲请求与熔断排序测试
+"""
+
+import asyncio
+from typing import Dict, List
+
+from domain.entities import IProxyFetcher
+from infrastructure.fetcher_router import FetcherRouter
+
+
+class FakeFetcher(IProxyFetcher):
+    """按固定延迟返回固定代理列表的获取器"""
+
+    def __init__(self, proxies: List[str], delay: float = 0.0, state: str = "closed"):
+        self.proxies = proxies
+        self.delay = delay
+        self.state = state
+        self.calls = 0
+        self.completed = 0
+        self.cancelled = 0
+
+    async def fetch_proxies(self, count: int = 20) -> List[str]:
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        self.completed += 1
+        return self.proxies[:count]
+
+    def provider_stats(self) -> Dict[str, Dict]:
+        return {"fake": {"state": self.state}}
+
+
+def make_router(primary: FakeFetcher, backup: FakeFetcher) -> FetcherRouter:
+    router = FetcherRouter(
+        [("primary", primary, 1000.0), ("backup", backup, 0.001)],
+        hedge_enabled=True,
+        hedge_min_samples=1,
+    )
+    # 首选供应商的p95为10ms，超过即对冲
+    router.routes[0].record(True, 10.0)
+    return router
+
+
+async def test_hedge_loser_finishes_instead_of_being_cancelled():
+    primary = FakeFetcher(["1.1.1.1:80"], delay=0.2)
+    backup = FakeFetcher(["2.2.2.2:80"], delay=0.0)
+    router = make_router(primary, backup)
+
+    assert await router.fetch_proxies(5) == ["2.2.2.2:80"]
+    assert primary.cancelled == 0
+
+    await asyncio.sleep(0.3)
+    assert primary.completed == 1
+    # 落败请求完成后照常计入供应商统计
+    assert router.routes[0].requests == 2
+    assert not router._stragglers
+
+
+async def test_close_cancels_pending_hedge_losers():
+    primary = FakeFetcher(["1.1.1.1:80"], delay=5.0)
+    backup = FakeFetcher(["2.2.2.2:80"], delay=0.0)
+    router = make_router(primary, backup)
+
+    await router.fetch_proxies(5)
+    await router.close()
+    assert primary.cancelled == 1
+    assert not router._stragglers
+
+
+async def test_caller_cancellation_cancels_both_requests():
+    primary = FakeFetcher(["1.1.1.1:80"], delay=5.0)
+    backup = FakeFetcher(["2.2.2.2:80"], delay=5.0)
+    router = make_router(primary, backup)
+
+    task = asyncio.create_task(router.fetch_proxies(5))
+    await asyncio.sleep(0.1)
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+    await asyncio.sleep(0)
+    assert primary.cancelled == 1 and backup.cancelled == 1
+
+
+def test_half_open_provider_is_ordered_last():
+    half_open = FakeFetcher([], state="half_open")
+    healthy = FakeFetcher([])
+    router = FetcherRouter([("half_open", half_open, 1000.0), ("healthy", healthy, 0.001)])
+
+    for _ in range(20):
+        assert [route.name for route in router._ordered_routes()] == ["healthy", "half_open"]
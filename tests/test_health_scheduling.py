@@ -0,0 +1,124 @@
+"""
+按代理到期时间排期的健康检查测试
+"""
+
+import time
+
+import pytest
+
+from domain import MarketType, Proxy, ProxyHealthState, ProxyMode
+from infrastructure.memory_proxy_repository import MemoryProxyRepository
+from infrastructure.proxy_fetchers import MockProxyFetcher
+
+INTERVAL = 300
+MIN_INTERVAL = 15
+
+
+def make_repo(**kwargs) -> MemoryProxyRepository:
+    """启用健康检查（但不启动循环）的仓储"""
+    kwargs.setdefault("min_health_check_interval", MIN_INTERVAL)
+    return MemoryProxyRepository(
+        MarketType.HK,
+        ProxyMode.LIVE,
+        MockProxyFetcher("hk"),
+        max_in_flight_per_proxy=0,
+        health_check_interval=INTERVAL,
+        **kwargs,
+    )
+
+
+def healthy(addr: str, created_ts: float) -> Proxy:
+    proxy = Proxy(addr=addr, created_ts=created_ts)
+    proxy.health_state = ProxyHealthState.HEALTHY
+    return proxy
+
+
+async def admit(repo: MemoryProxyRepository, *proxies: Proxy) -> None:
+    async with repo._lock:
+        for proxy in proxies:
+            repo._admit(repo.active_pool, proxy)
+
+
+def test_probation_proxy_is_rechecked_at_half_interval():
+    repo = make_repo()
+    now = time.time()
+    proxy = Proxy(addr="10.0.0.1:8080", created_ts=now)
+    assert repo._health_check_delay(proxy, now) == INTERVAL / 2
+
+
+@pytest.mark.parametrize(
+    "age, expected",
+    [(0, INTERVAL), (INTERVAL / 2, INTERVAL * 1.5), (INTERVAL * 5, INTERVAL * 2)],
+)
+def test_stable_proxy_interval_grows_with_age(age: float, expected: float):
+    repo = make_repo()
+    now = time.time()
+    assert repo._health_check_delay(healthy("10.0.0.1:8080", now - age), now) == expected
+
+
+@pytest.mark.parametrize(
+    "failures, min_interval, expected",
+    [
+        (1, MIN_INTERVAL, INTERVAL / 2),
+        (2, MIN_INTERVAL, INTERVAL / 4),
+        (10, MIN_INTERVAL, INTERVAL / 16),  # 最多减半4次
+        (10, 30, 30),  # 不低于最小间隔
+    ],
+)
+def test_consecutive_failures_shorten_interval(failures: int, min_interval: int, expected: float):
+    repo = make_repo(min_health_check_interval=min_interval)
+    now = time.time()
+    proxy = healthy("10.0.0.1:8080", now)
+    repo.health_checker.health_stats.get_or_create(proxy).consecutive_failures = failures
+    assert repo._health_check_delay(proxy, now) == expected
+
+
+async def test_lease_share_shortens_interval_of_hot_proxy():
+    repo = make_repo()
+    now = time.time()
+    hot, *others = [healthy(f"10.0.0.{i}:8080", now) for i in range(1, 9)]
+    await admit(repo, hot, *others)
+
+    async with repo._lock:
+        for _ in range(8):
+            repo._hand_out(hot)
+        repo._hand_out(others[0])
+        assert repo._lease_count_total == 9
+        # 占比 8 * 8 / 9 超过上限4，间隔最多缩短一半
+        assert repo._health_check_delay(hot, now) == INTERVAL / 2
+        # 低于平均的代理不缩短
+        assert repo._health_check_delay(others[0], now) == INTERVAL
+
+
+async def test_lease_counts_reset_on_reschedule_and_eviction():
+    repo = make_repo()
+    now = time.time()
+    first, second = healthy("10.0.0.1:8080", now), healthy("10.0.0.2:8080", now)
+    await admit(repo, first, second)
+
+    async with repo._lock:
+        for proxy in (first, first, second):
+            repo._hand_out(proxy)
+        repo._schedule_health_check(first)
+        assert repo._lease_count_total == 1
+        repo._evict(repo.active_pool, second.addr)
+        assert repo._lease_count_total == 0
+        assert repo._lease_counts == {}
+
+
+async def test_only_due_proxies_still_in_pool_are_popped():
+    repo = make_repo()
+    now = time.time()
+    due, evicted, later = (healthy(f"10.0.0.{i}:8080", now) for i in range(1, 4))
+    await admit(repo, due, evicted, later)
+
+    async with repo._lock:
+        repo._health_heap.clear()
+        for proxy, due_ts in ((due, now - 2), (evicted, now - 1), (later, now + 60)):
+            repo._health_seq += 1
+            repo._health_heap.append((due_ts, repo._health_seq, proxy))
+        repo._health_heap.sort()
+        repo._evict(repo.active_pool, evicted.addr)
+
+        assert repo._pop_due_health_checks() == [due]
+        assert [entry[2] for entry in repo._health_heap] == [later]
@@ -0,0 +1,147 @@
+"""
+有界健康统计存储测试
+"""
+
+import random
+from typing import List
+
+import pytest
+
+from domain import FailureKind, Proxy
+from infrastructure import proxy_health_checker
+from infrastructure.proxy_health_checker import (
+    HealthStatsStore,
+    ProxyHealthChecker,
+    ProxyHealthStats,
+)
+
+
+@pytest.fixture
+def clock(monkeypatch) -> List[float]:
+    now = [1000.0]
+    monkeypatch.setattr(proxy_health_checker.time, "time", lambda: now[0])
+    return now
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    store = HealthStatsStore(max_entries=2)
+    a, b, c = (Proxy(addr=f"10.0.0.{i}:8080") for i in range(1, 4))
+
+    store.get_or_create(a)
+    store.get_or_create(b)
+    assert store.get(a.addr) is not None  # a 变为最近访问
+    store.get_or_create(c)
+
+    assert len(store) == 2
+    assert store.get(b.addr) is None
+    assert store.get(a.addr) is not None and store.get(c.addr) is not None
+
+
+def test_entry_expiry_follows_proxy_expiry(clock):
+    store = HealthStatsStore(default_ttl_sec=900, grace_sec=60)
+    bound = Proxy(addr="10.0.0.1:8080", expires_ts=clock[0] + 100)
+    unbound = Proxy(addr="10.0.0.2:8080")
+    store.get_or_create(bound)
+    store.get_or_create(unbound)
+
+    clock[0] += 159
+    store.prune()
+    assert store.get(bound.addr) is not None
+
+    clock[0] += 2
+    store.prune()
+    assert store.get(bound.addr) is None
+    assert store.get(unbound.addr) is not None
+
+    clock[0] += 900
+    assert store.get(unbound.addr) is None
+    assert len(store) == 0
+
+
+def test_access_renews_sliding_ttl(clock):
+    store = HealthStatsStore(default_ttl_sec=900)
+    proxy = Proxy(addr="10.0.0.1:8080")
+    stats = store.get_or_create(proxy)
+
+    clock[0] += 800
+    assert store.get_or_create(proxy) is stats
+    clock[0] += 800
+    store.prune()
+    assert store.get(proxy.addr) is stats
+
+
+def test_prune_rebuilds_oversized_heap(clock):
+    store = HealthStatsStore(max_entries=4)
+    proxies = [Proxy(addr=f"10.0.0.{i}:8080") for i in range(1, 5)]
+    for _ in range(3):
+        for proxy in proxies:
+            clock[0] += 1
+            store.get_or_create(proxy)
+
+    store.prune()
+    assert len(store._expiry_heap) == len(store) == 4
+
+
+def test_sliding_window_and_latency_ewma():
+    stats = ProxyHealthStats(proxy_addr="10.0.0.1:8080", is_healthy=False)
+    for success in (True, True, False, True):
+        stats.record_window(success, window_size=3)
+    # 窗口只保留最近3次：成功、失败、成功
+    assert stats.window_len == 3
+    assert stats.success_rate == pytest.approx(200 / 3)
+
+    stats.record_latency(100.0, alpha=0.5)
+    stats.record_latency(200.0, alpha=0.5)
+    assert stats.latency_ewma_ms == 150.0
+    assert stats.response_time_ms == 200.0
+
+
+def assert_aggregates_match(store: HealthStatsStore) -> None:
+    """增量聚合与全量重算一致"""
+    entries = list(store.values())
+    healthy = [stats for stats in entries if stats.is_healthy]
+    latencies = [stats.latency_ewma_ms for stats in healthy if stats.latency_ewma_ms is not None]
+    assert store.healthy_count == len(healthy)
+    assert store.latency_count == len(latencies)
+    assert store.latency_sum == pytest.approx(sum(latencies), abs=1e-6)
+    assert store.window_checks == sum(stats.window_len for stats in entries)
+    assert store.window_successes == sum(stats.window_bits.bit_count() for stats in entries)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_aggregates_stay_consistent_through_eviction(clock, seed: int):
+    rng = random.Random(seed)
+    checker = ProxyHealthChecker("hk")
+    store = checker.health_stats
+    store.max_entries = 8
+
+    def fresh(i: int) -> Proxy:
+        expires_ts = clock[0] + rng.uniform(50, 500) if i % 2 else None
+        return Proxy(addr=f"10.0.0.{i}:8080", expires_ts=expires_ts)
+
+    proxies = [fresh(i) for i in range(1, 21)]
+    peak_healthy = 0
+    for _ in range(2000):
+        idx = rng.randrange(len(proxies))
+        proxy = proxies[idx]
+        op = rng.random()
+        if op < 0.7:
+            stats = store.get_or_create(proxy)
+            checker._record_result(
+                proxy, stats, rng.random() < 0.8, rng.uniform(10, 1000), 200, None,
+                record_latency=rng.random() < 0.8, failure_kind=FailureKind.HTTP_ERROR,
+            )
+            if not proxy.is_healthy():
+                # 隔离的代理出池，同一地址稍后以新代理重新入池
+                proxies[idx] = fresh(idx + 1)
+        elif op < 0.8:
+            store.discard(proxy.addr)
+        elif op < 0.9:
+            store.get(proxy.addr)
+        else:
+            clock[0] += rng.uniform(0, 120)
+            store.prune()
+        assert_aggregates_match(store)
+        assert len(store) <= store.max_entries
+        peak_healthy = max(peak_healthy, store.healthy_count)
+    assert peak_healthy > 0
@@ -0,0 +1,215 @@
+"""
+健康检查测试端点熔断与TCP降级探测测试
+"""
+
+from collections import defaultdict
+from typing import Dict
+
+import httpx
+import pytest
+
+from domain import FailureKind, MarketType, Proxy, ProxyHealthState, ProxyMode
+from infrastructure.circuit_breaker import CircuitState
+from infrastructure.memory_proxy_repository import MemoryProxyRepository
+from infrastructure.proxy_fetchers import MockProxyFetcher
+from infrastructure.proxy_health_checker import ProbeOutcome, ProxyHealthChecker
+
+TARGETS = ["http://target-a.test/ip", "http://target-b.test/ip"]
+
+
+class FakeProbeClient:
+    """按代理地址返回固定状态码的探测客户端"""
+
+    def __init__(self, status_code: int):
+        self.status_code = status_code
+
+    async def get(self, url: str) -> httpx.Response:
+        return httpx.Response(self.status_code)
+
+
+def make_checker(
+    statuses: Dict[str, int], tcp_alive: bool = True, targets=TARGETS
+) -> ProxyHealthChecker:
+    checker = ProxyHealthChecker("hk", probe_mode="http", targets=targets)
+    checker._clients.get = lambda proxy: FakeProbeClient(statuses[proxy.addr])
+
+    async def fake_tcp_probe(proxy: Proxy):
+        if tcp_alive:
+            return True, 5.0, None, None
+        return False, 5.0, "TCP connect failed", FailureKind.CONNECT_ERROR
+
+    checker._tcp_probe = fake_tcp_probe
+    return checker
+
+
+def open_all_targets(checker: ProxyHealthChecker) -> None:
+    for breaker in checker._target_breakers.values():
+        breaker.record_failure(rate_limited=True)
+        assert breaker.state == CircuitState.OPEN
+
+
+async def test_healthy_proxy_is_promoted_after_two_passes():
+    proxy = Proxy(addr="10.0.0.1:8080")
+    checker = make_checker({proxy.addr: 200})
+
+    stats = await checker.check_proxy_health(proxy)
+    assert stats.is_healthy
+    assert proxy.health_state == ProxyHealthState.PROBATION
+
+    await checker.check_proxy_health(proxy)
+    assert proxy.health_state == ProxyHealthState.HEALTHY
+
+
+async def test_503_is_charged_to_the_proxy_not_the_target():
+    proxies = [Proxy(addr=f"10.0.0.{i}:8080") for i in range(1, 4)]
+    checker = make_checker({proxy.addr: 503 for proxy in proxies})
+
+    for proxy in proxies:
+        stats = await checker.check_proxy_health(proxy)
+        assert not stats.is_healthy
+        assert proxy.strikes == checker.health_policy.http_error_strikes
+
+    assert all(
+        breaker.state == CircuitState.CLOSED for breaker in checker._target_breakers.values()
+    )
+    assert checker.get_health_summary()["inconclusive_checks"] == 0
+
+
+async def test_single_proxy_429_does_not_trip_targets():
+    proxy = Proxy(addr="10.0.0.1:8080")
+    checker = make_checker({proxy.addr: 429})
+
+    for _ in range(5):
+        stats = await checker.check_proxy_health(proxy)
+
+    assert all(
+        breaker.state == CircuitState.CLOSED for breaker in checker._target_breakers.values()
+    )
+    # 所有端点都限流时无法判定：不晋升，也不计失败
+    assert proxy.health_state == ProxyHealthState.PROBATION
+    assert proxy.strikes == 0
+    assert not stats.is_healthy
+    assert checker.get_health_summary()["inconclusive_checks"] == 5
+
+
+async def test_429_from_distinct_proxies_trips_target():
+    proxies = [Proxy(addr=f"10.0.0.{i}:8080") for i in range(1, 4)]
+    checker = make_checker({proxy.addr: 429 for proxy in proxies}, targets=TARGETS[:1])
+
+    for proxy in proxies:
+        await checker.check_proxy_health(proxy)
+
+    assert checker._target_breakers[TARGETS[0]].state == CircuitState.OPEN
+
+
+async def test_tcp_fallback_never_promotes():
+    proxy = Proxy(addr="10.0.0.1:8080")
+    checker = make_checker({proxy.addr: 503})
+    open_all_targets(checker)
+
+    for _ in range(5):
+        stats = await checker.check_proxy_health(proxy)
+
+    assert proxy.health_state == ProxyHealthState.PROBATION
+    assert not stats.is_healthy
+    assert checker.get_health_summary()["inconclusive_checks"] == 5
+
+
+@pytest.mark.parametrize("tcp_alive, expected_strikes", [(True, 0), (False, 2)])
+async def test_tcp_fallback_only_records_failures(tcp_alive: bool, expected_strikes: int):
+    proxy = Proxy(addr="10.0.0.1:8080")
+    checker = make_checker({proxy.addr: 200}, tcp_alive=tcp_alive)
+    open_all_targets(checker)
+
+    await checker.check_proxy_health(proxy)
+    assert proxy.strikes == expected_strikes
+
+
+async def test_healthy_proxy_keeps_state_on_inconclusive_check():
+    proxy = Proxy(addr="10.0.0.1:8080")
+    checker = make_checker({proxy.addr: 200})
+    await checker.check_proxy_health(proxy)
+    stats = await checker.check_proxy_health(proxy)
+    assert proxy.health_state == ProxyHealthState.HEALTHY
+
+    open_all_targets(checker)
+    await checker.check_proxy_health(proxy)
+    assert proxy.health_state == ProxyHealthState.HEALTHY
+    assert stats.is_healthy
+
+
+async def test_inconclusive_probe_skips_admission_without_quarantine():
+    repo = MemoryProxyRepository(MarketType.HK, ProxyMode.LIVE, MockProxyFetcher("hk"))
+    repo.health_checker = make_checker(defaultdict(lambda: 200))
+    open_all_targets(repo.health_checker)
+
+    admitted = await repo._fill_pool(lambda: repo.active_pool, 5, 1, 5)
+
+    assert admitted == 0
+    assert len(repo._quarantine) == 0
+    assert repo._quarantine_rejections == 0
+    assert repo.health_checker.get_health_summary()["inconclusive_checks"] > 0
+    # 未定结论的代理不保留探测资源
+    assert len(repo.health_checker.health_stats) == 0
+
+
+async def test_probe_outcome_is_three_way():
+    proxy = Proxy(addr="10.0.0.1:8080")
+    checker = make_checker({proxy.addr: 200})
+    assert (await checker.check_proxy_health(proxy)).last_outcome == ProbeOutcome.PASS
+
+    open_all_targets(checker)
+    assert (await checker.check_proxy_health(proxy)).last_outcome == ProbeOutcome.INCONCLUSIVE
+
+    failing = make_checker({proxy.addr: 503})
+    assert (await failing.check_proxy_health(proxy)).last_outcome == ProbeOutcome.FAIL
+
+
+class FailingProbeClient:
+    """请求立即失败的探测客户端"""
+
+    async def get(self, url: str) -> httpx.Response:
+        raise httpx.ConnectError("connection refused")
+
+
+async def test_failed_http_probe_charges_timeout_penalty():
+    proxy = Proxy(addr="10.0.0.1:8080")
+    checker = make_checker({})
+    checker._clients.get = lambda proxy: FailingProbeClient()
+
+    stats = await checker.check_proxy_health(proxy)
+
+    assert stats.last_outcome == ProbeOutcome.FAIL
+    assert stats.latency_ewma_ms == checker.check_timeout * 1000
+    assert proxy.latency_ms == checker.check_timeout * 1000
+
+
+async def test_tcp_rejection_does_not_record_latency():
+    proxy = Proxy(addr="10.0.0.1:8080")
+    checker = make_checker({proxy.addr: 200}, tcp_alive=False)
+    checker.probe_mode = "tiered"
+
+    stats = await checker.check_proxy_health(proxy)
+
+    assert stats.last_outcome == ProbeOutcome.FAIL
+    assert stats.latency_ewma_ms is None
+    assert proxy.latency_ms is None
+
+
+@pytest.mark.parametrize("probe_mode", ["http", "tcp", "tiered"])
+@pytest.mark.parametrize("status, tcp_alive", [(200, True), (503, True), (200, False)])
+async def test_each_check_records_one_concurrency_sample(
+    probe_mode: str, status: int, tcp_alive: bool
+):
+    proxy = Proxy(addr="10.0.0.1:8080")
+    checker = make_checker({proxy.addr: status}, tcp_alive=tcp_alive)
+    checker.probe_mode = probe_mode
+    samples = []
+    checker.concurrency.record = lambda latency_ms, timed_out=False: samples.append(latency_ms)
+
+    await checker.check_proxy_health(proxy)
+
+    assert len(samples) == 1
+    if probe_mode == "tiered" and tcp_alive:
+        # 深度验证的样本是HTTP往返耗时，而不是TCP预检耗时
+        assert samples[0] != 5.0
@@ -0,0 +1,236 @@
+"""
+MemoryProxyRepository 粘性会话、到期淘汰、切换排空与补充测试
+"""
+
+import time
+from typing import List, Optional
+
+from domain import IProxyFetcher, MarketType, Proxy, ProxyMode
+from infrastructure import proxy_quarantine
+from infrastructure.memory_proxy_repository import MemoryProxyRepository
+from infrastructure.proxy_fetchers import MockProxyFetcher
+from infrastructure.proxy_quarantine import ProxyQuarantine
+
+
+class FixedFetcher(IProxyFetcher):
+    """每次返回同一批地址的获取器"""
+
+    def __init__(self, addrs: List[str]):
+        self.addrs = addrs
+
+    async def fetch_proxies(self, count: int = 20) -> List[str]:
+        return self.addrs[:count]
+
+
+async def make_repo(
+    addrs: List[str], fetcher=None, expires_in: Optional[float] = None, **kwargs
+) -> MemoryProxyRepository:
+    """创建关闭健康检查的仓储，并向活跃池直接放入代理"""
+    kwargs.setdefault("max_in_flight_per_proxy", 0)
+    repo = MemoryProxyRepository(
+        MarketType.HK,
+        ProxyMode.LIVE,
+        fetcher or MockProxyFetcher("hk"),
+        enable_health_check=False,
+        **kwargs,
+    )
+    async with repo._lock:
+        for addr in addrs:
+            expires_ts = time.time() + expires_in if expires_in is not None else None
+            repo._admit(repo.active_pool, Proxy(addr=addr, expires_ts=expires_ts))
+    return repo
+
+
+def addrs(count: int, subnet: int = 0) -> List[str]:
+    return [f"10.0.{subnet}.{i + 1}:8080" for i in range(count)]
+
+
+async def session_map(repo: MemoryProxyRepository, keys: List[str]) -> dict:
+    return {key: (await repo.get_proxy_from_pool(session_key=key)).addr for key in keys}
+
+
+async def test_sticky_sessions_only_remap_keys_of_failed_proxy():
+    repo = await make_repo(addrs(10))
+    keys = [f"session-{i}" for i in range(200)]
+    before = await session_map(repo, keys)
+    assert len(set(before.values())) > 5
+
+    failed = before[keys[0]]
+    while failed in repo._addr_index:
+        await repo.mark_failure(failed)
+    # 清空已有映射，确认重新计算的 HRW 映射同样只移动失效代理的会话键
+    repo._sessions.clear()
+    after = await session_map(repo, keys)
+
+    for key in keys:
+        if before[key] == failed:
+            assert after[key] != failed
+        else:
+            assert after[key] == before[key]
+
+
+async def test_sticky_session_survives_rotation_while_draining():
+    repo = await make_repo(addrs(5), overlap_window_sec=60)
+    proxy = await repo.get_proxy_from_pool(session_key="user-1")
+
+    async with repo._lock:
+        for addr in addrs(5, subnet=1):
+            repo._admit(repo.standby_pool, Proxy(addr=addr))
+    await repo._switch_pools()
+
+    assert repo._draining_pool is not None
+    assert (await repo.get_proxy_from_pool(session_key="user-1")) is proxy
+    # 新会话键映射到新活跃池
+    fresh = await repo.get_proxy_from_pool(session_key="user-2")
+    assert repo._addr_index[fresh.addr] == repo.active_pool
+
+
+async def test_proxies_inside_safety_margin_are_evicted():
+    repo = await make_repo(addrs(3), expires_in=600, expiry_safety_margin_sec=30)
+    near = Proxy(addr="10.0.9.1:8080", expires_ts=time.time() + 10)
+    async with repo._lock:
+        repo._admit(repo.active_pool, near)
+
+    handed_out = {(await repo.get_proxy_from_pool()).addr for _ in range(50)}
+
+    assert near.addr not in handed_out
+    assert near.addr not in repo._addr_index
+    stats = await repo.get_stats()
+    assert stats.expired_evictions == 1
+    assert stats.active_pool_size == 3
+
+
+async def test_stale_expiry_entry_does_not_evict_readmitted_address():
+    repo = await make_repo([], expiry_safety_margin_sec=30)
+    old = Proxy(addr="10.0.9.1:8080", expires_ts=time.time() + 10)
+    fresh = Proxy(addr=old.addr, expires_ts=time.time() + 600)
+    async with repo._lock:
+        repo._admit(repo.active_pool, old)
+        repo._admit(repo.standby_pool, fresh)
+
+    assert (await repo.get_proxy_from_pool()) is fresh
+    assert (await repo.get_stats()).expired_evictions == 0
+
+
+async def rotated_repo(**kwargs) -> MemoryProxyRepository:
+    """已切换一次、旧池排空中的仓储"""
+    kwargs.setdefault("overlap_window_sec", 60)
+    repo = await make_repo(addrs(3), **kwargs)
+    async with repo._lock:
+        for addr in addrs(3, subnet=1):
+            repo._admit(repo.standby_pool, Proxy(addr=addr))
+    await repo._switch_pools()
+    return repo
+
+
+async def test_draining_pool_is_only_a_fallback_until_deadline():
+    repo = await rotated_repo()
+    old_pool = repo._draining_pool
+    assert old_pool == repo.standby_pool
+
+    for _ in range(20):
+        proxy = await repo.get_proxy_from_pool()
+        assert repo._addr_index[proxy.addr] == repo.active_pool
+    assert len(repo.pools[old_pool]) == 3
+
+    repo._drain_deadline_ts = time.time() - 1
+    await repo.get_proxy_from_pool()
+    assert repo._draining_pool is None
+    assert len(repo.pools[old_pool]) == 0
+
+
+async def test_refresh_ends_drain_before_refilling_standby():
+    repo = await rotated_repo()
+    old_addrs = set(addrs(3))
+
+    await repo._refresh_standby_pool()
+
+    assert repo._draining_pool is None
+    assert not old_addrs & {proxy.addr for proxy in repo.pools[repo.standby_pool]}
+    assert len(repo.pools[repo.standby_pool]) > 0
+
+
+async def test_rotation_without_overlap_clears_old_pool():
+    repo = await rotated_repo(overlap_window_sec=0)
+    assert repo._draining_pool is None
+    assert len(repo.pools[repo.standby_pool]) == 0
+
+
+
+async def evict(repo: MemoryProxyRepository, addr: str) -> None:
+    """连续上报失败直到代理被隔离出池"""
+    while addr in repo._addr_index:
+        await repo.mark_failure(addr)
+
+
+async def test_eviction_below_low_watermark_triggers_replenishment():
+    repo = await make_repo(addrs(4), low_watermark=3, target_size=6)
+    # 首次切换前由维护循环填充，不触发补充
+    await evict(repo, addrs(4)[0])
+    await evict(repo, addrs(4)[1])
+    assert not repo._replenish_event.is_set()
+
+    repo._switch_count = 1
+    await evict(repo, addrs(4)[2])
+    assert repo._replenish_event.is_set()
+
+    await repo._replenish_active_pool()
+    stats = await repo.get_stats()
+    assert stats.active_pool_size == 6
+    assert stats.replenished_proxies == 5
+
+
+async def test_replenishment_skipped_above_low_watermark():
+    repo = await make_repo(addrs(4), low_watermark=3, target_size=6)
+    repo._switch_count = 1
+    await evict(repo, addrs(4)[0])
+    assert not repo._replenish_event.is_set()
+
+    await repo._replenish_active_pool()
+    assert (await repo.get_stats()).replenished_proxies == 0
+
+
+async def test_quarantined_addresses_are_rejected_at_admission():
+    fetched = addrs(5, subnet=2)
+    repo = await make_repo([], fetcher=FixedFetcher(fetched))
+    repo._quarantine.add(fetched[0])
+    repo._quarantine.add(fetched[1])
+
+    admitted = await repo._fill_pool(lambda: repo.active_pool, 5, 1, 5)
+
+    assert admitted == 3
+    assert fetched[0] not in repo._addr_index and fetched[1] not in repo._addr_index
+    stats = await repo.get_stats()
+    assert stats.quarantine_rejections == 2
+    assert stats.quarantined_proxies == 2
+
+
+async def test_client_quarantine_blocks_readmission():
+    fetched = addrs(2, subnet=2)
+    repo = await make_repo([], fetcher=FixedFetcher(fetched))
+    await repo._fill_pool(lambda: repo.active_pool, 2, 1, 2)
+    await evict(repo, fetched[0])
+
+    assert await repo._fill_pool(lambda: repo.active_pool, 2, 1, 2) == 0
+    assert (await repo.get_stats()).quarantine_rejections == 1
+
+
+def test_quarantine_expires_after_ttl_and_is_bounded(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(proxy_quarantine.time, "time", lambda: now[0])
+    quarantine = ProxyQuarantine(ttl_sec=60, max_size=2)
+
+    quarantine.add("a")
+    now[0] += 30
+    quarantine.add("b")
+    quarantine.add("c")
+    # 超出容量淘汰最早隔离的地址
+    assert "a" not in quarantine and len(quarantine) == 2
+
+    now[0] += 31
+    assert "b" in quarantine
+    # 重新隔离重新计时
+    quarantine.add("b")
+    now[0] += 59
+    assert "b" in quarantine and "c" not in quarantine
+    assert len(quarantine) == 1
@@ -0,0 +1,33 @@
+"""
+代理获取器测试
+"""
+
+from typing import List
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+from infrastructure import proxy_fetchers
+from infrastructure.proxy_fetchers import HailiangProxyFetcher
+
+API_URL = "http://api.hailiang.test/api/getIp?type=1&num=400&orderId=O1&sign=abc"
+
+
+@pytest.mark.parametrize("count, expected_num", [(15, "15"), (400, "400"), (1000, "400")])
+async def test_hailiang_requests_only_missing_count(monkeypatch, count: int, expected_num: str):
+    urls: List[str] = []
+
+    async def fake_fetch(url, logger=None, client=None, breaker=None):
+        urls.append(url)
+        return []
+
+    monkeypatch.setattr(proxy_fetchers, "fetch_hailiang_proxy_ip", fake_fetch)
+    fetcher = HailiangProxyFetcher(API_URL)
+    try:
+        await fetcher.fetch_proxies(count)
+    finally:
+        await fetcher.close()
+
+    query = parse_qs(urlsplit(urls[0]).query)
+    assert query["num"] == [expected_num]
+    assert query["orderId"] == ["O1"] and query["sign"] == ["abc"]
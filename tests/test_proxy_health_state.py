@@ -0,0 +1,212 @@
+"""
+代理健康状态机与分层选择测试
+"""
+
+from collections import Counter
+
+import pytest
+
+from domain import (
+    FailureKind,
+    HealthTransitionPolicy,
+    MarketType,
+    Proxy,
+    ProxyHealthState,
+    ProxyMode,
+    ProxyStatus,
+)
+from infrastructure.memory_proxy_repository import MemoryProxyRepository
+from infrastructure.proxy_fetchers import MockProxyFetcher
+
+POLICY = HealthTransitionPolicy()
+
+
+def promoted(addr: str) -> Proxy:
+    proxy = Proxy(addr=addr)
+    for _ in range(POLICY.promote_after_successes):
+        proxy.record_success(POLICY)
+    assert proxy.health_state == ProxyHealthState.HEALTHY
+    return proxy
+
+
+@pytest.mark.parametrize(
+    "kind, strikes",
+    [
+        (FailureKind.TIMEOUT, 1),
+        (FailureKind.HTTP_ERROR, 1),
+        (FailureKind.CONNECT_ERROR, 2),
+        (FailureKind.CLIENT_REPORT, 2),
+        (FailureKind.BLOCKED, 3),
+    ],
+)
+def test_failure_kinds_add_weighted_strikes(kind: FailureKind, strikes: int):
+    proxy = Proxy(addr="10.0.0.1:8080")
+    proxy.record_failure(kind, POLICY)
+    assert proxy.strikes == strikes
+    assert proxy.failure_count == 1
+
+
+def test_probation_promotes_after_streak():
+    proxy = Proxy(addr="10.0.0.1:8080")
+    assert proxy.health_state == ProxyHealthState.PROBATION
+
+    assert proxy.record_success(POLICY) == ProxyHealthState.PROBATION
+    assert proxy.health_state == ProxyHealthState.PROBATION
+    proxy.record_success(POLICY)
+    assert proxy.health_state == ProxyHealthState.HEALTHY
+
+
+def test_failure_resets_streak():
+    proxy = Proxy(addr="10.0.0.1:8080")
+    proxy.record_success(POLICY)
+    proxy.record_failure(FailureKind.TIMEOUT, POLICY)
+    proxy.record_success(POLICY)
+    assert proxy.health_state == ProxyHealthState.PROBATION
+
+
+def test_healthy_degrades_to_suspect_and_recovers():
+    proxy = promoted("10.0.0.1:8080")
+
+    assert proxy.record_failure(FailureKind.TIMEOUT, POLICY) == ProxyHealthState.HEALTHY
+    assert proxy.health_state == ProxyHealthState.SUSPECT
+    assert proxy.is_healthy() and not proxy.is_preferred()
+
+    for _ in range(POLICY.recover_after_successes):
+        proxy.record_success(POLICY)
+    assert proxy.health_state == ProxyHealthState.HEALTHY
+    # 转为 healthy 时清零失败权重
+    assert proxy.strikes == 0
+
+
+def test_strikes_accumulate_to_quarantine():
+    proxy = promoted("10.0.0.1:8080")
+    proxy.record_failure(FailureKind.TIMEOUT, POLICY)
+    proxy.record_failure(FailureKind.CONNECT_ERROR, POLICY)
+
+    assert proxy.health_state == ProxyHealthState.QUARANTINED
+    assert proxy.status == ProxyStatus.FAILED
+    assert not proxy.is_healthy()
+    # 隔离后不再迁移
+    proxy.record_success(POLICY)
+    assert proxy.health_state == ProxyHealthState.QUARANTINED
+
+
+def test_blocked_quarantines_immediately():
+    proxy = promoted("10.0.0.1:8080")
+    proxy.record_failure(FailureKind.BLOCKED, POLICY)
+    assert proxy.health_state == ProxyHealthState.QUARANTINED
+
+
+async def make_repo(proxies, **kwargs) -> MemoryProxyRepository:
+    """启用健康检查（但不启动循环）的仓储，代理直接放入活跃池"""
+    kwargs.setdefault("low_watermark", 5)
+    repo = MemoryProxyRepository(
+        MarketType.HK, ProxyMode.LIVE, MockProxyFetcher("hk"), max_in_flight_per_proxy=0, **kwargs
+    )
+    async with repo._lock:
+        for proxy in proxies:
+            repo._admit(repo.active_pool, proxy)
+    return repo
+
+
+async def test_client_reports_quarantine_and_evict():
+    proxy = promoted("10.0.0.1:8080")
+    repo = await make_repo([proxy])
+
+    assert await repo.mark_failure(proxy.addr)
+    assert proxy.health_state == ProxyHealthState.SUSPECT
+    assert proxy.addr in repo._addr_index
+
+    assert await repo.mark_failure(proxy.addr)
+    assert proxy.health_state == ProxyHealthState.QUARANTINED
+    assert proxy.addr not in repo._addr_index
+    assert proxy.addr in repo._quarantine
+
+
+async def test_quarantined_by_probe_is_evicted():
+    healthy = promoted("10.0.0.1:8080")
+    blocked = promoted("10.0.0.2:8080")
+    repo = await make_repo([healthy, blocked])
+
+    blocked.record_failure(FailureKind.BLOCKED, POLICY)
+    await repo._apply_health_results([healthy, blocked])
+
+    assert blocked.addr not in repo._addr_index
+    assert healthy.addr in repo._addr_index
+    for _ in range(20):
+        assert (await repo.get_proxy_from_pool()).addr == healthy.addr
+
+
+async def test_suspect_only_served_without_healthy():
+    healthy = [promoted(f"10.0.0.{i}:8080") for i in range(1, 7)]
+    suspect = promoted("10.0.1.1:8080")
+    suspect.record_failure(FailureKind.TIMEOUT, POLICY)
+    repo = await make_repo([*healthy, suspect], low_watermark=5)
+
+    served = Counter([(await repo.get_proxy_from_pool()).addr for _ in range(200)])
+    assert suspect.addr not in served
+    assert (await repo.get_stats()).fallback_leases == 0
+
+    # healthy 全部被隔离后兜底下发 suspect 代理
+    for proxy in healthy:
+        proxy.record_failure(FailureKind.BLOCKED, POLICY)
+    await repo._apply_health_results(healthy)
+    assert (await repo.get_proxy_from_pool()).addr == suspect.addr
+    assert (await repo.get_stats()).fallback_leases == 1
+
+
+async def test_probation_blended_while_healthy_below_low_watermark():
+    """切换后新池大多在 probation：流量不应集中到最先转正的代理"""
+    proxies = [Proxy(addr=f"10.0.0.{i}:8080") for i in range(1, 11)]
+    for proxy in proxies:
+        proxy.record_success(POLICY)  # 入池探测
+    repo = await make_repo(proxies, low_watermark=5)
+
+    first = proxies[0]
+    first.record_success(POLICY)
+    async with repo._lock:
+        repo._make_selectable(repo.active_pool, first)
+    assert first.is_preferred()
+
+    served = Counter([(await repo.get_proxy_from_pool()).addr for _ in range(500)])
+    assert len(served) == len(proxies)
+    assert served[first.addr] < 150
+
+
+async def test_healthy_only_once_above_low_watermark():
+    healthy = [promoted(f"10.0.0.{i}:8080") for i in range(1, 6)]
+    probation = [Proxy(addr=f"10.0.1.{i}:8080") for i in range(1, 6)]
+    repo = await make_repo([*healthy, *probation], low_watermark=5)
+
+    served = {(await repo.get_proxy_from_pool()).addr for _ in range(200)}
+    assert served == {proxy.addr for proxy in healthy}
+
+
+async def test_client_success_promotes_and_moves_to_healthy_tier():
+    proxy = Proxy(addr="10.0.0.1:8080")
+    repo = await make_repo([proxy], low_watermark=0)
+    assert proxy.addr in repo._fallback[repo.active_pool]
+
+    for _ in range(POLICY.promote_after_successes):
+        lease = await repo.acquire_lease()
+        await repo.release_lease(lease.lease_id, success=True)
+
+    assert proxy.is_preferred()
+    assert proxy.addr in repo._selectable[repo.active_pool]
+    assert proxy.addr not in repo._fallback[repo.active_pool]
+
+
+async def test_watermark_counts_usable_proxies_not_pool_size():
+    proxies = [promoted(f"10.0.0.{i}:8080") for i in range(1, 11)]
+    repo = await make_repo(proxies)
+    repo._switch_count = 1
+
+    for proxy in proxies[:5]:
+        await repo.mark_failure(proxy.addr)
+    assert not repo._replenish_event.is_set()
+
+    for proxy in proxies[5:]:
+        await repo.mark_failure(proxy.addr)
+    # 全部降为 suspect 仍在池中，但已没有可用代理
+    assert len(repo.pools[repo.active_pool]) == 10
+    assert repo._replenish_event.is_set()
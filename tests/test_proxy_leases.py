@@ -0,0 +1,91 @@
+"""
+MemoryProxyRepository 租约与单IP在途上限测试
+"""
+
+import pytest
+
+from domain import MarketType, Proxy, ProxyMode
+from infrastructure.memory_proxy_repository import MemoryProxyRepository
+from infrastructure.proxy_fetchers import MockProxyFetcher
+
+
+async def make_repo(proxy_count: int = 2, **kwargs) -> MemoryProxyRepository:
+    """创建关闭健康检查的仓储，并向活跃池直接放入代理"""
+    kwargs.setdefault("max_in_flight_per_proxy", 2)
+    repo = MemoryProxyRepository(
+        MarketType.HK,
+        ProxyMode.LIVE,
+        MockProxyFetcher("hk"),
+        enable_health_check=False,
+        **kwargs,
+    )
+    async with repo._lock:
+        for i in range(proxy_count):
+            repo._admit(repo.active_pool, Proxy(addr=f"10.0.0.{i + 1}:8080"))
+    return repo
+
+
+async def test_acquire_and_release_lease():
+    repo = await make_repo()
+
+    lease = await repo.acquire_lease()
+    assert lease is not None
+    assert repo._in_flight[lease.proxy_addr] == 1
+    assert (await repo.get_stats()).active_leases == 1
+
+    assert await repo.release_lease(lease.lease_id, success=True, latency_ms=120.0)
+    assert lease.proxy_addr not in repo._in_flight
+    assert lease.proxy.latency_ms == 120.0
+    # 重复归还视为未知租约
+    assert not await repo.release_lease(lease.lease_id)
+
+
+async def test_saturated_proxies_are_skipped_until_released():
+    repo = await make_repo(proxy_count=2, max_in_flight_per_proxy=2)
+
+    leases = [await repo.acquire_lease() for _ in range(4)]
+    assert all(leases)
+    assert await repo.acquire_lease() is None
+    assert (await repo.get_stats()).saturated_proxies == 2
+
+    await repo.release_lease(leases[0].lease_id)
+    again = await repo.acquire_lease()
+    assert again is not None
+    assert again.proxy_addr == leases[0].proxy_addr
+
+
+async def test_expired_leases_are_reaped():
+    repo = await make_repo(proxy_count=1, max_in_flight_per_proxy=1, lease_ttl_sec=0)
+
+    first = await repo.acquire_lease()
+    assert first is not None
+    # 租约立即到期，下一次取代理时回收并恢复可选
+    second = await repo.acquire_lease()
+    assert second is not None
+    assert second.proxy_addr == first.proxy_addr
+    assert first.lease_id not in repo._leases
+    assert not await repo.release_lease(first.lease_id)
+
+
+async def test_batch_leases_count_toward_limit():
+    repo = await make_repo(proxy_count=3, max_in_flight_per_proxy=1)
+
+    leases = await repo.acquire_leases(5)
+    assert len({lease.proxy_addr for lease in leases}) == 3
+    assert await repo.acquire_leases(1) == []
+
+
+@pytest.mark.parametrize("count", [1, 5])
+async def test_plain_handouts_do_not_take_leases(count):
+    repo = await make_repo(proxy_count=2, max_in_flight_per_proxy=1)
+
+    for _ in range(100):
+        if count == 1:
+            assert await repo.get_proxy_from_pool() is not None
+        else:
+            assert len(await repo.get_proxies_from_pool(count)) == 2
+
+    assert repo._in_flight == {}
+    assert repo._leases == {}
+    # 不归还的调用方不影响租用方
+    assert await repo.acquire_lease() is not None